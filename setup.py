@@ -72,9 +72,15 @@ setup(
         'wappstoiot': ["py.typed", "*.pyi", "**/*.pyi"]
     },
     install_requires=[
-        'slxjsonrpc>=0.9.2',
-        'pydantic>=2.0.0,<3.0.0',
+        'slxjsonrpc==0.9.2',
+        'pydantic>=2.5.0,<3.0.0',
+        'typing_extensions>=4.6.1; python_version<"3.9"',
     ],
+    extras_require={
+        "fast": [
+            'orjson',
+        ]
+    },
     # entry_points={  # TODO: fix __main__.py to be optional.
     #     "console_scripts": "wappstoiot=wappstoiot:__main__"
     # },
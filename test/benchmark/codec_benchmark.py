@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Compare the stdlib json, with orjson, for the payloads the IoTAPI handle.
+
+The decode is what the receive path do for each frame, & the encode is what
+the offline storage resend do. The model encode compare pydantic's own
+serializer, (What the send path use) with a dump to a dict, that is encoded.
+
+Run from the repository root with:
+    PYTHONPATH=. python3 test/benchmark/codec_benchmark.py
+"""
+import datetime
+import json
+import time
+import uuid
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+from pydantic import BaseModel
+
+from wappstoiot.schema import base_schema as WSchema
+from wappstoiot.utils import codec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RUN_COUNT = 20_000
+BATCH_SIZE = 50
+
+
+def rpc_request(url: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap the data in a JSON-RPC request, as send to/from the server."""
+    return {
+        "jsonrpc": "2.0",
+        "id": uuid.uuid4().hex,
+        "method": "PUT",
+        "params": {
+            "url": url,
+            "data": data,
+            "meta": {"identifier": uuid.uuid4().hex},
+        },
+    }
+
+
+def state_model() -> WSchema.State:
+    """Return a Control State, as an inbound control carry it."""
+    return WSchema.State(
+        data="21.5",
+        type=WSchema.StateType.CONTROL,
+        timestamp=datetime.datetime.utcnow(),
+        meta=WSchema.StateMeta(id=uuid.uuid4(), version="2.1"),
+    )
+
+
+def value_model() -> WSchema.NumberValue:
+    """Return a Number Value, with its states."""
+    return WSchema.NumberValue(
+        name="temperature",
+        type="temperature",
+        permission=WSchema.PermissionType.READWRITE,
+        period="0",
+        delta="0",
+        number=WSchema.Number(min=-40, max=125, step=0.1, unit="°C"),
+        meta=WSchema.ValueMeta(id=uuid.uuid4(), version="2.1"),
+        state=[state_model(), state_model()],
+    )
+
+
+def payloads() -> Dict[str, BaseModel]:
+    """Return the models, the benchmark is run over."""
+    return {
+        "state": state_model(),
+        "value": value_model(),
+    }
+
+
+def timeit(func: Callable[[], Any], count: int = RUN_COUNT) -> float:
+    """Return the time per call in microseconds, best of 3."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(count):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / count * 1_000_000
+
+
+def main() -> None:
+    """Run the benchmark & print the results."""
+    print(f"Codec backend: {codec.BACKEND}")
+    documents: Dict[str, Any] = {}
+    for name, model in payloads().items():
+        data = model.model_dump(mode='json', exclude_none=True)
+        documents[name] = rpc_request(f"/{name}/{uuid.uuid4()}", data)
+    documents["batch"] = [
+        rpc_request(f"/state/{uuid.uuid4()}", state_model().model_dump(mode='json', exclude_none=True))
+        for _ in range(BATCH_SIZE)
+    ]
+
+    print(f"{'payload':>8} {'bytes':>7} {'json.loads (us)':>16} {'orjson.loads (us)':>18} "
+          f"{'json.dumps (us)':>16} {'orjson.dumps (us)':>18}")
+    for name, document in documents.items():
+        raw = json.dumps(document).encode()
+        count = RUN_COUNT // BATCH_SIZE if name == "batch" else RUN_COUNT
+        std_loads = timeit(lambda: json.loads(raw), count)
+        std_dumps = timeit(lambda: json.dumps(document), count)
+        if orjson is not None:
+            fast_loads = f"{timeit(lambda: orjson.loads(raw), count):18.2f}"
+            fast_dumps = f"{timeit(lambda: orjson.dumps(document).decode(), count):18.2f}"
+        else:
+            fast_loads = fast_dumps = f"{'n/a':>18}"
+        print(f"{name:>8} {len(raw):>7} {std_loads:16.2f} {fast_loads} {std_dumps:16.2f} {fast_dumps}")
+
+    print()
+    print(f"{'model':>8} {'model_dump_json (us)':>21} {'dumps(model_dump) (us)':>23}")
+    for name, model in payloads().items():
+        direct = timeit(lambda: codec.dumps_model(model))
+        via_dict = timeit(lambda: codec.dumps(model.model_dump(mode='json', exclude_none=True)))
+        print(f"{name:>8} {direct:21.2f} {via_dict:23.2f}")
+
+
+if __name__ == "__main__":
+    main()
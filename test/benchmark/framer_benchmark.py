@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Compare the old join-&-reparse receive logic, with the JsonFramer.
+
+Run from the repository root with:
+    PYTHONPATH=. python3 test/benchmark/framer_benchmark.py
+"""
+import json
+import time
+import uuid
+
+from typing import Any
+from typing import Callable
+from typing import List
+
+from wappstoiot.connections.framer import JsonFramer
+
+RECEIVE_SIZE = 2048
+
+SIZES = [
+    1_000,
+    10_000,
+    100_000,
+    1_000_000,
+    10_000_000,
+]
+
+# NOTE: The old logic is quadratic, so it takes minutes above this size.
+LEGACY_MAX_SIZE = 1_000_000
+
+
+def generate_payload(size: int) -> bytes:
+    """Create a JsonRpc batch reply, of around the given size in bytes."""
+    state = {
+        "jsonrpc": "2.0",
+        "id": "",
+        "result": {
+            "value": {
+                "data": "21.5",
+                "type": "Report",
+                "timestamp": "2023-11-17T12:00:00.000000Z",
+                "meta": {"id": "", "type": "state", "version": "2.1"},
+            },
+            "meta": {"server_send_time": "2023-11-17T12:00:00.000000Z"},
+        }
+    }
+    batch: List[Any] = []
+    total = 2
+    while total < size:
+        state["id"] = str(uuid.uuid4())
+        state["result"]["value"]["meta"]["id"] = str(uuid.uuid4())
+        batch.append(json.loads(json.dumps(state)))
+        total += len(json.dumps(state)) + 1
+    return json.dumps(batch).encode()
+
+
+def chunks(payload: bytes) -> List[bytes]:
+    """Split the payload up, like the socket would."""
+    return [
+        payload[i:i + RECEIVE_SIZE]
+        for i in range(0, len(payload), RECEIVE_SIZE)
+    ]
+
+
+def legacy_receive(data_chunks: List[bytes]) -> Any:
+    """The receive logic from before the JsonFramer."""
+    data = []
+    for data_chunk in data_chunks:
+        data.append(data_chunk)
+        try:
+            return json.loads(b"".join(data))
+        except ValueError:
+            pass
+
+
+def framer_receive(data_chunks: List[bytes]) -> Any:
+    """The receive logic using the JsonFramer."""
+    framer = JsonFramer()
+    for data_chunk in data_chunks:
+        framer.feed(data_chunk)
+        frame = framer.next_frame()
+        if frame is not None:
+            return json.loads(frame)
+
+
+def timeit(func: Callable[[List[bytes]], Any], data_chunks: List[bytes]) -> float:
+    """Return the best of a few runs, in seconds."""
+    runs = 3 if len(data_chunks) < 500 else 1
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(data_chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark & print the results."""
+    print(f"{'size':>12} {'chunks':>8} {'legacy (s)':>12} {'framer (s)':>12} {'speedup':>9}")
+    for size in SIZES:
+        payload = generate_payload(size)
+        data_chunks = chunks(payload)
+        assert framer_receive(data_chunks) == json.loads(payload)
+
+        framer_time = timeit(framer_receive, data_chunks)
+        if size <= LEGACY_MAX_SIZE:
+            legacy_time = timeit(legacy_receive, data_chunks)
+            legacy = f"{legacy_time:12.4f}"
+            speedup = f"{legacy_time / framer_time:8.1f}x"
+        else:
+            legacy = f"{'skipped':>12}"
+            speedup = f"{'-':>9}"
+        print(f"{len(payload):>12} {len(data_chunks):>8} {legacy} {framer_time:12.4f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Measure the import time of wappstoiot, with `python -X importtime`.
+
+'import' is the plain `import wappstoiot`, that only load the light modules.
+'first use' also touch `wappstoiot.Network`, that load the rest, (pydantic,
+slxjsonrpc, ssl & the schemas) like a real program do.
+
+Run from the repository root with:
+    PYTHONPATH=. python3 test/benchmark/import_benchmark.py
+"""
+import os
+import subprocess
+import sys
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+RUN_COUNT = 5
+TOP_COUNT = 10
+
+CASES = {
+    "import": "import wappstoiot",
+    "first use": "import wappstoiot; wappstoiot.Network",
+}
+
+
+def importtime(code: str) -> Dict[str, Tuple[int, int]]:
+    """Return the self & cumulative import time in microseconds, by module name."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+        env=dict(os.environ, PYTHONPATH=os.getcwd()),
+    )
+    times: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def total_us(times: Dict[str, Tuple[int, int]]) -> int:
+    """Return the total import time in microseconds."""
+    return sum(self_us for self_us, _ in times.values())
+
+
+def main() -> None:
+    """Run the benchmark & print the results."""
+    # NOTE: The modules the interpreter import at startup, are not counted.
+    startup = importtime("pass")
+    for case, code in CASES.items():
+        runs: List[Dict[str, Tuple[int, int]]] = [
+            {name: times for name, times in importtime(code).items() if name not in startup}
+            for _ in range(RUN_COUNT)
+        ]
+        best = min(runs, key=total_us)
+        print(f"{case}: {total_us(best) / 1000:.1f}ms, {len(best)} modules (best of {RUN_COUNT})")
+        print(f"{'self (ms)':>12} {'cumulative (ms)':>16}  module")
+        top = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:TOP_COUNT]
+        for name, (self_us, cumulative_us) in top:
+            print(f"{self_us / 1000:12.1f} {cumulative_us / 1000:16.1f}  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
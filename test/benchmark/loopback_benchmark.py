@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Measure the full IoTAPI & Network/Device/Value stack, without TLS & sockets.
+
+The LoopbackConnection hand the data straight to a minimal in-process server,
+that reply with success, so only the serialization, dispatch & callback
+overhead is measured, with an optional injected latency.
+
+Run from the repository root with:
+    PYTHONPATH=. python3 test/benchmark/loopback_benchmark.py
+"""
+import datetime
+import json
+import statistics
+import threading
+import time
+import uuid
+
+from typing import List
+
+import wappstoiot
+
+from wappstoiot.connections.loopback import LoopbackConnection
+from wappstoiot.schema.base_schema import StateType
+from wappstoiot.service.iot_api import IoTAPI
+
+REPORT_COUNT = 2_000
+CONTROL_COUNT = 2_000
+LATENCIES_SEC = [0.0, 0.001, 0.005]
+# NOTE: With a latency, the reports in flight at the same time, should at least give this.
+MIN_ASYNC_SPEEDUP = 1.5
+
+
+def server_time() -> str:
+    """Return the current time, as the server format it."""
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+def handler(data: bytes) -> bytes:
+    """
+    Reply success to all requests, except GET.
+
+    GET reply with an error, so the Network, Device & Value are created,
+    instead of loaded.
+    """
+    requests = json.loads(data)
+    if not isinstance(requests, list):
+        requests = [requests]
+
+    replies = []
+    for request in requests:
+        if "method" not in request:
+            continue  # NOTE: A reply to a request from the server.
+        if request["method"] == "GET":
+            replies.append({
+                "jsonrpc": "2.0",
+                "id": request["id"],
+                "error": {"code": -32000, "message": "Not Found"},
+            })
+            continue
+        replies.append({
+            "jsonrpc": "2.0",
+            "id": request["id"],
+            "result": {"value": True, "meta": {"server_send_time": server_time()}},
+        })
+    if not replies:
+        return b''
+    return json.dumps(replies if len(replies) > 1 else replies[0]).encode()
+
+
+def control_pkg(state_uuid: uuid.UUID, data: int) -> bytes:
+    """Return a Control update, as the server would send it."""
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "id": f"Server_PUT_{uuid.uuid4().hex}",
+        "method": "PUT",
+        "params": {
+            "url": f"/state/{state_uuid}",
+            "data": {
+                "data": str(data),
+                "timestamp": server_time(),
+                "meta": {"id": str(state_uuid), "type": "state", "version": "2.1"},
+            },
+            "meta": {"identifier": uuid.uuid4().hex},
+        },
+    }).encode()
+
+
+def run(latency_sec: float) -> None:
+    """Print the report & control rates, for the given latency."""
+    connection = LoopbackConnection(handler=handler, latency_sec=latency_sec)
+    api = IoTAPI(
+        ca=None,
+        crt=None,
+        key=None,
+        fast_send=True,
+        timeout=3,
+        connection=connection,
+    )
+    network = wappstoiot.Network(
+        name="benchmark",
+        connection=api,
+        network_uuid=uuid.uuid4(),
+    )
+    try:
+        device = network.createDevice(name="device")
+        value = device.createValue(
+            name="value",
+            permission=wappstoiot.PermissionType.READWRITE,
+            value_template=wappstoiot.ValueTemplate.NUMBER,
+        )
+
+        report_count = REPORT_COUNT if latency_sec == 0 else REPORT_COUNT // 10
+        report_times: List[float] = []
+        start = time.perf_counter()
+        for x in range(report_count):
+            report_start = time.perf_counter()
+            value.report(x)
+            report_times.append(time.perf_counter() - report_start)
+        report_rate = report_count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        futures = [value.report_async(x, force=True) for x in range(report_count)]
+        for future in futures:
+            future.result()
+        async_rate = report_count / (time.perf_counter() - start)
+
+        received = 0
+        received_lock = threading.Lock()
+        done = threading.Event()
+
+        @value.onControl
+        def on_control(obj: wappstoiot.Value, data: float) -> None:
+            nonlocal received
+            with received_lock:
+                received += 1
+                if received == CONTROL_COUNT:
+                    done.set()
+
+        state_uuid = value.children_name_mapping[StateType.CONTROL]
+        start = time.perf_counter()
+        for x in range(CONTROL_COUNT):
+            connection.push(control_pkg(state_uuid, x))
+        done.wait(60)
+        control_rate = received / (time.perf_counter() - start)
+    finally:
+        network.close()
+        api.close()
+
+    print(
+        f"{latency_sec * 1000:>12.1f} {report_rate:>14.0f} "
+        f"{statistics.median(report_times) * 1_000_000:>18.0f} {async_rate:>14.0f} {control_rate:>15.0f}"
+    )
+    if latency_sec > 0:
+        assert async_rate >= MIN_ASYNC_SPEEDUP * report_rate, (
+            f"report_async only {async_rate / report_rate:.1f}x the reports, at {latency_sec * 1000:.1f}ms latency."
+        )
+
+
+def main() -> None:
+    """Run the benchmark & print the results."""
+    print(f"{'latency (ms)':>12} {'reports (1/s)':>14} {'report median (us)':>18} {'async (1/s)':>14} {'controls (1/s)':>15}")
+    for latency_sec in LATENCIES_SEC:
+        run(latency_sec)
+
+
+if __name__ == "__main__":
+    main()
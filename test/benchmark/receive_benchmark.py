@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compare receiving into new bytes objects, with receiving into the framer.
+
+A plain socketpair is used, so only the receive & framing is measured, and
+not the TLS encryption.
+
+Run from the repository root with:
+    PYTHONPATH=. python3 test/benchmark/receive_benchmark.py
+"""
+import socket
+import threading
+import time
+
+from typing import Callable
+from typing import List
+
+from wappstoiot.connections.framer import JsonFramer
+
+from framer_benchmark import generate_payload
+
+RECEIVE_SIZES = [
+    2048,
+    16_384,
+    65_536,
+]
+
+PAYLOAD_SIZE = 1_000_000
+PAYLOAD_COUNT = 20
+
+
+def recv_copy(sock: socket.socket, framer: JsonFramer, size: int) -> int:
+    """Receive a new bytes object, & feed it to the framer."""
+    data_chunk = sock.recv(size)
+    framer.feed(data_chunk)
+    return len(data_chunk)
+
+
+def recv_zero_copy(sock: socket.socket, framer: JsonFramer, size: int) -> int:
+    """Receive straight into the framer's buffer."""
+    with framer.reserve(size) as buffer:
+        received = sock.recv_into(buffer)
+    framer.commit(received)
+    return received
+
+
+def run(
+    recv: Callable[[socket.socket, JsonFramer, int], int],
+    payload: bytes,
+    size: int,
+) -> float:
+    """Return the time it took to receive all the payloads."""
+    reader, writer = socket.socketpair()
+
+    def sender() -> None:
+        for _ in range(PAYLOAD_COUNT):
+            writer.sendall(payload)
+        writer.close()
+
+    framer = JsonFramer(size=2 * size)
+    frames: List[bytes] = []
+    thread = threading.Thread(target=sender)
+    start = time.perf_counter()
+    thread.start()
+    while recv(reader, framer, size):
+        frame = framer.next_frame()
+        while frame is not None:
+            frames.append(frame)
+            frame = framer.next_frame()
+    result = time.perf_counter() - start
+    thread.join()
+    reader.close()
+    assert len(frames) == PAYLOAD_COUNT
+    return result
+
+
+def main() -> None:
+    """Run the benchmark & print the results."""
+    payload = generate_payload(PAYLOAD_SIZE)
+    total = len(payload) * PAYLOAD_COUNT / 1_000_000
+    print(f"Receiving {PAYLOAD_COUNT} x {len(payload)} bytes.")
+    print(f"{'receive size':>12} {'recv (MB/s)':>12} {'recv_into (MB/s)':>17}")
+    for size in RECEIVE_SIZES:
+        copy_time = min(run(recv_copy, payload, size) for _ in range(3))
+        zero_copy_time = min(run(recv_zero_copy, payload, size) for _ in range(3))
+        print(f"{size:>12} {total / copy_time:12.1f} {total / zero_copy_time:17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Measure the CPU cost of building & serializing one state report.
+
+'validated' is the general request path: JsonData, a validated slxjsonrpc
+request & `model_dump_json`. 'fast path' is the StateEncoder path, that
+`put_state` & `put_bulk_state` use for a LogValue. Both register the
+request as pending, like a real report.
+
+Run from the repository root with:
+    PYTHONPATH=. python3 test/benchmark/report_benchmark.py
+"""
+import datetime
+import time
+import uuid
+
+from typing import Callable
+
+from wappstoiot.connections.loopback import LoopbackConnection
+from wappstoiot.schema.base_schema import LogValue
+from wappstoiot.schema.iot_schema import WappstoMethod
+from wappstoiot.service.iot_api import IoTAPI
+from wappstoiot.utils import codec
+
+REPORT_COUNT = 5_000
+
+
+def validated(api: IoTAPI, url: str, data: LogValue) -> None:
+    """Build & serialize the report through the general request path."""
+    rpc_data, _ = api._create_request(
+        method=WappstoMethod.PUT,
+        params=api._json_data(data=data, url=url, method=WappstoMethod.PUT),
+    )
+    codec.dumps_model(rpc_data)
+    api.pending.resolve(rpc_data.id, None)
+
+
+def fast_path(api: IoTAPI, url: str, data: LogValue) -> None:
+    """Build & serialize the report through the StateEncoder."""
+    rpc_data, _, _ = api._create_state_request(url, data)
+    api.pending.resolve(rpc_data.id, None)
+
+
+def run(build: Callable[[IoTAPI, str, LogValue], None], api: IoTAPI) -> float:
+    """Return the CPU time per report in microseconds, best of 3."""
+    url = f"/state/{uuid.uuid4()}"
+    reports = [
+        LogValue(data=str(x), timestamp=datetime.datetime.utcnow())
+        for x in range(REPORT_COUNT)
+    ]
+    best = float('inf')
+    for _ in range(3):
+        start = time.process_time()
+        for data in reports:
+            build(api, url, data)
+        best = min(best, time.process_time() - start)
+    return best / REPORT_COUNT * 1_000_000
+
+
+def main() -> None:
+    """Run the benchmark & print the results."""
+    api = IoTAPI(
+        ca=None,
+        crt=None,
+        key=None,
+        fast_send=True,
+        timeout=3,
+        connection=LoopbackConnection(handler=lambda data: b''),
+    )
+    try:
+        before = run(validated, api)
+        after = run(fast_path, api)
+    finally:
+        api.close()
+
+    print(f"{'path':>10} {'CPU per report (us)':>20}")
+    print(f"{'validated':>10} {before:20.1f}")
+    print(f"{'fast path':>10} {after:20.1f}")
+    print(f"Speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
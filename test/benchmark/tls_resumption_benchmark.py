@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Compare the reconnect latency, with & without TLS session resumption.
+
+A local `ssl` server is started on the loopback interface, with freshly
+generated certificates, & the TlsSocket reconnects to it a number of times.
+
+Run from the repository root with:
+    PYTHONPATH=. python3 test/benchmark/tls_resumption_benchmark.py
+"""
+import json
+import socket
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from pathlib import Path
+
+from typing import List
+from typing import Tuple
+
+from OpenSSL import crypto
+
+from wappstoiot.connections.sslsocket import TlsSocket
+
+# NOTE: The test utils are not a package, so the test folder is added, like pytest do.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.generators import root_certifi_gen  # noqa: E402
+
+RECONNECT_COUNT = 100
+
+
+def make_certificates(folder: Path) -> Tuple[Path, Path, Path, Path]:
+    """
+    Write self signed server & client certificates.
+
+    As they are self signed, each certificate is also its own CA.
+
+    Returns:
+        The server crt & key, followed by the client crt & key.
+    """
+    paths: List[Path] = []
+    for name in ("server", "client"):
+        certificate = root_certifi_gen(name="localhost")
+        crt = folder / f"{name}.crt"
+        key = folder / f"{name}.key"
+        crt.write_bytes(crypto.dump_certificate(crypto.FILETYPE_PEM, certificate["ca_crt"]))
+        key.write_bytes(crypto.dump_privatekey(crypto.FILETYPE_PEM, certificate["ca_key"]))
+        paths.extend((crt, key))
+    return (paths[0], paths[1], paths[2], paths[3])
+
+
+def serve(listener: socket.socket, context: ssl.SSLContext) -> None:
+    """Accept connections until the listener is closed."""
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except OSError:
+            return
+        # NOTE: Else Nagle's algorithm hides the handshake cost.
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            with context.wrap_socket(conn, server_side=True) as tls_conn:
+                # NOTE: TLS 1.3 session tickets are first received by the
+                #       client, when it reads data after the handshake.
+                tls_conn.sendall(b'{}')
+                while tls_conn.recv(1024):
+                    pass
+        except (OSError, ssl.SSLError):
+            pass
+
+
+def run(client: TlsSocket, resume: bool) -> List[float]:
+    """Return the latency of each reconnect."""
+    results: List[float] = []
+    client.connect()
+    client.receive(json.loads)
+    for _ in range(RECONNECT_COUNT):
+        client.disconnect()
+        if not resume:
+            client.session = None
+        start = time.perf_counter()
+        client.connect()
+        client.receive(json.loads)
+        results.append(time.perf_counter() - start)
+        assert client.session_reused == resume
+    client.disconnect()
+    return results
+
+
+def main() -> None:
+    """Run the benchmark & print the results."""
+    with tempfile.TemporaryDirectory() as temp:
+        server_crt, server_key, client_crt, client_key = make_certificates(Path(temp))
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile=server_crt, keyfile=server_key)
+        context.load_verify_locations(cafile=client_crt)
+        context.verify_mode = ssl.CERT_REQUIRED
+
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        thread = threading.Thread(target=serve, args=(listener, context), daemon=True)
+        thread.start()
+
+        client = TlsSocket(
+            address="localhost",
+            port=listener.getsockname()[1],
+            ca=server_crt,
+            crt=client_crt,
+            key=client_key,
+            max_reconnect_retry_count=1,
+        )
+
+        print(f"Reconnecting {RECONNECT_COUNT} times to a loopback TLS server.")
+        print(f"{'':>16} {'median (ms)':>12} {'p90 (ms)':>10}")
+        for name, resume in (("full handshake", False), ("resumed", True)):
+            results = sorted(run(client, resume))
+            median = statistics.median(results) * 1000
+            p90 = results[int(len(results) * 0.9)] * 1000
+            print(f"{name:>16} {median:12.2f} {p90:10.2f}")
+
+        client.close()
+        listener.close()
+
+
+if __name__ == "__main__":
+    main()
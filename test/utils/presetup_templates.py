@@ -2,6 +2,9 @@ import pathlib
 import uuid
 import shutil
 
+from socket import AF_INET
+from socket import SOCK_STREAM
+
 import pytest
 
 from typing import Any
@@ -45,9 +48,24 @@ class BaseConnection:
             target='wappstoiot.connections.sslsocket.socket.socket',
             autospec=True
         )
+        # NOTE: Resolve to the hostname itself, so no real DNS lookup is done.
+        mocker.patch(
+            target='wappstoiot.connections.resolver.socket.getaddrinfo',
+            side_effect=lambda host, port, *args, **kwargs: [
+                (AF_INET, SOCK_STREAM, 6, '', (host, port))
+            ]
+        )
 
         return socket
 
+    @pytest.fixture
+    def mock_open_connection(self, mocker):
+        open_connection = mocker.patch(
+            target='wappstoiot.connections.async_sslsocket.asyncio.open_connection',
+        )
+
+        return open_connection
+
     @classmethod
     def setup_class(cls):
         """
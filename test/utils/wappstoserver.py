@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import itertools
 import json
@@ -19,6 +20,8 @@ from pydantic import Field
 
 from utils import pkg_smithing
 
+from wappstoiot.connections.loopback import LoopbackConnection
+
 import rich
 
 
@@ -65,6 +68,53 @@ def pairwise(iterable):
     return itertools.zip_longest(a, a)
 
 
+class SimuStreamWriter(object):
+    """Stand in for the asyncio.StreamWriter, that reply through the SimuServer."""
+
+    def __init__(self, server: "SimuServer", reader: asyncio.StreamReader):
+        self.server = server
+        self.reader = reader
+        self.pusher = asyncio.ensure_future(self._push())
+
+    async def _push(self):
+        while not self.server.killed.is_set():
+            while self.server.data_to_be_send:
+                self.reader.feed_data(self.server.data_to_be_send.pop())
+            await asyncio.sleep(0.01)
+
+    def write(self, send_data: bytes) -> None:
+        self.server.log.debug(f"Data Received: {send_data}")
+        data = None
+        try:
+            self.server.data_in.append(send_data)
+            data = self.server.rpc_handle(send_data)
+        except Exception as error:
+            self.server.add_check(
+                False,
+                f"send_data={send_data}\n{error}\n{traceback.format_exc()}"
+            )
+            raise error
+        if data != b'':
+            self.server.log.debug(f"Data Reply: {data}")
+            self.reader.feed_data(data)
+
+    async def drain(self) -> None:
+        pass
+
+    def get_extra_info(self, name, default=None):
+        if name == 'sockname':
+            return ('127.0.0.1', 0)
+        return default
+
+    def close(self) -> None:
+        self.server.killed.set()
+        self.pusher.cancel()
+        self.reader.feed_eof()
+
+    async def wait_closed(self) -> None:
+        pass
+
+
 class SimuServer(object):
 
     param_op_list: List[str] = [
@@ -94,6 +144,7 @@ class SimuServer(object):
         self.killed = threading.Event()
         self.data_in: List[bytes] = []
         self.data_to_be_send: list[bytes] = []
+        self.loopback: Optional[LoopbackConnection] = None
 
     def get_network_obj(self) -> ObjectModel:
         return self.objects[self.network_uuid]
@@ -188,13 +239,13 @@ class SimuServer(object):
             self.add_check(this_type == self_type, msg)
 
         if self_type == 'value':
-            this_name = data.pop('name')
+            this_name = data.pop('name', None)
             children = data.pop('state') if 'state' in data.keys() else []
         elif self_type == 'device':
-            this_name = data.pop('name')
+            this_name = data.pop('name', None)
             children = data.pop('value') if 'value' in data.keys() else []
         elif self_type == 'network':
-            this_name = data.pop('name')
+            this_name = data.pop('name', None)
             children = data.pop('device') if 'device' in data.keys() else []
         elif self_type == 'state':
             if 'timestamp' in data.keys():
@@ -276,6 +327,43 @@ class SimuServer(object):
 
         mock_ssl_socket.return_value.recv.side_effect = socket_simu
 
+        pending = bytearray()
+
+        def socket_simu_into(buffer, *args, **kwargs) -> int:
+            if not pending:
+                pending.extend(socket_simu())
+            size = min(len(buffer), len(pending))
+            buffer[:size] = pending[:size]
+            del pending[:size]
+            return size
+
+        mock_ssl_socket.return_value.recv_into.side_effect = socket_simu_into
+
+    def get_async_streams(self, mock_open_connection):
+        async def open_connection(*args, **kwargs):
+            self.killed.clear()
+            reader = asyncio.StreamReader()
+            return reader, SimuStreamWriter(self, reader)
+
+        mock_open_connection.side_effect = open_connection
+
+    def get_loopback(self, latency_sec: float = 0.0) -> LoopbackConnection:
+        self.killed.clear()
+
+        def handler(send_data: bytes) -> bytes:
+            self.data_in.append(send_data)
+            try:
+                return self.rpc_handle(send_data)
+            except Exception as error:
+                self.add_check(
+                    False,
+                    f"send_data={send_data}\n{error}\n{traceback.format_exc()}"
+                )
+                raise error
+
+        self.loopback = LoopbackConnection(handler=handler, latency_sec=latency_sec)
+        return self.loopback
+
     def send_data(
         self,
         data: Union[dict, list],
@@ -293,6 +381,9 @@ class SimuServer(object):
                 pkg_data=data,
             )
         ).encode()
+        if self.loopback is not None:
+            self.loopback.push(pkg_data)
+            return
         self.data_to_be_send.append(pkg_data)
         # TODO: Add to wait for reply list/function.
 
@@ -499,6 +590,18 @@ class SimuServer(object):
         the_uuid = url_obj[0].uuid
         the_type = url_obj[0].type
 
+        expand = [x for x in url_obj[1] if x.left == 'expand']
+        if expand and the_uuid:
+            if the_type == "network":
+                the_uuid = self.network_uuid
+            if the_uuid not in self.objects.keys():
+                raise ErrorException(
+                    code=-32602,
+                    msg="UUID not found!",
+                    data=str(the_uuid)
+                )
+            return self._obj_expand(obj_uuid=the_uuid, depth=int(expand[0].right))
+
         if url_obj[1] or not the_uuid:
             return self._search_obj(data=data, url_obj=url_obj)
 
@@ -651,6 +754,20 @@ class SimuServer(object):
             obj_list=valid_children
         )
 
+    def _obj_expand(self, obj_uuid: uuid.UUID, depth: int) -> dict:
+        obj_dict = self._obj_generate(obj_uuid=obj_uuid)
+        child_key = {
+            'network': 'device',
+            'device': 'value',
+            'value': 'state',
+        }.get(self.objects[obj_uuid].type)
+        if depth > 0 and child_key in obj_dict:
+            obj_dict[child_key] = [
+                self._obj_expand(obj_uuid=child, depth=depth - 1)
+                for child in self.objects[obj_uuid].children
+            ]
+        return obj_dict
+
     def _obj_generate(self, obj_uuid: uuid.UUID) -> dict:
         obj_data = self.objects[obj_uuid]
         # NOTE: Can be make to a dictionary instead!
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 
+import asyncio
 import datetime
 import json
+import threading
 import uuid
 
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import List
+from typing import Optional
 from typing import Union
 
 import pytest
@@ -52,6 +57,633 @@ class TestConnection(BaseConnection):
         mock_ssl_socket.return_value.connect.assert_called_with((f"{url}", port))
         self.remove_temps()
 
+    @pytest.mark.parametrize(
+        "profile, nodelay, buffer_size, receive_size, coalesce",
+        [
+            ("default", False, None, 2048, False),
+            ("low_latency", True, 16_384, 2048, False),
+            ("bulk", False, 1_048_576, 65_536, True),
+        ]
+    )
+    def test_transport_profile(
+        self,
+        mock_rw_socket,
+        mock_ssl_socket,
+        profile: str,
+        nodelay: bool,
+        buffer_size,
+        receive_size: int,
+        coalesce: bool,
+    ):
+        import socket
+
+        self.generate_certificates(name="wappsto.com", network_uuid=uuid.uuid4())
+        try:
+            wappstoiot.config(
+                config_folder=self.temp,
+                transport_profile=profile,
+            )
+            the_connection = getattr(wappstoiot, "__the_connection")
+            assert the_connection.connection.RECEIVE_SIZE == receive_size
+            assert the_connection.send_queue.coalesce is coalesce
+        finally:
+            wappstoiot.close()
+
+        options = [x[0] for x in mock_rw_socket.return_value.setsockopt.call_args_list]
+        assert ((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in options) is nodelay
+        if buffer_size is None:
+            assert not [x for x in options if x[1] in (socket.SO_SNDBUF, socket.SO_RCVBUF)]
+        else:
+            assert (socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size) in options
+            assert (socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size) in options
+        self.remove_temps()
+
+    @pytest.mark.parametrize(
+        "chunk_size",
+        [1, 3, 64, 2048]
+    )
+    def test_json_framer(self, chunk_size: int):
+        from wappstoiot.connections.framer import JsonFramer
+
+        docs = [
+            {"jsonrpc": "2.0", "id": "a}]", "result": {"value": True}},
+            [{"data": "Escaped \"quote\" & \\ {["}, {"list": [1, [2, []]]}],
+            "Top level string",
+            {"data": "ÆØÅ", "nested": {"deep": [[[[[[[[[[]]]]]]]]]]}},
+        ]
+        stream = b"\n".join(json.dumps(doc, ensure_ascii=False).encode() for doc in docs)
+
+        framer = JsonFramer()
+        frames = []
+        for i in range(0, len(stream), chunk_size):
+            framer.feed(stream[i:i + chunk_size])
+            frame = framer.next_frame()
+            while frame is not None:
+                frames.append(json.loads(frame))
+                frame = framer.next_frame()
+
+        assert frames == docs
+        assert len(framer) == 0
+
+    def test_lazy_import(self):
+        import os
+        import subprocess
+        import sys
+
+        heavy = ["asyncio", "pydantic", "slxjsonrpc", "ssl", "wappstoiot.schema.base_schema"]
+        code = (
+            "import sys, wappstoiot\n"
+            f"print(*[name for name in {heavy} if name in sys.modules])\n"
+            "wappstoiot.Network, wappstoiot.IoTAPI, wappstoiot.service.StatusID, wappstoiot.ValueTemplate.NUMBER\n"
+            f"print(*[name for name in {heavy} if name in sys.modules])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+            env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(wappstoiot.__file__))),
+        )
+        on_import, on_use = result.stdout.splitlines()
+        import_time = [line for line in result.stderr.splitlines() if line.endswith("| wappstoiot")]
+        cumulative_us = int(import_time[-1].split("|")[1])
+
+        assert on_import == ""
+        assert set(on_use.split()) >= {"pydantic", "slxjsonrpc", "ssl", "wappstoiot.schema.base_schema"}
+        # NOTE: ~15ms here, where importing the heavy modules too, took ~300ms.
+        assert cumulative_us < 150_000
+
+    @pytest.mark.parametrize(
+        "backend",
+        ["orjson", "json"]
+    )
+    def test_codec(self, mocker, backend: str):
+        from wappstoiot.utils import codec
+
+        if backend == "json":
+            mocker.patch.object(codec, "loads", codec._std_loads)
+            mocker.patch.object(codec, "dumps", codec._std_dumps)
+        elif codec.BACKEND != "orjson":
+            pytest.skip("orjson is not installed.")
+
+        doc = {"jsonrpc": "2.0", "id": "a", "params": {"data": "ÆØÅ", "list": [1, 2.5, None, True]}}
+        raw = json.dumps(doc, ensure_ascii=False).encode()
+
+        assert codec.loads(raw) == doc
+        assert codec.loads(memoryview(raw)) == doc
+        assert codec.loads(raw.decode()) == doc
+        assert json.loads(codec.dumps(doc)) == doc
+        assert json.loads(codec.join([codec.dumps(doc), codec.dumps([doc])])) == [doc, [doc]]
+        assert codec.dumps_model(wappstoiot.LogValue(data="1", timestamp=datetime.datetime(2012, 8, 1))) == (
+            '{"data":"1","timestamp":"2012-08-01T00:00:00.000000Z"}'
+        )
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            (True, "bool"),
+            ({"name": "v", "number": {"min": 0, "max": 1, "step": 1}, "meta": {"type": "value"}}, "NumberValue"),
+            ({"name": "v", "blob": {"max": 1}, "meta": {"type": "value"}}, "BlobValue"),
+            ({"name": "v", "xml": {}}, "XmlValue"),
+            ({"name": "v"}, "Device"),
+            ({"data": "1", "meta": {"type": "state"}}, "State"),
+            ({"name": "d", "meta": {"type": "device"}, "value": [
+                str(uuid.uuid4()), {"name": "v", "string": {"max": 1}}
+            ]}, "Device"),
+        ]
+    )
+    def test_reply_discriminator(self, value: Any, expected: str):
+        from wappstoiot.schema.iot_schema import JsonReply
+        from wappstoiot.schema.iot_schema import JsonData
+
+        if isinstance(value, dict) and "meta" in value:
+            value["meta"].update(id=str(uuid.uuid4()), version="2.0")
+
+        reply = JsonReply.model_validate({"value": value, "meta": {"server_send_time": "2020-01-01T00:00:00Z"}})
+
+        assert type(reply.value).__name__ == expected
+        if expected == "Device" and reply.value.value:
+            assert [type(x).__name__ for x in reply.value.value] == ["UUID", "StringValue"]
+        if expected.endswith("Value"):
+            data = JsonData(url=f"/value/{uuid.uuid4()}", data=value, meta=None)
+            assert type(data.data).__name__ == expected
+
+    @pytest.mark.parametrize(
+        "fast_send",
+        [True, False]
+    )
+    @pytest.mark.parametrize(
+        "backend",
+        ["orjson", "json"]
+    )
+    def test_state_encoder(self, monkeypatch, fast_send: bool, backend: str):
+        import slxjsonrpc
+        from wappstoiot.schema.iot_schema import Identifier
+        from wappstoiot.schema.iot_schema import JsonData
+        from wappstoiot.schema.iot_schema import ReplyResult
+        from wappstoiot.schema.iot_schema import WappstoMethod
+        from wappstoiot.service.state_encoder import StateEncoder
+        from wappstoiot.utils import codec
+
+        if backend == "json":
+            monkeypatch.setattr(codec, "dumps", codec._std_dumps)
+        elif codec.orjson is None:
+            pytest.skip("orjson is not installed")
+
+        jsonrpc = slxjsonrpc.SlxJsonRpc(
+            methods=WappstoMethod,
+            result={WappstoMethod.PUT: ReplyResult},
+            params={WappstoMethod.PUT: JsonData},
+        )
+        encoder = StateEncoder(fast=fast_send)
+        data = wappstoiot.LogValue(data='Escaped "quote" \\ ÆØÅ 温度 ✓', timestamp=datetime.datetime.utcnow())
+        url = f"/state/{uuid.uuid4()}"
+
+        request = jsonrpc.create_request(
+            method=WappstoMethod.PUT,
+            callback=lambda _: None,
+            params=JsonData(
+                url=url,
+                data=data,
+                meta=Identifier(fast=True, identifier=None) if fast_send else None,
+            ),
+        )
+
+        assert encoder.next_id() != encoder.next_id()
+        assert encoder.encode(request.id, url, data.data, data.timestamp).encode('utf-8') == (
+            codec.dumps_model(request).encode('utf-8')
+        )
+
+    @pytest.mark.parametrize(
+        "attempt",
+        [0, 1, 5, 10, 10_000]
+    )
+    def test_full_jitter_backoff(self, attempt: int):
+        from wappstoiot.utils.jitter import full_jitter_backoff
+
+        delays = [
+            full_jitter_backoff(attempt=attempt, base_sec=0.5, max_sec=30)
+            for _ in range(200)
+        ]
+
+        assert all(0 <= delay <= min(30, 0.5 * 2 ** min(attempt, 32)) for delay in delays)
+        assert len(set(delays)) > 1
+
+    def test_reconnect_single_owner(self, mock_rw_socket, mock_ssl_socket):
+        from wappstoiot.connections.sslsocket import TlsSocket
+        from wappstoiot.connections.protocol import StatusID
+        from wappstoiot.utils import observer
+
+        self.generate_certificates(name="wappsto.com", network_uuid=uuid.uuid4())
+        events = []
+
+        def on_reconnect(event, data):
+            events.append((event, data))
+
+        observer.subscribe(StatusID.RECONNECTING, on_reconnect)
+        observer.subscribe(StatusID.RECONNECTED, on_reconnect)
+
+        tls = TlsSocket(
+            address="wappsto.com",
+            port=443,
+            ca=self.temp / "ca.crt",
+            crt=self.temp / "client.crt",
+            key=self.temp / "client.key",
+            reconnect_base_sec=0.05,
+        )
+        try:
+            tls.connect()
+            mock_ssl_socket.return_value.connect.reset_mock()
+            mock_ssl_socket.return_value.connect.side_effect = [OSError, OSError, None]
+
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(tls.reconnect()))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+
+            server_utils.wait_until_or(lambda: len(events) == 3, 1)
+        finally:
+            observer.unsubscribe(StatusID.RECONNECTING, on_reconnect)
+            observer.unsubscribe(StatusID.RECONNECTED, on_reconnect)
+            tls.close()
+
+        assert results == [True] * 5
+        assert mock_ssl_socket.return_value.connect.call_count == 3
+        assert sorted(data.attempt for _, data in events) == [1, 2, 3]
+        reconnected = [data for event, data in events if event == StatusID.RECONNECTED]
+        assert len(reconnected) == 1
+        assert reconnected[0].disconnected_sec > 0
+
+    def test_certificate_bundle(self, mock_rw_socket, mock_ssl_socket):
+        from wappstoiot.connections.sslsocket import TlsSocket
+        from wappstoiot.utils.certificateread import CertificateBundle
+
+        network_uuid = uuid.uuid4()
+        self.generate_certificates(name="qa.wappsto.com", network_uuid=network_uuid)
+        paths = {
+            "ca": self.temp / "ca.crt",
+            "crt": self.temp / "client.crt",
+            "key": self.temp / "client.key",
+        }
+        bundle = CertificateBundle.load(**paths)
+
+        assert bundle.network_uuid == network_uuid
+        assert bundle.endpoint == "qa.wappsto.com"
+        assert CertificateBundle.load(**paths) is bundle
+
+        sockets = [TlsSocket(address="qa.wappsto.com", port=53005, **paths) for _ in range(2)]
+
+        assert sockets[0].ssl_context is sockets[1].ssl_context is bundle.ssl_context
+
+        new_uuid = uuid.uuid4()
+        self.generate_certificates(name="qa.wappsto.com", network_uuid=new_uuid)
+        new_bundle = CertificateBundle.load(**paths)
+
+        assert new_bundle is not bundle
+        assert new_bundle.network_uuid == new_uuid
+
+        paths["key"].unlink()
+        with pytest.raises(FileNotFoundError):
+            CertificateBundle.load(**paths)
+        self.remove_temps()
+
+    def test_session_resumption(self, mock_rw_socket, mock_ssl_socket):
+        from wappstoiot.connections.sslsocket import TlsSocket
+
+        self.generate_certificates(name="wappsto.com", network_uuid=uuid.uuid4())
+
+        tls = TlsSocket(
+            address="wappsto.com",
+            port=443,
+            ca=self.temp / "ca.crt",
+            crt=self.temp / "client.crt",
+            key=self.temp / "client.key",
+        )
+        try:
+            tls.connect()
+            assert mock_ssl_socket.call_args[1]["session"] is None
+
+            session = mock_ssl_socket.return_value.session
+            mock_ssl_socket.return_value.session_reused = True
+            tls.reconnect()
+        finally:
+            tls.close()
+
+        assert mock_ssl_socket.call_args[1]["session"] is session
+        assert tls.session_reused is True
+
+    def test_receive_wakeups_and_shutdown(self):
+        import socket
+        import ssl
+        import time
+        from OpenSSL import crypto
+        from utils.generators import root_certifi_gen
+        from wappstoiot.connections.profiles import TransportProfile
+        from wappstoiot.connections.sslsocket import TlsSocket
+
+        for name in ["server", "client"]:
+            certificate = root_certifi_gen(name="localhost")
+            (self.temp / f"{name}.crt").write_bytes(
+                crypto.dump_certificate(crypto.FILETYPE_PEM, certificate["ca_crt"])
+            )
+            (self.temp / f"{name}.key").write_bytes(
+                crypto.dump_privatekey(crypto.FILETYPE_PEM, certificate["ca_key"])
+            )
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile=self.temp / "server.crt", keyfile=self.temp / "server.key")
+
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        client_done = threading.Event()
+
+        def serve():
+            conn, _ = listener.accept()
+            with context.wrap_socket(conn, server_side=True) as tls_conn:
+                tls_conn.sendall(b'{"data": 1}')
+                client_done.wait(5)
+
+        server = threading.Thread(target=serve, daemon=True)
+        server.start()
+
+        # NOTE: A short socket timeout, that would wake up the old receive loop often.
+        tls = TlsSocket(
+            address="localhost",
+            port=listener.getsockname()[1],
+            ca=self.temp / "server.crt",
+            crt=self.temp / "client.crt",
+            key=self.temp / "client.key",
+            profile=TransportProfile(socket_timeout_sec=0.1),
+        )
+        results = []
+
+        def receive():
+            results.append(tls.receive(json.loads))
+            results.append(tls.receive(json.loads))
+
+        try:
+            tls.connect()
+            receiver = threading.Thread(target=receive)
+            receiver.start()
+            server_utils.wait_until_or(lambda: results, 1)
+            time.sleep(1)  # NOTE: Idle.
+            idle_wakeups = tls.wakeup_count
+
+            start = time.perf_counter()
+            tls.close()
+            receiver.join(timeout=5)
+            shutdown_sec = time.perf_counter() - start
+        finally:
+            tls.close()
+            client_done.set()
+            listener.close()
+            self.remove_temps()
+
+        assert results == [{"data": 1}, None]
+        assert idle_wakeups == 1
+        assert shutdown_sec < 0.5
+        assert tls.selector is None
+
+    def test_resolver_cache_and_fallback(self, mocker):
+        import socket
+        from wappstoiot.connections.resolver import Address
+        from wappstoiot.connections.resolver import Resolver
+
+        getaddrinfo = mocker.patch(
+            target='wappstoiot.connections.resolver.socket.getaddrinfo',
+            return_value=[
+                (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 443)),
+                (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.2', 443)),
+            ]
+        )
+        first = Address(family=socket.AF_INET, sockaddr=('10.0.0.1', 443))
+        second = Address(family=socket.AF_INET, sockaddr=('10.0.0.2', 443))
+
+        resolver = Resolver(ttl_sec=60)
+        assert resolver.resolve("wappsto.com", 443) == [first, second]
+        assert resolver.resolve("wappsto.com", 443) == [first, second]
+        assert getaddrinfo.call_count == 1
+
+        resolver.mark_good("wappsto.com", 443, second)
+        resolver.ttl_sec = 0
+        resolver.clear()
+        getaddrinfo.side_effect = socket.gaierror("DNS down")
+        with pytest.raises(socket.gaierror):
+            Resolver().resolve("wappsto.com", 443)
+        assert resolver.resolve("wappsto.com", 443) == [second]
+
+    def test_resolver_hanging_lookup(self, mocker):
+        import socket
+        import threading
+        from wappstoiot.connections.resolver import Resolver
+
+        release = threading.Event()
+
+        def hanging_getaddrinfo(*args, **kwargs):
+            release.wait(timeout=5)
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 443))]
+
+        getaddrinfo = mocker.patch(
+            target='wappstoiot.connections.resolver.socket.getaddrinfo',
+            side_effect=hanging_getaddrinfo,
+        )
+
+        resolver = Resolver(timeout_sec=0.05)
+        for _ in range(3):
+            with pytest.raises(socket.timeout):
+                resolver.resolve("wappsto.com", 443)
+        # NOTE: The timed out lookup is waited on again, instead of starting new ones.
+        assert getaddrinfo.call_count == 1
+
+        release.set()
+        server_utils.wait_until_or(lambda: not resolver.lookups, 1)
+        assert resolver.lookups == {}
+        assert resolver.resolve("wappsto.com", 443)[0].sockaddr == ('10.0.0.1', 443)
+
+    def test_connect_tries_next_address(self, mocker, mock_rw_socket, mock_ssl_socket):
+        import socket
+        from wappstoiot.connections.sslsocket import TlsSocket
+
+        self.generate_certificates(name="wappsto.com", network_uuid=uuid.uuid4())
+        mocker.patch(
+            target='wappstoiot.connections.resolver.socket.getaddrinfo',
+            return_value=[
+                (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('::1', 443, 0, 0)),
+                (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.2', 443)),
+            ]
+        )
+        mock_ssl_socket.return_value.connect.side_effect = [socket.timeout, None]
+
+        tls = TlsSocket(
+            address="wappsto.com",
+            port=443,
+            ca=self.temp / "ca.crt",
+            crt=self.temp / "client.crt",
+            key=self.temp / "client.key",
+        )
+        try:
+            assert tls.connect() is True
+        finally:
+            tls.close()
+
+        assert [x[0][0] for x in mock_ssl_socket.return_value.connect.call_args_list] == [
+            ('::1', 443, 0, 0),
+            ('10.0.0.2', 443),
+        ]
+        assert [x[0][0] for x in mock_rw_socket.call_args_list] == [socket.AF_INET6, socket.AF_INET]
+        assert tls.resolver.resolve("wappsto.com", 443)[0].sockaddr == ('10.0.0.2', 443)
+
+    @pytest.mark.parametrize(
+        "policy, sent, dropped, spilled",
+        [
+            ("block", ["0", "1", "2", "3", "4"], 0, []),
+            ("drop_oldest", ["0", "3", "4"], 2, []),
+            ("spill", ["0", "1", "2"], 0, ["3", "4"]),
+        ]
+    )
+    def test_send_queue_policy(self, mocker, policy, sent, dropped, spilled):
+        from wappstoiot.connections.send_queue import SendQueue
+
+        link_ready = threading.Event()
+        connection = mocker.MagicMock()
+        connection.send.side_effect = lambda data: link_ready.wait(5)
+        spill_list = []
+
+        send_queue = SendQueue(
+            connection=connection,
+            max_size=2,
+            policy=policy,
+            on_spill=spill_list.append,
+        )
+        try:
+            send_queue.put("0", "0")
+            server_utils.wait_until_or(lambda: send_queue.in_flight, 1)
+
+            send_queue.put("1", "1")
+            send_queue.put("2", "2")
+            thread = threading.Thread(
+                target=lambda: [send_queue.put(x, x) for x in ["3", "4"]]
+            )
+            thread.start()
+            thread.join(timeout=0.2)
+
+            assert thread.is_alive() is (policy == "block")
+            assert send_queue.metrics().depth == 2
+            link_ready.set()
+            thread.join(timeout=5)
+            assert send_queue.flush(timeout=5)
+        finally:
+            send_queue.close(timeout=1)
+
+        metrics = send_queue.metrics()
+        assert [call[0][0] for call in connection.send.call_args_list] == sent
+        assert spill_list == spilled
+        assert metrics.dropped == dropped
+        assert metrics.spilled == len(spilled)
+        assert metrics.sent == len(sent)
+        assert metrics.peak_depth == 2
+        assert metrics.wait_max_sec > 0
+
+    def test_send_queue_coalesce(self, mocker):
+        from wappstoiot.connections.send_queue import SendQueue
+
+        link_ready = threading.Event()
+        connection = mocker.MagicMock()
+        connection.send.side_effect = lambda data: link_ready.wait(5)
+
+        send_queue = SendQueue(connection=connection, coalesce=True)
+        try:
+            send_queue.put('{"id": 1}')
+            server_utils.wait_until_or(lambda: send_queue.in_flight, 1)
+            send_queue.put('{"id": 2}')
+            send_queue.put('[{"id": 3}, {"id": 4}]')
+            send_queue.put('{"id": 5}')
+            link_ready.set()
+            assert send_queue.flush(timeout=5)
+        finally:
+            send_queue.close(timeout=1)
+
+        sent = [json.loads(call[0][0]) for call in connection.send.call_args_list]
+        assert sent == [{"id": 1}, [{"id": 2}, {"id": 3}, {"id": 4}, {"id": 5}]]
+        assert send_queue.metrics().writes == 2
+
+    def test_send_queue_coalesce_replies(self, mocker):
+        from wappstoiot.connections.send_queue import SendQueue
+
+        link_ready = threading.Event()
+        connection = mocker.MagicMock()
+        connection.send.side_effect = lambda data: link_ready.wait(5)
+
+        send_queue = SendQueue(connection=connection, coalesce=True)
+        try:
+            send_queue.put('{"id": 1, "method": "PUT"}')
+            server_utils.wait_until_or(lambda: send_queue.in_flight, 1)
+            send_queue.put('{"id": 2, "method": "PUT"}')
+            send_queue.put('{"id": "a", "result": true}', request=False)
+            send_queue.put('{"id": 3, "method": "PUT"}')
+            send_queue.put('{"id": 4, "method": "PUT"}')
+            send_queue.put('{"id": "b", "result": true}', request=False)
+            send_queue.put('{"id": "c", "result": true}', request=False)
+            link_ready.set()
+            assert send_queue.flush(timeout=5)
+        finally:
+            send_queue.close(timeout=1)
+
+        sent = [json.loads(call[0][0]) for call in connection.send.call_args_list]
+        assert sent == [
+            {"id": 1, "method": "PUT"},
+            {"id": 2, "method": "PUT"},
+            {"id": "a", "result": True},
+            [{"id": 3, "method": "PUT"}, {"id": 4, "method": "PUT"}],
+            {"id": "b", "result": True},
+            {"id": "c", "result": True},
+        ]
+
+    def test_ordered_executor(self):
+        from wappstoiot.service.ordered_executor import OrderedExecutor
+
+        slow_started = threading.Event()
+        slow_ready = threading.Event()
+        calls: Dict[str, List[int]] = {"slow": [], "fast": []}
+
+        def handler(key: str, count: int) -> None:
+            if key == "slow" and count == 0:
+                slow_started.set()
+                slow_ready.wait(5)
+            calls[key].append(count)
+
+        executor = OrderedExecutor(max_workers=2)
+        try:
+            executor.submit("slow", handler, "slow", 0)
+            assert slow_started.wait(2)
+            for count in range(5):
+                if count:
+                    executor.submit("slow", handler, "slow", count)
+                executor.submit("fast", handler, "fast", count)
+
+            server_utils.wait_until_or(lambda: len(calls["fast"]) == 5, 2)
+            assert calls["fast"] == list(range(5))
+            assert calls["slow"] == []
+            assert executor.metrics()["slow"].depth == 4
+
+            slow_ready.set()
+            server_utils.wait_until_or(lambda: len(calls["slow"]) == 5, 2)
+        finally:
+            executor.shutdown()
+
+        assert calls["slow"] == list(range(5))
+        metrics = executor.metrics()
+        assert metrics["slow"].done == 5
+        assert metrics["slow"].peak_depth == 4
+        assert metrics["slow"].run_max_sec > metrics["fast"].run_max_sec
+        assert metrics["fast"].depth == 0
+
 
 class TestOfflineStorage(BaseNetwork):
 
@@ -227,6 +859,30 @@ class TestNetwork(BaseNetwork):
             fast_send=fast_send
         )
 
+    @pytest.mark.parametrize(
+        "receive_size",
+        [16, 2048]
+    )
+    def test_zero_copy_receive(
+        self,
+        mock_network_server,
+        receive_size: int,
+    ):
+        try:
+            wappstoiot.config(
+                config_folder=self.temp,
+                receive_size=receive_size,
+                zero_copy_receive=True,
+            )
+            network = wappstoiot.createNetwork(mock_network_server.network_name)
+        finally:
+            wappstoiot.close()
+
+        mock_network_server.fail_check()
+
+        assert network.uuid == mock_network_server.network_uuid
+        assert len(mock_network_server.data_in) == 1
+
     @pytest.mark.parametrize(
         "fast_send",
         [True, False]
@@ -1826,3 +2482,1192 @@ class TestValue(BaseValue):
 
     # def test_replays_w_errors(self,):
     #     pass
+
+
+class TestAsyncIoTAPI(BaseConnection):
+
+    @pytest.fixture
+    def mock_async_server(self, mock_open_connection):
+        # NOTE: The 'mock_rw_socket' can not be used, since asyncio need real sockets.
+        network_uuid = uuid.uuid4()
+        device_uuid = uuid.uuid4()
+        self.generate_certificates(name="wappsto.com", network_uuid=network_uuid)
+
+        server = SimuServer(
+            network_uuid=network_uuid,
+            name="the_network"
+        )
+        server.add_object(
+            this_uuid=device_uuid,
+            this_type='device',
+            this_name="the_device",
+            parent_uuid=network_uuid
+        )
+        server.add_object(
+            this_uuid=uuid.uuid4(),
+            this_type='value',
+            this_name="the_value",
+            parent_uuid=device_uuid,
+            extra_info=server_utils.generate_value_extra_info(
+                value_template=wappstoiot.ValueTemplate.NUMBER,
+                permission=wappstoiot.PermissionType.READWRITE
+            )
+        )
+        server.get_async_streams(mock_open_connection)
+        return server
+
+    @pytest.mark.parametrize(
+        "fast_send",
+        [True, False]
+    )
+    def test_put_state_and_control(
+        self,
+        mock_async_server,
+        fast_send: bool,
+    ):
+        from wappstoiot.schema import base_schema as WSchema
+        from wappstoiot.service.async_iot_api import AsyncIoTAPI
+
+        value_obj = mock_async_server.get_obj(name="the_value")
+        state_uuid = uuid.uuid4()
+        received = []
+
+        async def run():
+            api = AsyncIoTAPI(
+                ca=self.temp / "ca.crt",
+                crt=self.temp / "client.crt",
+                key=self.temp / "client.key",
+                fast_send=fast_send,
+                timeout=3,
+            )
+            control_received = asyncio.Event()
+
+            async def on_control(data, method):
+                received.append((data, method))
+                control_received.set()
+
+            async with api:
+                api.subscribe_event(state_uuid, on_control)
+                value = await api.get_value(value_obj.uuid)
+                created = await api.post_state(
+                    value_uuid=value_obj.uuid,
+                    data=WSchema.State(
+                        data="NA",
+                        type=WSchema.StateType.CONTROL,
+                        meta=WSchema.StateMeta(id=state_uuid),
+                    ),
+                )
+                updated = await api.put_state(
+                    uuid=state_uuid,
+                    data=WSchema.State(
+                        data="42",
+                        timestamp=datetime.datetime.utcnow(),
+                    ),
+                )
+                bulk = await api.put_bulk_state(
+                    uuid=state_uuid,
+                    data=[
+                        WSchema.LogValue(data=str(x), timestamp=datetime.datetime.utcnow())
+                        for x in range(3)
+                    ],
+                )
+                mock_async_server.send_control(
+                    obj_uuid=state_uuid,
+                    data=7,
+                    timestamp=datetime.datetime.utcnow(),
+                )
+                await asyncio.wait_for(control_received.wait(), timeout=1)
+            return value, created, updated, bulk
+
+        value, created, updated, bulk = asyncio.run(run())
+
+        mock_async_server.fail_check()
+
+        assert value.meta.id == value_obj.uuid
+        assert created is True
+        assert updated is True
+        assert bulk is True
+        assert mock_async_server.objects[state_uuid].extra_info['data'] == '7'
+        assert len(received) == 1
+        assert received[0][0].data == '7'
+        server_utils.fast_send_check(
+            pkg_list=mock_async_server.data_in[1:-1],
+            fast_send=fast_send
+        )
+
+    def test_timeout_forgets_handlers(self):
+        from wappstoiot.schema import base_schema as WSchema
+        from wappstoiot.service.async_iot_api import AsyncIoTAPI
+
+        self.generate_certificates(name="wappsto.com", network_uuid=uuid.uuid4())
+        state_uuid = uuid.uuid4()
+
+        async def run():
+            api = AsyncIoTAPI(
+                ca=self.temp / "ca.crt",
+                crt=self.temp / "client.crt",
+                key=self.temp / "client.key",
+                fast_send=False,
+                timeout=0.1,
+            )
+
+            async def never_replied(data):
+                pass
+
+            api._send_logic = never_replied
+            updated = await api.put_state(
+                uuid=state_uuid,
+                data=WSchema.State(data="42", timestamp=datetime.datetime.utcnow()),
+            )
+            bulk = await api.put_bulk_state(
+                uuid=state_uuid,
+                data=[
+                    WSchema.LogValue(data=str(x), timestamp=datetime.datetime.utcnow())
+                    for x in range(3)
+                ],
+            )
+            return api, updated, bulk
+
+        api, updated, bulk = asyncio.run(run())
+
+        assert updated is False
+        assert bulk is False
+        assert api.jsonrpc._id_cb == {}
+        assert api.jsonrpc._id_error_cb == {}
+        assert api.jsonrpc._id_method == {}
+
+
+class TestLoopbackConnection(BaseConnection):
+
+    @pytest.fixture
+    def mock_loopback_server(self):
+        network_uuid = uuid.uuid4()
+        device_uuid = uuid.uuid4()
+
+        server = SimuServer(
+            network_uuid=network_uuid,
+            name="the_network"
+        )
+        server.add_object(
+            this_uuid=device_uuid,
+            this_type='device',
+            this_name="the_device",
+            parent_uuid=network_uuid
+        )
+        server.add_object(
+            this_uuid=uuid.uuid4(),
+            this_type='value',
+            this_name="the_value",
+            parent_uuid=device_uuid,
+            extra_info=server_utils.generate_value_extra_info(
+                value_template=wappstoiot.ValueTemplate.NUMBER,
+                permission=wappstoiot.PermissionType.READWRITE
+            )
+        )
+        return server
+
+    @pytest.mark.parametrize(
+        "latency_sec",
+        [0, 0.01]
+    )
+    def test_report_and_control(
+        self,
+        mock_loopback_server,
+        latency_sec: float,
+    ):
+        import time
+        from wappstoiot.service.iot_api import IoTAPI
+
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+        the_control_value = None
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(latency_sec=latency_sec),
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+
+            @value.onControl
+            def control_test(obj, value):
+                nonlocal the_control_value
+                the_control_value = value
+
+            start = time.perf_counter()
+            value.report(5)
+            report_sec = time.perf_counter() - start
+
+            state = server_utils.get_state_obj(
+                server=mock_loopback_server,
+                value_uuid=value_obj.uuid,
+                state_type="Control"
+            )
+            mock_loopback_server.send_control(
+                obj_uuid=state.uuid,
+                data=7,
+                timestamp=datetime.datetime.utcnow()
+            )
+            server_utils.wait_until_or(lambda: the_control_value is not None, 1)
+        finally:
+            network.close()
+            api.close()
+
+        mock_loopback_server.fail_check()
+
+        report_state = server_utils.get_state_obj(
+            server=mock_loopback_server,
+            value_uuid=value_obj.uuid,
+            state_type="Report"
+        )
+        assert float(report_state.extra_info['data']) == 5
+        assert the_control_value == 7
+        assert report_sec >= 2 * latency_sec
+
+    @pytest.mark.parametrize(
+        "value_template,report_data",
+        [
+            (wappstoiot.ValueTemplate.NUMBER, 12.5),
+            (wappstoiot.ValueTemplate.STRING, 'Escaped "quote" \\ ÆØÅ 温度 ✓'),
+            (wappstoiot.ValueTemplate.BLOB, "aGVsbG8gd29ybGQ=\n"),
+            (wappstoiot.ValueTemplate.XML, '<a b="c">\t&amp;</a>'),
+        ]
+    )
+    def test_state_request_fast_path(
+        self,
+        mock_loopback_server,
+        mocker,
+        value_template: wappstoiot.ValueTemplate,
+        report_data,
+    ):
+        import slxjsonrpc
+        from slxjsonrpc.schema.jsonrpc import RpcVersion
+        from wappstoiot.schema.iot_schema import JsonData
+        from wappstoiot.schema.iot_schema import WappstoMethod
+        from wappstoiot.service.iot_api import IoTAPI
+        from wappstoiot.utils import codec
+
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(),
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=f"the_{value_template.name.lower()}",
+                permission=wappstoiot.PermissionType.READ,
+                value_template=value_template
+            )
+            create_state_request = mocker.spy(api, "_create_state_request")
+            value.report(report_data)
+        finally:
+            network.close()
+            api.close()
+
+        mock_loopback_server.fail_check()
+
+        assert create_state_request.call_count == 1
+        url, data = create_state_request.call_args.args[:2]
+        rpc_data, payload, _ = create_state_request.spy_return
+        validated = slxjsonrpc.RpcRequest(
+            jsonrpc=RpcVersion.v2_0,
+            method=WappstoMethod.PUT,
+            id=rpc_data.id,
+            params=api._json_data(data=data, url=url, method=WappstoMethod.PUT),
+        )
+        decoded = slxjsonrpc.RpcRequest.model_validate(codec.loads(payload))
+
+        assert data.data == str(report_data)
+        assert isinstance(decoded.params, JsonData)
+        assert decoded.id == rpc_data.id
+        assert decoded.params.url == url
+        assert decoded.params.data.data == data.data
+        assert codec.dumps_model(decoded) == codec.dumps_model(validated) == payload
+        assert codec.dumps_model(rpc_data) == payload
+        assert payload.encode('utf-8') in mock_loopback_server.data_in
+
+    def test_report_round_trip(
+        self,
+        mock_loopback_server,
+    ):
+        import statistics
+        import time
+        from wappstoiot.service.iot_api import IoTAPI
+
+        report_count = 20
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(),
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        report_times = []
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+
+            for x in range(1, report_count + 1):
+                start = time.perf_counter()
+                value.report(x)
+                report_times.append(time.perf_counter() - start)
+        finally:
+            network.close()
+            api.close()
+
+        mock_loopback_server.fail_check()
+
+        report_state = server_utils.get_state_obj(
+            server=mock_loopback_server,
+            value_uuid=value_obj.uuid,
+            state_type="Report"
+        )
+        assert float(report_state.extra_info['data']) == report_count
+        # NOTE: Each reply's validation schema was build again, which took ~100ms.
+        assert statistics.median(report_times) < 0.005
+        assert max(report_times) < 0.05
+
+    @pytest.mark.parametrize(
+        "coalesce,expected",
+        [
+            ("all", list(range(10))),
+            ("latest", [0, 9]),
+            ("debounce", [9]),
+        ]
+    )
+    def test_control_coalesce(
+        self,
+        mock_loopback_server,
+        coalesce: str,
+        expected: List[int],
+    ):
+        from wappstoiot.service.iot_api import IoTAPI
+
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+        control_values: List[float] = []
+        handler_busy = threading.Event()
+        handler_ready = threading.Event()
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(),
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+
+            def control_test(obj, value):
+                handler_busy.set()
+                handler_ready.wait(5)
+                control_values.append(value)
+
+            value.onControl(control_test, coalesce=coalesce, debounce_ms=200)
+
+            state = server_utils.get_state_obj(
+                server=mock_loopback_server,
+                value_uuid=value_obj.uuid,
+                state_type="Control"
+            )
+            for data in range(10):
+                mock_loopback_server.send_control(
+                    obj_uuid=state.uuid,
+                    data=data,
+                    timestamp=datetime.datetime.utcnow()
+                )
+                if data == 0 and coalesce != "debounce":
+                    assert handler_busy.wait(1)
+            server_utils.wait_until_or(
+                lambda: sum(x.dropped for x in api.workers.metrics().values()) >= 10 - len(expected),
+                1
+            )
+            handler_ready.set()
+            server_utils.wait_until_or(lambda: len(control_values) >= len(expected), 2)
+        finally:
+            network.close()
+            api.close()
+
+        mock_loopback_server.fail_check()
+
+        assert control_values == expected
+
+    def test_trusted_state_construction(
+        self,
+        mock_loopback_server,
+    ):
+        from wappstoiot.service.iot_api import IoTAPI
+        from wappstoiot.schema import base_schema as WSchema
+
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(),
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+            value.report(5)
+
+            assert value.report_state.data == "5"
+            assert isinstance(value.report_state.meta, WSchema.StateMeta)
+            assert value.report_state.timestamp is not None
+
+            state = server_utils.get_state_obj(
+                server=mock_loopback_server,
+                value_uuid=value_obj.uuid,
+                state_type="Control"
+            )
+            mock_loopback_server.send_control(
+                obj_uuid=state.uuid,
+                data=7,
+                timestamp=datetime.datetime.utcnow()
+            )
+            server_utils.wait_until_or(lambda: value.control_state.data == "7", 2)
+
+            assert value.control_state.data == "7"
+            # NOTE: The meta were turned into a dict, by the update before.
+            assert isinstance(value.control_state.meta, WSchema.StateMeta)
+            assert value.control_state.timestamp.tzinfo is None
+
+            value.control(3)
+
+            assert value.control_state.data == "3"
+        finally:
+            network.close()
+            api.close()
+
+        mock_loopback_server.fail_check()
+
+    def test_unsubscribed_dropped(
+        self,
+        mock_loopback_server,
+    ):
+        from wappstoiot.service.iot_api import IoTAPI
+
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+        control_values: List[Any] = []
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(),
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+            value.onControl(lambda obj, data: control_values.append(data))
+
+            # NOTE: Not a valid state, but nobody subscribe to it, so it is not validated.
+            mock_loopback_server.send_data(
+                data={"not": "a state"},
+                pkg_method="PUT",
+                pkg_id="unsubscribed",
+                pkg_url=f"/state/{uuid.uuid4()}",
+            )
+            state = server_utils.get_state_obj(
+                server=mock_loopback_server,
+                value_uuid=value_obj.uuid,
+                state_type="Control"
+            )
+            mock_loopback_server.send_control(
+                obj_uuid=state.uuid,
+                data=7,
+                timestamp=datetime.datetime.utcnow()
+            )
+            server_utils.wait_until_or(lambda: control_values, 1)
+
+            replies = {
+                reply['id']: reply
+                for data in mock_loopback_server.data_in
+                for reply in json.loads(data)
+                if isinstance(data, bytes) and data.startswith(b'[')
+            }
+        finally:
+            network.close()
+            api.close()
+
+        assert replies["unsubscribed"]['result'] == {'success': True}
+        assert control_values == [7]
+
+    def test_report_async_window(
+        self,
+        mock_loopback_server,
+    ):
+        import time
+        from wappstoiot.service.iot_api import IoTAPI
+
+        latency_sec = 0.05
+        report_count = 8
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(latency_sec=latency_sec),
+            max_in_flight=4,
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+
+            start = time.perf_counter()
+            for x in range(1, report_count + 1):
+                value.report(x)
+            sync_sec = time.perf_counter() - start
+
+            start = time.perf_counter()
+            futures = [value.report_async(x) for x in range(report_count + 1, 2 * report_count + 1)]
+            results = [future.result(timeout=3) for future in futures]
+            report_sec = time.perf_counter() - start
+        finally:
+            network.close()
+            api.close()
+
+        mock_loopback_server.fail_check()
+
+        report_state = server_utils.get_state_obj(
+            server=mock_loopback_server,
+            value_uuid=value_obj.uuid,
+            state_type="Report"
+        )
+        assert results == [True] * report_count
+        assert float(report_state.extra_info['data']) == 2 * report_count
+        # NOTE: One round trip each, would take 2 * latency per report.
+        assert report_sec < report_count * 2 * latency_sec * 0.75
+        # NOTE: The loopback latency is also slept by the sender, so 2x is the best it can do.
+        assert report_sec < sync_sec * 0.75
+        assert all(api.in_flight.acquire(blocking=False) for _ in range(4))
+
+    def test_report_async_window_full(
+        self,
+        mock_loopback_server,
+    ):
+        from wappstoiot.service.iot_api import IoTAPI
+
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(),
+            max_in_flight=2,
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+
+            # NOTE: Fill the in-flight window, so the report can not get in.
+            api.timeout = 0.1
+            assert all(api.in_flight.acquire(blocking=False) for _ in range(2))
+            future = value.report_async(1)
+            api.in_flight.release()
+            api.in_flight.release()
+        finally:
+            network.close()
+            api.close()
+
+        assert isinstance(future.exception(timeout=0), TimeoutError)
+
+    def test_bulk_profile_coalesce(
+        self,
+        mocker,
+        mock_loopback_server,
+    ):
+        from wappstoiot.service.iot_api import IoTAPI
+
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+        the_control_value = None
+
+        loopback = mock_loopback_server.get_loopback()
+        link_ready = threading.Event()
+        link_ready.set()
+        loopback_send = loopback.send
+
+        def _slow_link(data):
+            link_ready.wait(5)
+            return loopback_send(data)
+
+        mocker.patch.object(loopback, "send", side_effect=_slow_link)
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=loopback,
+            transport_profile="bulk",
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+
+            @value.onControl
+            def control_test(obj, value):
+                nonlocal the_control_value
+                the_control_value = value
+
+            control_state = server_utils.get_state_obj(
+                server=mock_loopback_server,
+                value_uuid=value_obj.uuid,
+                state_type="Control"
+            )
+            sent_before = len(mock_loopback_server.data_in)
+
+            # NOTE: Hold the first report on the link, so the rest queue up behind it.
+            link_ready.clear()
+            futures = [value.report_async(1)]
+            server_utils.wait_until_or(lambda: api.send_queue.in_flight, 1)
+            futures += [value.report_async(2), value.report_async(3)]
+            mock_loopback_server.send_control(
+                obj_uuid=control_state.uuid,
+                data=7,
+                timestamp=datetime.datetime.utcnow()
+            )
+            server_utils.wait_until_or(lambda: len(api.send_queue) == 3, 1)
+            futures.append(value.report_async(4))
+            link_ready.set()
+
+            results = [future.result(timeout=3) for future in futures]
+            server_utils.wait_until_or(lambda: the_control_value is not None, 1)
+        finally:
+            network.close()
+            api.close()
+
+        mock_loopback_server.fail_check()
+
+        sent = [json.loads(data) for data in mock_loopback_server.data_in[sent_before:]]
+        assert api.send_queue.coalesce is True
+        assert results == [True] * 4
+        assert the_control_value == 7
+        assert [len(x) if isinstance(x, list) else "result" in x for x in sent] == [False, 2, True, False]
+
+    @pytest.mark.parametrize(
+        "report_batch_window_sec",
+        [None, 0.5]
+    )
+    def test_report_batching(
+        self,
+        mock_loopback_server,
+        report_batch_window_sec,
+    ):
+        from wappstoiot.service.iot_api import IoTAPI
+
+        report_count = 10
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=3,
+            connection=mock_loopback_server.get_loopback(),
+            report_batch_window_sec=report_batch_window_sec,
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+            mock_loopback_server.data_in.clear()
+
+            futures = [value.report_async(x) for x in range(1, report_count + 1)]
+            results = [future.result(timeout=3) for future in futures]
+        finally:
+            network.close()
+            api.close()
+
+        mock_loopback_server.fail_check()
+
+        report_state = server_utils.get_state_obj(
+            server=mock_loopback_server,
+            value_uuid=value_obj.uuid,
+            state_type="Report"
+        )
+        assert results == [True] * report_count
+        assert float(report_state.extra_info['data']) == report_count
+
+        send_count = len(mock_loopback_server.data_in)
+        if report_batch_window_sec is None:
+            assert send_count == report_count
+        else:
+            assert send_count == 1
+            assert len(json.loads(mock_loopback_server.data_in[0])) == report_count
+
+    def test_lost_replies_are_freed(
+        self,
+        mock_loopback_server,
+    ):
+        import time
+        from wappstoiot.service.iot_api import IoTAPI
+
+        report_count = 20
+        device_obj = mock_loopback_server.get_obj(name="the_device")
+        value_obj = mock_loopback_server.get_obj(name="the_value")
+
+        api = IoTAPI(
+            ca=None,
+            crt=None,
+            key=None,
+            fast_send=True,
+            timeout=1,
+            connection=mock_loopback_server.get_loopback(),
+            max_in_flight=report_count,
+        )
+        network = wappstoiot.Network(
+            name=mock_loopback_server.network_name,
+            connection=api,
+            network_uuid=mock_loopback_server.network_uuid,
+        )
+        try:
+            device = network.createDevice(name=device_obj.name)
+            value = device.createValue(
+                name=value_obj.name,
+                permission=wappstoiot.PermissionType.READWRITE,
+                value_template=wappstoiot.ValueTemplate.NUMBER
+            )
+            known_ids = set(api.jsonrpc._id_method)
+
+            # NOTE: The server stops replying.
+            api.connection.handler = lambda data: b''
+            thread_count = threading.active_count()
+
+            start = time.perf_counter()
+            futures = [value.report_async(x, force=True) for x in range(report_count)]
+            peak_thread_count = threading.active_count()
+            errors = [future.exception(timeout=3) for future in futures]
+            expire_sec = time.perf_counter() - start
+
+            pending_count = len(api.pending)
+            new_ids = (
+                set(api.jsonrpc._id_cb)
+                | set(api.jsonrpc._id_error_cb)
+                | set(api.jsonrpc._id_method)
+            ) - known_ids
+        finally:
+            network.close()
+            api.close()
+
+        assert all(isinstance(error, TimeoutError) for error in errors)
+        assert 1 <= expire_sec < 1.5
+        assert pending_count == 0
+        assert new_ids == set()
+        # NOTE: No thread is kept per request, waiting for its timeout.
+        assert peak_thread_count < thread_count + report_count // 2
+
+    @pytest.mark.parametrize(
+        "tree_sync",
+        [False, True]
+    )
+    def test_tree_sync(
+        self,
+        tree_sync: bool,
+    ):
+        from wappstoiot.service.iot_api import IoTAPI
+
+        device_count = 3
+        value_count = 2
+        server = SimuServer(
+            network_uuid=uuid.uuid4(),
+            name="the_network"
+        )
+
+        def build_tree(tree_sync: bool) -> Dict[str, Any]:
+            api = IoTAPI(
+                ca=None,
+                crt=None,
+                key=None,
+                fast_send=True,
+                timeout=3,
+                connection=server.get_loopback(),
+                tree_sync=tree_sync,
+            )
+            network = wappstoiot.Network(
+                name=server.network_name,
+                connection=api,
+                network_uuid=server.network_uuid,
+            )
+            uuids: Dict[str, Any] = {}
+            try:
+                for x in range(device_count):
+                    device = network.createDevice(name=f"device_{x}")
+                    uuids[device.name] = device.uuid
+                    for y in range(value_count):
+                        value = device.createValue(
+                            name=f"value_{x}_{y}",
+                            permission=wappstoiot.PermissionType.READWRITE,
+                            value_template=wappstoiot.ValueTemplate.NUMBER
+                        )
+                        uuids[value.name] = (value.uuid, dict(value.children_name_mapping))
+            finally:
+                network.close()
+                api.close()
+            return uuids
+
+        first_uuids = build_tree(tree_sync=False)
+        server.data_in.clear()
+
+        second_uuids = build_tree(tree_sync=tree_sync)
+
+        server.fail_check()
+
+        get_count = sum(
+            1 for data in server.data_in
+            if json.loads(data).get('method') == 'GET'
+        )
+
+        assert second_uuids == first_uuids
+        if tree_sync:
+            assert get_count == 1
+        else:
+            # NOTE: The network, 2 per device & 4 per value.
+            assert get_count == 1 + 2 * device_count + 4 * device_count * value_count
+
+    @pytest.mark.parametrize(
+        "description",
+        [None, "Changed"]
+    )
+    def test_diff_only_update(
+        self,
+        description: Optional[str],
+    ):
+        from wappstoiot.service.iot_api import IoTAPI
+
+        server = SimuServer(
+            network_uuid=uuid.uuid4(),
+            name="the_network"
+        )
+
+        def build_tree(description: Optional[str]) -> None:
+            api = IoTAPI(
+                ca=None,
+                crt=None,
+                key=None,
+                fast_send=True,
+                timeout=3,
+                connection=server.get_loopback(),
+            )
+            network = wappstoiot.Network(
+                name=server.network_name,
+                connection=api,
+                network_uuid=server.network_uuid,
+            )
+            try:
+                device = network.createDevice(name="the_device", description=description)
+                for value_template in [wappstoiot.ValueTemplate.NUMBER, wappstoiot.ValueTemplate.STRING]:
+                    device.createValue(
+                        name=f"value_{value_template.name}",
+                        permission=wappstoiot.PermissionType.READWRITE,
+                        value_template=value_template
+                    )
+            finally:
+                network.close()
+                api.close()
+
+        build_tree(description=None)
+        server.data_in.clear()
+
+        build_tree(description=description)
+
+        server.fail_check()
+
+        updates = [
+            json.loads(data)['params'] for data in server.data_in
+            if json.loads(data).get('method') != 'GET'
+        ]
+
+        if description is None:
+            assert updates == []
+        else:
+            assert len(updates) == 1
+            assert updates[0]['url'].startswith("/device/")
+            assert set(updates[0]['data'].keys()) == {'description', 'meta'}
+            assert server.get_obj(name="the_device").extra_info['description'] == description
+
+    def test_diff_ignores_server_defaults(self):
+        from wappstoiot.schema import base_schema as WSchema
+        from wappstoiot.service.iot_api import IoTAPI
+        from wappstoiot.utils.model_diff import changed_fields
+
+        local = WSchema.NumberValue(
+            name="the_value",
+            permission=WSchema.PermissionType.READWRITE,
+            number=WSchema.Number(min=-128, max=128, step=0.1),
+        )
+        remote = local.model_copy(update={
+            "number": WSchema.Number(min=-128, max=128, step=0.1, unit="", si_conversion=""),
+        })
+
+        assert changed_fields(local=local, remote=remote) == {}
+        assert changed_fields(
+            local=local.model_copy(update={"number": WSchema.Number(min=-128, max=128, step=1)}),
+            remote=remote,
+        ).keys() == {"number"}
+
+        server = SimuServer(
+            network_uuid=uuid.uuid4(),
+            name="the_network"
+        )
+
+        def build_tree() -> None:
+            api = IoTAPI(
+                ca=None,
+                crt=None,
+                key=None,
+                fast_send=True,
+                timeout=3,
+                connection=server.get_loopback(),
+            )
+            network = wappstoiot.Network(
+                name=server.network_name,
+                connection=api,
+                network_uuid=server.network_uuid,
+            )
+            try:
+                device = network.createDevice(name="the_device")
+                device.createValue(
+                    name="the_value",
+                    permission=wappstoiot.PermissionType.READWRITE,
+                    value_template=wappstoiot.ValueTemplate.NUMBER
+                )
+            finally:
+                network.close()
+                api.close()
+
+        build_tree()
+        # NOTE: The server fill in the nested fields, that was not send.
+        server.get_obj(name="the_value").extra_info['number'].update(
+            unit="",
+            si_conversion="",
+            ordered_mapping=False,
+        )
+        server.data_in.clear()
+
+        build_tree()
+
+        server.fail_check()
+
+        updates = [
+            json.loads(data)['params'] for data in server.data_in
+            if json.loads(data).get('method') != 'GET'
+        ]
+        assert updates == []
+
+    def test_snapshot_boot(self, tmp_path):
+        from wappstoiot.schema import base_schema as WSchema
+        from wappstoiot.service.iot_api import IoTAPI
+
+        device_count = 3
+        value_count = 2
+        snapshot_path = tmp_path / "network_snapshot.json"
+        server = SimuServer(
+            network_uuid=uuid.uuid4(),
+            name="the_network"
+        )
+
+        def build_tree(latency_sec: float, check: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+            api = IoTAPI(
+                ca=None,
+                crt=None,
+                key=None,
+                fast_send=True,
+                timeout=3,
+                connection=server.get_loopback(latency_sec=latency_sec),
+                snapshot_path=snapshot_path,
+            )
+            network = wappstoiot.Network(
+                name=server.network_name,
+                connection=api,
+                network_uuid=server.network_uuid,
+            )
+            uuids: Dict[str, Any] = {}
+            try:
+                for x in range(device_count):
+                    device = network.createDevice(name=f"device_{x}")
+                    uuids[device.name] = device.uuid
+                    for y in range(value_count):
+                        value = device.createValue(
+                            name=f"value_{x}_{y}",
+                            permission=wappstoiot.PermissionType.READWRITE,
+                            value_template=wappstoiot.ValueTemplate.NUMBER
+                        )
+                        uuids[value.name] = (value.uuid, dict(value.children_name_mapping))
+                if check is not None:
+                    check(api, value)
+            finally:
+                network.close()
+                api.close()
+            return uuids
+
+        first_uuids = build_tree(latency_sec=0)
+        assert snapshot_path.exists()
+
+        # NOTE: Changed on the server, while the gateway was off.
+        last_value = f"value_{device_count - 1}_{value_count - 1}"
+        control_uuid = first_uuids[last_value][1][WSchema.StateType.CONTROL]
+        server.objects[control_uuid].extra_info['data'] = "42"
+        server.data_in.clear()
+
+        blocking_data: List[bytes] = []
+        control_data: List[Any] = []
+
+        def check(api: IoTAPI, value: wappstoiot.Value) -> None:
+            blocking_data.extend(server.data_in)
+            value.onControl(lambda obj, data: control_data.append(data))
+            api.tree_validator.join(timeout=5)
+            server_utils.wait_until_or(lambda: control_data, 1)
+
+        second_uuids = build_tree(latency_sec=0.5, check=check)
+
+        server.fail_check()
+
+        assert second_uuids == first_uuids
+        # NOTE: The network was ready, before the server was asked.
+        assert blocking_data == []
+        assert [
+            json.loads(data)['params']['url'] for data in server.data_in
+        ] == [f"/network/{server.network_uuid}?expand=3"]
+        assert control_data == [42]
+
+    def test_snapshot_save_synced(self, mocker, tmp_path):
+        import os
+        from wappstoiot.schema import base_schema as WSchema
+        from wappstoiot.service.snapshot import ModelSnapshot
+
+        network_uuid = uuid.uuid4()
+        snapshot = ModelSnapshot(path=tmp_path / "network_snapshot.json")
+        calls: List[str] = []
+        mocker.patch("os.fsync", side_effect=lambda fd: calls.append("fsync"))
+        replace = os.replace
+        mocker.patch("os.replace", side_effect=lambda *args: calls.append("replace") or replace(*args))
+
+        snapshot.save(WSchema.Network(name="the_network ÆØÅ", meta=WSchema.NetworkMeta(id=network_uuid)))
+
+        # NOTE: The data is on the disk before the rename, & the rename after.
+        assert calls[:2] == ["fsync", "replace"]
+        assert calls[2:] == (["fsync"] if hasattr(os, 'O_DIRECTORY') else [])
+        assert snapshot.load(network_uuid).name == "the_network ÆØÅ"
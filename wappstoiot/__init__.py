@@ -7,7 +7,7 @@
 
 import __main__
 import atexit
-import json
+import importlib
 import logging
 import threading
 import time
@@ -17,40 +17,77 @@ from pathlib import Path
 from enum import Enum
 
 
-from typing import Any, Dict, Optional, Union, Callable, cast
-
-
-from .modules.network import Network
-# from .modules.network import ConnectionStatus
-# from .modules.network import ConnectionTypes
-# from .modules.network import NetworkChangeType  # NOt needed anymore.
-# from .modules.network import NetworkRequestType  # NOt needed anymore.
-# from .modules.network import ServiceStatus
-# from .modules.network import StatusID
-
-from .modules.device import Device
-from .service.template import ServiceClass
-from .service.iot_api import IoTAPI
-
-from .modules.value import Value
-# from .modules.value import Delta  # Note: Not ready yet!
-# from .modules.value import Period  # Note: Not ready yet!
-from .modules.template import ValueTemplate
-
-from .schema.base_schema import LogValue
-from .schema.base_schema import PermissionType
-
-from .service import template as service
+from typing import Any, Dict, Optional, Tuple, Union, Callable, cast
 
+# NOTE: Only the light modules (No pydantic, slxjsonrpc or ssl) are imported
+#       here. The rest are imported on first use. (See: `__getattr__`)
 from .connections import protocol as connection
+from .connections.profiles import TransportProfile
+from .connections.profiles import TransportProfiles
+from .connections.send_queue import QueuePolicy
+from .connections.send_queue import SendQueue
+from .connections.send_queue import SendQueueMetrics
 
 from .utils.offline_storage import OfflineStorage
-from .utils.certificateread import certificate_info_extraction
 from .utils.offline_storage import OfflineStorageFiles
 
 from .utils import observer
 from .utils import name_check
 
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .modules.network import Network
+    from .modules.device import Device
+    from .modules.value import Value
+    from .modules.template import ValueTemplate
+    # from .modules.value import Delta  # Note: Not ready yet!
+    # from .modules.value import Period  # Note: Not ready yet!
+    from .schema.base_schema import LogValue
+    from .schema.base_schema import PermissionType
+    from .service import template as service
+    from .service.template import ServiceClass
+    from .service.ordered_executor import CoalescePolicy
+    from .service.ordered_executor import ExecutorQueueMetrics
+    from .utils.certificateread import CertificateBundle
+
+
+# NOTE: The name, & the module & attribute it is imported from on first use.
+#       (A module itself, if the attribute is None.)
+_lazy_imports: Dict[str, Tuple[str, Optional[str]]] = {
+    'Network': ('.modules.network', 'Network'),
+    'Device': ('.modules.device', 'Device'),
+    'Value': ('.modules.value', 'Value'),
+    'ValueTemplate': ('.modules.template', 'ValueTemplate'),
+    'LogValue': ('.schema.base_schema', 'LogValue'),
+    'PermissionType': ('.schema.base_schema', 'PermissionType'),
+    'service': ('.service', None),
+    'ServiceClass': ('.service.template', 'ServiceClass'),
+    'IoTAPI': ('.service.iot_api', 'IoTAPI'),
+    'CoalescePolicy': ('.service.ordered_executor', 'CoalescePolicy'),
+    'ExecutorQueueMetrics': ('.service.ordered_executor', 'ExecutorQueueMetrics'),
+    'certificate_info_extraction': ('.utils.certificateread', 'certificate_info_extraction'),
+    'CertificateBundle': ('.utils.certificateread', 'CertificateBundle'),
+    'codec': ('.utils.codec', None),
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import the name on first use (PEP 562)."""
+    target = _lazy_imports.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr_name = target
+    module = importlib.import_module(module_name, __name__)
+    value = module if attr_name is None else getattr(module, attr_name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> Any:
+    """List the lazy imported names too."""
+    return sorted(set(globals()) | set(_lazy_imports))
+
+
 # #############################################################################
 #                             __init__ Setup Stuff
 # #############################################################################
@@ -69,6 +106,10 @@ __all__ = [
     'disconnect',
     'close',
     'OfflineStorage',
+    'CoalescePolicy',
+    'QueuePolicy',
+    'TransportProfile',
+    'TransportProfiles',
     'service',
     'connection',
     'ValueTemplate',
@@ -90,8 +131,8 @@ __log.addHandler(logging.NullHandler())
 
 
 def onStatusChange(
-    StatusID: Union[service.StatusID, connection.StatusID],
-    callback: Callable[[Union[service.StatusID, connection.StatusID], Any], None]
+    StatusID: Union["service.StatusID", connection.StatusID],
+    callback: Callable[[Union["service.StatusID", connection.StatusID], Any], None]
 ) -> None:
     """
     Configure an action when the Status have changed.
@@ -107,12 +148,12 @@ def onStatusChange(
 # #############################################################################
 
 __config_folder: Path
-__the_connection: Optional[ServiceClass] = None
+__the_connection: Optional["ServiceClass"] = None
 __connection_closed: bool = False
 __ping_pong_thread_killed = threading.Event()
 __offline_storage: Union[OfflineStorage, bool] = False
 __offline_storage_thread_killed = threading.Event()
-__network: Optional[Network] = None
+__network: Optional["Network"] = None
 
 
 class ConnectionTypes(str, Enum):
@@ -137,6 +178,18 @@ def config(
     # none_blocking=True,  # Whether the post should wait for reply or not.
     rpc_timeout_sec: int = 3,
     max_reconnect_retry_count: Optional[int] = None,
+    receive_size: Optional[int] = None,
+    zero_copy_receive: bool = False,
+    send_queue_size: int = 1000,
+    send_queue_policy: QueuePolicy = QueuePolicy.BLOCK,
+    coalesce_send: Optional[bool] = None,
+    transport_profile: Union[TransportProfiles, TransportProfile, str] = TransportProfiles.DEFAULT,
+    max_in_flight: int = 16,
+    report_batch_window_sec: Optional[float] = None,
+    report_batch_size: int = 100,
+    tree_sync: bool = False,
+    snapshot: bool = False,
+    worker_count: int = 2,
 ) -> None:
     """
     Configure the WappstoIoT settings.
@@ -154,6 +207,27 @@ def config(
         offline_storage: If it should store value that failed in been sent.
         rpc_timeout_sec: The timeout for a sent RPC package.
         max_reconnect_retry_count: How many times it should try reconnect before throw an exception.
+        receive_size: The max amount of bytes read from the socket at the time.
+            (Default from the transport_profile.)
+        zero_copy_receive: If it should receive straight into a reusable buffer, instead of a new bytes object.
+        send_queue_size: The max amount of messages waiting to be send.
+        send_queue_policy: What to do with new messages, when the send queue is full.
+            'block' the caller, 'drop_oldest' message, or 'spill' it to the offline storage.
+        coalesce_send: If adjacent requests in the send queue, should be send as one JSON-RPC batch.
+            The replies to the server are always send on their own. (Default from the transport_profile.)
+        transport_profile: The socket tuning to use. 'low_latency' for control round trips,
+            'bulk' for large uploads, like historical back-fill, or a custom TransportProfile.
+        max_in_flight: How many async reports (`Value.report_async`) that can wait for a reply at the same time.
+        report_batch_window_sec: If set, the reports from all values within the window,
+            are send as one JSON-RPC batch. (Default: off)
+            As `report` waits for the reply, it is for `report_async`, or reports from many threads.
+        report_batch_size: The max amount of reports in one batch.
+        tree_sync: If the whole network tree should be fetched in one request at startup,
+            instead of a request for each device, value & state.
+        snapshot: If the network tree should be saved in the config_folder, so the next
+            start do not wait for the server. The tree is checked against the server in the background.
+        worker_count: How many threads that run the callbacks, like `onControl`.
+            The callbacks for the same object are always run in order.
     """
     global __config_folder
     global __connection_closed
@@ -178,6 +252,18 @@ def config(
             fast_send=fast_send,
             rpc_timeout=rpc_timeout_sec,
             max_reconnect_retry_count=max_reconnect_retry_count,
+            receive_size=receive_size,
+            zero_copy_receive=zero_copy_receive,
+            send_queue_size=send_queue_size,
+            send_queue_policy=send_queue_policy,
+            coalesce_send=coalesce_send,
+            transport_profile=transport_profile,
+            max_in_flight=max_in_flight,
+            report_batch_window_sec=report_batch_window_sec,
+            report_batch_size=report_batch_size,
+            tree_sync=tree_sync,
+            snapshot=snapshot,
+            worker_count=worker_count,
         )
 
     # elif connection == ConnectionTypes.RESTAPI:
@@ -192,17 +278,43 @@ def _setup_IoTAPI(
     fast_send: bool,
     configs: None = None,
     max_reconnect_retry_count: Optional[int] = None,
+    receive_size: Optional[int] = None,
+    zero_copy_receive: bool = False,
+    send_queue_size: int = 1000,
+    send_queue_policy: QueuePolicy = QueuePolicy.BLOCK,
+    coalesce_send: Optional[bool] = None,
+    transport_profile: Union[TransportProfiles, TransportProfile, str] = TransportProfiles.DEFAULT,
+    max_in_flight: int = 16,
+    report_batch_window_sec: Optional[float] = None,
+    report_batch_size: int = 100,
+    tree_sync: bool = False,
+    snapshot: bool = False,
+    worker_count: int = 2,
 ) -> None:
     # TODO: Setup the Connection.
+    from .service.iot_api import IoTAPI
+
     global __the_connection
-    kwargs = _certificate_check(__config_folder)
+    certificate = _certificate_check(__config_folder)
     __the_connection = IoTAPI(
-        ca=kwargs['ca'],
-        crt=kwargs['crt'],
-        key=kwargs['key'],
+        ca=certificate.ca,
+        crt=certificate.crt,
+        key=certificate.key,
         fast_send=fast_send,
         timeout=rpc_timeout,
         max_reconnect_retry_count=max_reconnect_retry_count,
+        receive_size=receive_size,
+        zero_copy_receive=zero_copy_receive,
+        send_queue_size=send_queue_size,
+        send_queue_policy=send_queue_policy,
+        coalesce_send=coalesce_send,
+        transport_profile=transport_profile,
+        max_in_flight=max_in_flight,
+        report_batch_window_sec=report_batch_window_sec,
+        report_batch_size=report_batch_size,
+        tree_sync=tree_sync,
+        snapshot_path=__config_folder / "network_snapshot.json" if snapshot else None,
+        worker_count=worker_count,
     )
 
 
@@ -220,20 +332,22 @@ def _setup_IoTAPI(
 #     __the_connection = RestAPI(**kwargs, url=configs.end_point)
 
 
-def _certificate_check(path: Path) -> Dict[str, Path]:
-    """Check if the right certificates are at the given path."""
-    certi_path = {
-        "ca": "ca.crt",
-        "crt": "client.crt",
-        "key": "client.key",
-    }
-    r_paths: Dict[str, Path] = {}
-    for k, f in certi_path.items():
-        r_paths[k] = path / f
-        if not r_paths[k].exists():
-            raise FileNotFoundError(f"'{f}' was not found in at: {path}")
+def _certificate_check(path: Path) -> "CertificateBundle":
+    """
+    Return the certificates at the given path.
+
+    They are only parsed again, if the files have changed.
+
+    Raises:
+        FileNotFoundError: If one of the certificates was not found.
+    """
+    from .utils.certificateread import CertificateBundle
 
-    return r_paths
+    return CertificateBundle.load(
+        ca=path / "ca.crt",
+        crt=path / "client.crt",
+        key=path / "client.key",
+    )
 
 
 def _setup_ping_pong(period_s: Optional[int] = None) -> None:
@@ -269,6 +383,9 @@ def _setup_ping_pong(period_s: Optional[int] = None) -> None:
 def _setup_offline_storage(
     offlineStorage: Union[OfflineStorage, bool],
 ) -> None:
+    from .service.template import StatusID
+    from .utils import codec
+
     global __the_connection
     global __offline_storage_thread_killed
     global __offline_storage
@@ -284,8 +401,8 @@ def _setup_offline_storage(
     #     __offline_storage: OfflineStorage = offlineStorage
 
     observer.subscribe(
-        service.StatusID.SENDERROR,
-        lambda _, data: __offline_storage.save(data.model_dump_json(exclude_none=True)) if data else None
+        StatusID.SENDERROR,
+        lambda _, data: __offline_storage.save(codec.dumps_model(data)) if data else None
     )
 
     def _resend_logic(status: str, status_data: Any) -> None:
@@ -299,14 +416,13 @@ def _setup_offline_storage(
                 if not data:
                     return
 
-                s_data = [json.loads(d) for d in data]
+                # NOTE: The data is already JSON, so it is joined without a parse & dump.
+                s_data = codec.join(data)
                 __log.debug(f"Sending Data: {s_data}")
                 if __the_connection is None:
                     return
                 try:
-                    __the_connection._resend_data(
-                        json.dumps(s_data)
-                    )
+                    __the_connection._resend_data(s_data)
                 except Exception:
                     __log.exception('Error in sending Offline Data.')
 
@@ -339,6 +455,37 @@ def offline_storage_size() -> Optional[int]:
     return __offline_storage.storage_size()
 
 
+def send_queue_metrics() -> Optional[SendQueueMetrics]:
+    """
+    Return the metrics of the send queue.
+
+    Returns:
+        SendQueueMetrics: The queue depth, & how long the messages waited.
+        None: If there are no connection.
+    """
+    send_queue = getattr(__the_connection, 'send_queue', None)
+    if not isinstance(send_queue, SendQueue):
+        return None
+
+    return send_queue.metrics()
+
+
+def callback_metrics() -> Optional[Dict[Optional[uuid.UUID], "ExecutorQueueMetrics"]]:
+    """
+    Return the metrics of the callback queue for each object.
+
+    Returns:
+        Dict: The queue depth, & how long the callbacks waited & ran, by the object UUID.
+            (None, for the requests to unknown objects.)
+        None: If there are no connection.
+    """
+    workers = getattr(__the_connection, 'workers', None)
+    if workers is None:
+        return None
+
+    return cast(Dict[Optional[uuid.UUID], "ExecutorQueueMetrics"], workers.metrics())
+
+
 def wait_for_offline_storage(
     timeout: Optional[int] = None,
     max_retry: int = 3,
@@ -372,13 +519,15 @@ def wait_for_offline_storage(
 def createNetwork(
     name: str,
     description: str = "",
-) -> Network:
+) -> "Network":
     """
     Create a new Wappsto Network.
 
     A Wappsto Network is references to the main grouping, of which multiple
     device are connected.
     """
+    from .modules.network import Network
+
     global __config_folder
     global __the_connection
     global __network
@@ -397,14 +546,13 @@ def createNetwork(
     if not __config_folder:
         __config_folder = Path('.')
 
-    cer = certificate_info_extraction(crt_path=__config_folder / "client.crt")
-    network_uuid = uuid.UUID(cer.get('subject', {}).get('commonName'))
+    network_uuid = _certificate_check(__config_folder).network_uuid
 
     atexit.register(close)
 
     __network = Network(
         name=name,
-        connection=cast(ServiceClass, __the_connection),
+        connection=cast("ServiceClass", __the_connection),
         network_uuid=network_uuid,
         description=description
     )
@@ -0,0 +1,292 @@
+"""Contain the asyncio encrypted socket class."""
+import asyncio
+import logging
+import threading
+import time
+
+from pathlib import Path
+
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import Union
+
+from .framer import JsonFramer
+from .protocol import StatusID
+from .protocol import AsyncConnection
+from .protocol import MaxRetry
+from .protocol import ReconnectInfo
+
+from ..utils import observer
+from ..utils.certificateread import CertificateBundle
+from ..utils.jitter import full_jitter_backoff
+
+
+class AsyncTlsSocket(AsyncConnection):
+    """
+    Handle the encrypted socket connection, with asyncio streams.
+
+    Have to be created from within the running event loop.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        port: int,
+        ca: Path,  # ca.crt
+        crt: Path,  # client.crt
+        key: Path,  # client.key
+        max_reconnect_retry_count: Optional[int] = None,
+        receive_size: int = 2048,
+        reconnect_base_sec: float = 1.0,
+        reconnect_max_sec: float = 60.0,
+    ):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+
+        self.observer_name = "CONNECTION"
+        self.observer = observer
+        self.observer.post(StatusID.DISCONNETCED, None)
+
+        self.send_ready = asyncio.Lock()
+
+        self.address = address
+        self.port = port
+        self.RECEIVE_SIZE = receive_size
+        self.framer = JsonFramer(size=2 * receive_size)
+        self.killed = threading.Event()
+        self.max_reconnect_retry_count = max_reconnect_retry_count
+        self.reconnect_base_sec = reconnect_base_sec
+        self.reconnect_max_sec = reconnect_max_sec
+        self.reconnect_task: Optional["asyncio.Future[bool]"] = None
+
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+        self.log.debug(f"Address: {self.address}")
+        self.log.debug(f"Port: {self.port}")
+
+        # NOTE: Shared with every connection using the same certificates, so
+        #       the cert chain is only loaded once.
+        self.ssl_context = CertificateBundle.load(ca=ca, crt=crt, key=key).ssl_context
+
+    async def send(
+        self,
+        data: Union[str, bytes]
+    ) -> bool:
+        """
+        Send the str/Bytes to the server.
+
+        If given string, it is encoded as 'uft-8' & send.
+
+        Returns:
+            True, if the data could be send else
+            False.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        if self.writer is None:
+            return False
+
+        try:
+            self.writer.write(data)
+            await self.writer.drain()
+        except (ConnectionError, OSError):
+            msg = "Get a ConnectionError, while trying to send"
+            self.log.exception(msg)
+            await self.reconnect()
+            return False
+        else:
+            self.log.debug(f"Raw Data Send: {data!r}")
+            return True
+
+    async def receive(self, parser: Callable[[bytes], Any]) -> Any:
+        """
+        Socket receive method.
+
+        Wait for the next complete JSON document from the stream, & parse
+        it. Since it do not poll, it is only woken up when data is received.
+
+        Args:
+            Callable: A parser, that returns the parsed data.
+                      On Parsing Error, it should raise a
+                      ValueError TypeError or any subClasses of those.
+                      (Like 'JSONDecodeError' & 'pydantic.ValidationError' is)
+
+        Returns:
+            The "parser"'s output, or None if the connection was closed.
+        """
+        while not self.killed.is_set():
+            frame = self.framer.next_frame()
+            if frame is not None:
+                try:
+                    parsed_data = parser(frame)
+                except ValueError as err:  # parentClass for JSONDecodeError.
+                    self.log.debug(f'Parsing Error: {err}; Dropping: {frame!r}')
+                except TypeError as err:  # parentClass for pydantic.ValidationError
+                    self.log.debug(f'Parsing Error: {err}; Dropping: {frame!r}')
+                else:
+                    self.log.debug(f"Raw Data Received: {frame!r}")
+                    return parsed_data
+                continue
+
+            if self.reader is None:
+                return None
+
+            try:
+                data_chunk = await self.reader.read(self.RECEIVE_SIZE)
+            except (ConnectionError, OSError) as err:
+                if self.killed.is_set():
+                    return None
+                self.log.warning(f"Receive -> OSError: {err}")
+                await self.reconnect()
+                continue
+            if data_chunk == b'':
+                if self.killed.is_set():
+                    return None
+                self.log.debug("Server Closed socket.")
+                await self.reconnect()
+                continue
+            self.framer.feed(data_chunk)
+        return None
+
+    async def connect(self) -> Optional[bool]:
+        """
+        Connect to the server.
+
+        Attempts a connection to the server on the provided address and port.
+
+        Returns:
+            'True' if the connection was successful.
+        """
+        if self.killed.is_set():
+            self.log.warning('Connection is set to be closing.')
+            return False
+
+        self.framer.clear()
+
+        try:
+            self.log.info("Trying to Connect.")
+            self.observer.post(StatusID.CONNECTING, None)
+            self.reader, self.writer = await asyncio.open_connection(
+                host=self.address,
+                port=self.port,
+                ssl=self.ssl_context,
+                server_hostname=self.address,
+            )
+            sockname = self.writer.get_extra_info('sockname')
+            self.log.info(
+                f"Connected on interface: {sockname[0] if sockname else None}"
+            )
+            self.observer.post(StatusID.CONNECTED, None)
+            return True
+
+        except Exception as e:
+            self.observer.post(StatusID.DISCONNETCED, None)
+            self.log.error("Failed to connect: {}".format(e))
+            raise
+
+    async def reconnect(self, retry_limit: Optional[int] = None) -> bool:
+        """
+        Attempt to reconnect.
+
+        Reconnect to the server, until the given amount af attempts,
+        are above the retry_limit.
+        if the retry_limit are not set, it will never end.
+
+        Only one reconnect runs at the time, any other caller meanwhile,
+        wait for the result of that one. Between the attempts, it wait
+        with capped exponential backoff with full jitter.
+
+        Returns:
+            'True' if the connection was successful else
+            'False'
+        """
+        if self.killed.is_set():
+            return False
+
+        if self.reconnect_task is None or self.reconnect_task.done():
+            self.reconnect_task = asyncio.ensure_future(
+                self.__reconnect_loop(retry_limit)
+            )
+        else:
+            self.log.debug("Waiting for the ongoing reconnect.")
+        return await asyncio.shield(self.reconnect_task)
+
+    async def __reconnect_loop(self, retry_limit: Optional[int]) -> bool:
+        self.log.warning("Reconnection...")
+
+        retry_left: Optional[int] = (
+            retry_limit if retry_limit is not None
+            else self.max_reconnect_retry_count
+        )
+
+        disconnected_at = time.monotonic()
+        attempt = 0
+
+        while retry_left is None or retry_left > 0:
+            if retry_left:
+                retry_left -= 1
+            attempt += 1
+            await self.disconnect()
+            try:
+                if await self.connect():
+                    self.log.warning("Reconnected...")
+                    self.observer.post(
+                        StatusID.RECONNECTED,
+                        ReconnectInfo(
+                            attempt=attempt,
+                            disconnected_sec=time.monotonic() - disconnected_at,
+                        )
+                    )
+                    return True
+            except OSError:
+                self.log.exception('Reconnecting error.')
+            if self.killed.is_set():
+                return False
+
+            delay = full_jitter_backoff(
+                attempt=attempt - 1,
+                base_sec=self.reconnect_base_sec,
+                max_sec=self.reconnect_max_sec,
+            )
+            self.observer.post(
+                StatusID.RECONNECTING,
+                ReconnectInfo(
+                    attempt=attempt,
+                    disconnected_sec=time.monotonic() - disconnected_at,
+                    retry_in_sec=delay,
+                )
+            )
+            self.log.warning(f"Trying to reconnect in {delay:.1f} seconds")
+            await asyncio.sleep(delay)
+
+        raise MaxRetry('Max retry count was reached.')
+
+    async def disconnect(self) -> None:
+        """Disconnect from the server."""
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.observer.post(StatusID.DISCONNETCED, None)
+
+    async def close(self) -> None:
+        """
+        Close the connection.
+
+        Closes the socket object connection.
+        """
+        self.killed.set()
+        self.log.info("Closing connection...")
+        self.observer.post(StatusID.DISCONNECTING, None)
+        if self.reconnect_task is not None and not self.reconnect_task.done():
+            self.reconnect_task.cancel()
+        await self.disconnect()
+        self.reader = None
+        self.writer = None
+        self.log.info("Connection closed!")
@@ -0,0 +1,227 @@
+"""Contain the incremental JSON stream framer."""
+import re
+
+from typing import Optional
+
+
+class JsonFramer:
+    """
+    Split a byte stream into complete JSON documents.
+
+    The framer keep track of the bracket depth & the string state across
+    the received chunks, so every byte is only scanned once, and a document
+    is only handed on, when it is complete. Any bytes after a complete
+    document, are kept for the next one.
+
+    The data are kept in a preallocated buffer, that is only grown when a
+    document do not fit, so the socket can receive straight into it, with
+    the `reserve` & `commit` methods.
+    """
+
+    # NOTE: Match a whole string in one go, where group 1 is the closing quote.
+    __token = re.compile(rb'"(?:[^"\\]+|\\.)*(")?|[{}\[\]]', re.DOTALL)
+    __string = re.compile(rb'["\\]')
+    __non_space = re.compile(rb'\S')
+    __token_end = re.compile(rb'[\s{\["]')
+    __bracket_pair = re.compile(rb'[{\[][}\]]')
+    __non_brackets = bytes(x for x in range(256) if x not in b'{}[]')
+    __max_reductions = 32
+
+    def __init__(self, size: int = 4096) -> None:
+        """
+        Initialize an empty framer.
+
+        Args:
+            size: The initial size of the buffer. When idle, the buffer
+                  shrinks back to this size, after a larger document.
+        """
+        self.size = size
+        self.buffer = bytearray(size)
+        self.__start: int = 0
+        self.__end: int = 0
+        self.__pos: int = 0
+        self.__depth: int = 0
+        self.__in_string: bool = False
+
+    def __len__(self) -> int:
+        """Return the amount of bytes waiting to be framed."""
+        return self.__end - self.__start
+
+    def reserve(self, size: int) -> memoryview:
+        """
+        Return a writable view of the free space at the end of the buffer.
+
+        The buffer is compacted or grown, if needed, for at least the given
+        size to fit. The view have to be released, before the framer is used
+        again, and the amount of bytes written into it handed to `commit`.
+
+        Args:
+            size: The amount of bytes that are going to be written.
+
+        Returns:
+            A memoryview of exactly the given size.
+        """
+        if self.__end + size > len(self.buffer):
+            if self.__start:
+                del self.buffer[:self.__start]
+                self.__end -= self.__start
+                self.__pos -= self.__start
+                self.__start = 0
+            missing = self.__end + size - len(self.buffer)
+            if missing > 0:
+                self.buffer.extend(bytes(max(missing, len(self.buffer))))
+        return memoryview(self.buffer)[self.__end:self.__end + size]
+
+    def commit(self, size: int) -> None:
+        """Mark the given amount of reserved bytes, as received."""
+        self.__end += size
+
+    def feed(self, data: bytes) -> None:
+        """Add the given received data to the stream."""
+        with self.reserve(len(data)) as view:
+            view[:] = data
+        self.commit(len(data))
+
+    def clear(self) -> None:
+        """Drop all pending data, & reset the scan state."""
+        self.__reset()
+
+    def __reset(self) -> None:
+        if len(self.buffer) > self.size:
+            self.buffer = bytearray(self.size)
+        self.__start = 0
+        self.__end = 0
+        self.__pos = 0
+        self.__depth = 0
+        self.__in_string = False
+
+    def __pop(self, end: int) -> bytes:
+        with memoryview(self.buffer) as view:
+            frame = view[self.__start:end].tobytes()
+        if end == self.__end:
+            self.__reset()
+        else:
+            self.__start = end
+            self.__pos = end
+            self.__depth = 0
+            self.__in_string = False
+        return frame
+
+    def __skip_ahead(self, pos: int) -> bool:
+        """
+        Skip the unscanned data in bulk, if it can not end the document.
+
+        The strings are cut out, & all the matching bracket pairs removed,
+        which leave the closing brackets followed by the opening ones.
+        If there are fewer closing brackets than the current depth, the
+        document can not end within the data. The last byte is left for
+        the token scan, since that is where a document most often ends.
+
+        Returns:
+            True, if the data was skipped, else
+            False, if it need to be scanned one token at the time.
+        """
+        end = self.__end
+        while end > pos and self.buffer[end - 1] in b' \t\r\n':
+            end -= 1
+        end -= 1
+        if end <= pos:
+            return False
+
+        with memoryview(self.buffer) as view:
+            segment = view[pos:end].tobytes()
+        if b'\\' in segment:
+            return False
+
+        parts = segment.split(b'"')
+        brackets = b''.join(parts[::2]).translate(None, self.__non_brackets)
+        for _ in range(self.__max_reductions):
+            reduced = self.__bracket_pair.sub(b'', brackets)
+            if len(reduced) == len(brackets):
+                break
+            brackets = reduced
+        else:
+            return False
+
+        closing = len(brackets) - len(brackets.lstrip(b'}]'))
+        if closing >= self.__depth:
+            return False
+
+        self.__depth += len(brackets) - 2 * closing
+        self.__in_string = len(parts) % 2 == 0
+        self.__pos = end
+        return True
+
+    def next_frame(self) -> Optional[bytes]:
+        """
+        Return the next complete JSON document, if one is ready.
+
+        Returns:
+            The raw bytes for exactly one JSON document, or
+            None, if more data is needed.
+        """
+        buf = self.buffer
+        pos = self.__pos
+        end = self.__end
+
+        if self.__depth == 0 and not self.__in_string:
+            # NOTE: Looking for the start of a new document.
+            start = self.__non_space.search(buf, pos, end)
+            if start is None:
+                self.__reset()
+                return None
+            self.__start = start.start()
+            if buf[self.__start] in b'{[':
+                self.__depth = 1
+                pos = self.__start + 1
+            elif buf[self.__start] == ord('"'):
+                pos = self.__start
+            else:
+                # NOTE: A bare scalar (number, true, false, null).
+                scalar_end = self.__token_end.search(buf, self.__start + 1, end)
+                if scalar_end is None:
+                    self.__pos = self.__start
+                    return None
+                return self.__pop(scalar_end.start())
+
+        skipped = False
+        while True:
+            if self.__in_string:
+                match = self.__string.search(buf, pos, end)
+                if match is None:
+                    break
+                if buf[match.start()] == ord('\\'):
+                    # NOTE: Skip the escaped char, even if not received yet.
+                    pos = match.start() + 2
+                    continue
+                pos = match.end()
+                self.__in_string = False
+                if self.__depth == 0:
+                    return self.__pop(pos)
+
+            if not skipped:
+                skipped = True
+                if self.__depth and self.__skip_ahead(pos):
+                    pos = self.__pos
+                    continue
+
+            match = self.__token.search(buf, pos, end)
+            if match is None:
+                break
+            pos = match.end()
+            char = buf[match.start()]
+            if char == ord('"'):
+                if match.group(1) is None:
+                    # NOTE: The rest of the string have not been received yet.
+                    self.__in_string = True
+                elif self.__depth == 0:
+                    return self.__pop(pos)
+            elif char in b'{[':
+                self.__depth += 1
+            else:
+                self.__depth -= 1
+                if self.__depth == 0:
+                    return self.__pop(pos)
+
+        self.__pos = max(pos, end)
+        return None
@@ -0,0 +1,176 @@
+"""Contain the in-process loopback connection."""
+import logging
+import threading
+import time
+
+from collections import deque
+
+from typing import Any
+from typing import Callable
+from typing import Deque
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .framer import JsonFramer
+from .protocol import StatusID
+from .protocol import Connection
+
+from ..utils import observer
+
+
+class LoopbackConnection(Connection):
+    """
+    An in-process connection, without TLS or sockets.
+
+    The data send are given directly to the handler, which act as the server,
+    and return the reply, or b'' if there are none. Data the server send on
+    its own, (Like a Control update) are given to `push`.
+
+    If latency_sec is set, it is added in both directions. The sending
+    thread sleeps for it, like on a slow link, while the reply is held back
+    for it, before it can be received.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[bytes], bytes],
+        latency_sec: float = 0.0,
+    ):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+
+        self.observer_name = "CONNECTION"
+        self.observer = observer
+
+        self.send_ready = threading.Lock()
+
+        self.handler = handler
+        self.latency_sec = latency_sec
+
+        self.framer = JsonFramer()
+        self.inbound: Deque[Tuple[float, bytes]] = deque()
+        self.ready = threading.Condition()
+        self.connected = False
+        self.killed = threading.Event()
+
+    def push(self, data: Union[str, bytes]) -> None:
+        """Add data from the server, to be received after the latency."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self.ready:
+            self.inbound.append((time.perf_counter() + self.latency_sec, data))
+            self.ready.notify_all()
+
+    def send(
+        self,
+        data: Union[str, bytes]
+    ) -> bool:
+        """
+        Give the str/Bytes to the handler, & push its reply.
+
+        If given string, it is encoded as 'uft-8'.
+
+        Returns:
+            True, if the data could be send else
+            False.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        if not self.connected or self.killed.is_set():
+            return False
+
+        if self.latency_sec:
+            time.sleep(self.latency_sec)
+
+        reply = self.handler(data)
+        self.log.debug(f"Raw Data Send: {data!r}")
+        if reply:
+            self.push(reply)
+        return True
+
+    def __next_data(self) -> Optional[bytes]:
+        """Wait for the next data, that is due, or return None if closed."""
+        with self.ready:
+            while not self.killed.is_set():
+                if self.inbound:
+                    delay = self.inbound[0][0] - time.perf_counter()
+                    if delay <= 0:
+                        return self.inbound.popleft()[1]
+                    self.ready.wait(delay)
+                else:
+                    self.ready.wait()
+        return None
+
+    def receive(self, parser: Callable[[bytes], Any]) -> Any:
+        """
+        Wait for the next complete JSON document, & parse it.
+
+        Args:
+            Callable: A parser, that returns the parsed data.
+                      On Parsing Error, it should raise a
+                      ValueError TypeError or any subClasses of those.
+                      (Like 'JSONDecodeError' & 'pydantic.ValidationError' is)
+
+        Returns:
+            The "parser"'s output, or None if closed.
+        """
+        while not self.killed.is_set():
+            frame = self.framer.next_frame()
+            if frame is None:
+                data = self.__next_data()
+                if data is None:
+                    return None
+                self.framer.feed(data)
+                continue
+
+            try:
+                return parser(frame)
+            except ValueError as err:  # parentClass for JSONDecodeError.
+                self.log.debug(f'Parsing Error: {err}; Dropping: {frame!r}')
+            except TypeError as err:  # parentClass for pydantic.ValidationError
+                self.log.debug(f'Parsing Error: {err}; Dropping: {frame!r}')
+        return None
+
+    def connect(self) -> Optional[bool]:
+        """
+        Connect to the handler.
+
+        Returns:
+            'True' if the connection was successful.
+        """
+        if self.killed.is_set():
+            self.log.warning('Connection is set to be closing.')
+            return False
+        self.observer.post(StatusID.CONNECTING, None)
+        self.connected = True
+        self.framer.clear()
+        self.observer.post(StatusID.CONNECTED, None)
+        return True
+
+    def reconnect(self, retry_limit: Optional[int] = None) -> bool:
+        """
+        Reconnect to the handler.
+
+        Returns:
+            'True' if the connection was successful else
+            'False'
+        """
+        self.disconnect()
+        return bool(self.connect())
+
+    def disconnect(self) -> None:
+        """Disconnect from the handler."""
+        self.connected = False
+        self.observer.post(StatusID.DISCONNETCED, None)
+
+    def close(self) -> None:
+        """Close the connection, & wake up any waiting receive."""
+        self.killed.set()
+        self.connected = False
+        with self.ready:
+            self.inbound.clear()
+            self.ready.notify_all()
+        self.observer.post(StatusID.DISCONNETCED, None)
@@ -0,0 +1,78 @@
+"""Contain the transport profiles, that tune the socket for a use case."""
+from enum import Enum
+
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Union
+
+
+class TransportProfile(NamedTuple):
+    """
+    The socket & send settings, for a given use case.
+
+    A buffer size of None, leave it at the OS default.
+    """
+
+    nodelay: bool = False
+    send_buffer: Optional[int] = None
+    receive_buffer: Optional[int] = None
+    receive_size: int = 2048
+    coalesce_send: bool = False
+    socket_timeout_sec: float = 2.0
+    user_timeout_ms: int = 30_000
+    keepalive_idle_sec: int = 5 * 60
+    keepalive_interval_sec: int = 60
+    keepalive_count: int = 2
+
+
+class TransportProfiles(str, Enum):
+    """The named transport profiles."""
+
+    DEFAULT = "default"
+    LOW_LATENCY = "low_latency"
+    BULK = "bulk"
+
+
+PROFILES: Dict[TransportProfiles, TransportProfile] = {
+    TransportProfiles.DEFAULT: TransportProfile(),
+    # NOTE: For control round trips; Small messages send right away, & a
+    #       dead link is detected faster.
+    TransportProfiles.LOW_LATENCY: TransportProfile(
+        nodelay=True,
+        send_buffer=16_384,
+        receive_buffer=16_384,
+        receive_size=2048,
+        coalesce_send=False,
+        user_timeout_ms=10_000,
+        keepalive_idle_sec=60,
+        keepalive_interval_sec=10,
+        keepalive_count=3,
+    ),
+    # NOTE: For historical back-fill; Fewer & larger writes & reads. The queued
+    #       requests are send as one JSON-RPC batch, while the replies to the
+    #       server's requests (Like a Control) are still send on their own.
+    TransportProfiles.BULK: TransportProfile(
+        nodelay=False,
+        send_buffer=1_048_576,
+        receive_buffer=1_048_576,
+        receive_size=65_536,
+        coalesce_send=True,
+    ),
+}
+
+
+def get_profile(
+    profile: Union[TransportProfiles, TransportProfile, str]
+) -> TransportProfile:
+    """
+    Return the transport profile for the given name.
+
+    A TransportProfile is returned as is, so custom profiles can be used.
+
+    Raises:
+        ValueError: If there are no profile with the given name.
+    """
+    if isinstance(profile, TransportProfile):
+        return profile
+    return PROFILES[TransportProfiles(profile)]
@@ -1,4 +1,5 @@
 """Contain the Socket ABC classes."""
+
 from abc import ABC
 from abc import abstractmethod
 
@@ -8,8 +9,14 @@ from enum import Enum
 from typing import Union
 from typing import Any
 from typing import Callable
+from typing import NamedTuple
 from typing import Optional
 
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    # NOTE: Only for the annotation, so a sync user do not import asyncio.
+    import asyncio
+
 
 class MaxRetry(ConnectionError):
     """Custom Exception to signal that max Retries have been reach."""
@@ -24,6 +31,16 @@ class StatusID(str, Enum):
     CONNECTED = "Connected"
     DISCONNECTING = "Disconnecting"
     DISCONNETCED = "Disconnected"
+    RECONNECTING = "Reconnecting"
+    RECONNECTED = "Reconnected"
+
+
+class ReconnectInfo(NamedTuple):
+    """The data posted with the RECONNECTING & RECONNECTED events."""
+
+    attempt: int
+    disconnected_sec: float
+    retry_in_sec: Optional[float] = None
 
 
 class Connection(ABC):
@@ -115,3 +132,93 @@ class Connection(ABC):
         Closes the socket object connection.
         """
         pass
+
+
+class AsyncConnection(ABC):
+    """The asyncio version of the Connection."""
+
+    send_ready: "asyncio.Lock"
+
+    @abstractmethod
+    async def send(
+        self,
+        data: Union[str, bytes]
+    ) -> bool:
+        """
+        Send the str/Bytes to the server.
+
+        If given string, it is encoded as 'uft-8' & send.
+
+        Returns:
+            True, if the data could be send else
+            False.
+        """
+
+    @abstractmethod
+    async def receive(
+        self,
+        parser: Callable[[bytes], Any],
+    ) -> Any:
+        """
+        Socket receive method.
+
+        Wait for the next complete message, & parse it.
+
+        Args:
+            Callable: A parser, that returns the parsed data.
+                      On Parsing Error, it should raise a
+                      ValueError TypeError or any subClasses of those.
+                      (Like 'JSONDecodeError' & 'pydantic.ValidationError' is)
+
+        Returns:
+            The Parsers output.
+        """
+        pass
+
+    @abstractmethod
+    async def connect(self) -> Optional[bool]:
+        """
+        Connect to the server.
+
+        Attempts a connection to the server on the provided address and port.
+
+        Returns:
+            'True' if the connection was successful else
+            'False'
+        """
+        pass
+
+    @abstractmethod
+    async def reconnect(
+        self,
+        retry_limit: Optional[int] = None
+    ) -> bool:
+        """
+        Attempt to reconnect.
+
+        Close the current connection, and then try to reconnect to the server,
+        until the given amount of attempts, are above the retry_limit.
+        If the retry_limit are not set, it will continue end.
+
+        Args:
+            retry_limit: the amount of retries, before it stops.
+
+        Returns:
+            'True' if the connection was successful else
+            'False'
+        """
+        pass
+
+    @abstractmethod
+    async def disconnect(self) -> None:
+        """Disconnect from the server."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """
+        Close the connection.
+
+        Closes the socket object connection.
+        """
+        pass
@@ -0,0 +1,159 @@
+"""Contain the DNS resolver cache, used when (re)connecting."""
+import logging
+import socket
+import threading
+import time
+
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Tuple
+
+
+class Address(NamedTuple):
+    """A resolved address, ready to be given to a socket."""
+
+    family: int
+    sockaddr: Tuple[Any, ...]
+
+
+class _CacheEntry(NamedTuple):
+    expires_at: float
+    addresses: List[Address]
+
+
+class Resolver:
+    """
+    Cache the `getaddrinfo` results, with a TTL.
+
+    `getaddrinfo` do not return the TTL of the DNS records, so a fixed TTL is
+    used instead. The lookup is done with a timeout, & if it fails or times
+    out, the stale cached result is used, and if there are none, the last
+    known-good address. That way a reconnect after a network flap, do not
+    stall on a slow or broken resolver.
+    """
+
+    def __init__(
+        self,
+        ttl_sec: float = 300.0,
+        timeout_sec: float = 5.0,
+    ):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+
+        self.ttl_sec = ttl_sec
+        self.timeout_sec = timeout_sec
+
+        self.cache: Dict[Tuple[str, int], _CacheEntry] = {}
+        self.last_good: Dict[Tuple[str, int], Address] = {}
+        self.lookups: Dict[Tuple[str, int], "Future[List[Any]]"] = {}
+        self.lock = threading.Lock()
+
+    def _lookup(self, host: str, port: int) -> List[Address]:
+        """
+        Call `getaddrinfo` in a thread, so it can time out.
+
+        Only one lookup is running for each host & port. If the last one
+        timed out, & it is still running, it is waited on again, instead of
+        starting a new thread, so they do not pile up on a hanging resolver.
+
+        Raises:
+            socket.timeout: If the lookup did not finish within the timeout.
+            OSError: If the lookup failed. (Like socket.gaierror)
+        """
+        key = (host, port)
+        with self.lock:
+            lookup = self.lookups.get(key)
+            if lookup is None:
+                lookup = Future()
+                lookup.set_running_or_notify_cancel()
+                self.lookups[key] = lookup
+                thread = threading.Thread(
+                    target=self._getaddrinfo,
+                    args=(host, port, lookup),
+                    name="WappstoIoT-Resolver",
+                    daemon=True,
+                )
+                thread.start()
+
+        try:
+            result = lookup.result(timeout=self.timeout_sec)
+        except FutureTimeoutError:
+            raise socket.timeout(f"DNS lookup of {host} timed out.") from None
+
+        addresses: List[Address] = []
+        for family, _, _, _, sockaddr in result:
+            address = Address(family=family, sockaddr=tuple(sockaddr))
+            if address not in addresses:
+                addresses.append(address)
+        return addresses
+
+    def _getaddrinfo(self, host: str, port: int, lookup: "Future[List[Any]]") -> None:
+        try:
+            lookup.set_result(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+        except OSError as err:
+            lookup.set_exception(err)
+        finally:
+            with self.lock:
+                self.lookups.pop((host, port), None)
+
+    def resolve(self, host: str, port: int) -> List[Address]:
+        """
+        Return the addresses for the given host & port.
+
+        The last known-good address is put first, if it is still among them.
+
+        Raises:
+            OSError: If the lookup failed, and no address was known.
+        """
+        key = (host, port)
+        with self.lock:
+            entry = self.cache.get(key)
+            last_good = self.last_good.get(key)
+
+        if entry is None or entry.expires_at <= time.monotonic():
+            try:
+                addresses = self._lookup(host, port)
+            except OSError as err:
+                if entry is not None:
+                    self.log.warning(f"DNS lookup failed: {err}; Using stale addresses.")
+                    addresses = entry.addresses
+                    # NOTE: Do not retry the lookup on every reconnect attempt.
+                    with self.lock:
+                        self.cache[key] = _CacheEntry(
+                            expires_at=time.monotonic() + min(self.ttl_sec, 30.0),
+                            addresses=addresses,
+                        )
+                elif last_good is not None:
+                    self.log.warning(f"DNS lookup failed: {err}; Using last good address.")
+                    addresses = [last_good]
+                else:
+                    raise
+            else:
+                self.log.debug(f"Resolved {host}: {[x.sockaddr[0] for x in addresses]}")
+                with self.lock:
+                    self.cache[key] = _CacheEntry(
+                        expires_at=time.monotonic() + self.ttl_sec,
+                        addresses=addresses,
+                    )
+        else:
+            addresses = entry.addresses
+
+        if last_good is not None and last_good in addresses:
+            addresses = [last_good] + [x for x in addresses if x != last_good]
+        return addresses
+
+    def mark_good(self, host: str, port: int, address: Address) -> None:
+        """Remember the address that was last connected to."""
+        with self.lock:
+            self.last_good[(host, port)] = address
+
+    def clear(self) -> None:
+        """Forget all the cached addresses."""
+        with self.lock:
+            self.cache.clear()
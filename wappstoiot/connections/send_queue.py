@@ -0,0 +1,275 @@
+"""Contain the outbound queue, that is drained by a single writer thread."""
+import logging
+import threading
+import time
+
+from collections import deque
+from enum import Enum
+
+from typing import Any
+from typing import Callable
+from typing import Deque
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+from .protocol import Connection
+
+
+class QueuePolicy(str, Enum):
+    """What to do with a new message, when the send queue is full."""
+
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    SPILL = "spill"
+
+
+class SendQueueMetrics(NamedTuple):
+    """A snapshot of the send queue's metrics."""
+
+    depth: int
+    peak_depth: int
+    sent: int
+    writes: int
+    dropped: int
+    spilled: int
+    wait_avg_sec: float
+    wait_max_sec: float
+
+
+class _Item(NamedTuple):
+    payload: str
+    data: Any
+    enqueued_at: float
+    request: bool
+
+
+class SendQueue:
+    """
+    A bounded outbound queue, drained by one writer thread.
+
+    The callers only hold the queue lock, while adding the message, so a slow
+    link do not block every reporting thread, but only fill up the queue.
+    When the queue is full, the policy decide if the caller is blocked, the
+    oldest message is dropped, or the new message is spilled to the
+    `on_spill` callback. (Like the offline storage.)
+
+    If coalesce is set, adjacent requests are send as one JSON-RPC batch,
+    with a single `send` call. The replies to the server's requests, are
+    always send on their own, so a reply is never held back by, or mixed
+    into, a batch of requests.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        max_size: int = 1000,
+        policy: QueuePolicy = QueuePolicy.BLOCK,
+        coalesce: bool = False,
+        coalesce_max_bytes: int = 65_536,
+        on_spill: Optional[Callable[[Any], None]] = None,
+    ):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+
+        if max_size < 1:
+            raise ValueError("The send queue max_size need to be at least 1.")
+
+        self.connection = connection
+        self.max_size = max_size
+        self.policy = QueuePolicy(policy)
+        self.coalesce = coalesce
+        self.coalesce_max_bytes = coalesce_max_bytes
+        self.on_spill = on_spill
+
+        self.queue: Deque[_Item] = deque()
+        self.ready = threading.Condition()
+        self.killed = False
+        self.in_flight = 0
+
+        self.__peak_depth = 0
+        self.__sent = 0
+        self.__writes = 0
+        self.__dropped = 0
+        self.__spilled = 0
+        self.__wait_total = 0.0
+        self.__wait_max = 0.0
+
+        self.writer = threading.Thread(
+            target=self._writer,
+            name="WappstoIoT-Writer",
+            daemon=True,
+        )
+        self.writer.start()
+
+    def put(self, payload: str, data: Any = None, request: bool = True) -> bool:
+        """
+        Add the payload to the queue.
+
+        Args:
+            payload: The serialized message to be send.
+            data: The message it was serialized from, that are given to
+                `on_spill`, if it is spilled.
+            request: False, if it is a reply, that should not be coalesced.
+
+        Returns:
+            True, if the payload was queued, else
+            False, if it was spilled, or the queue is closed.
+        """
+        item = _Item(
+            payload=payload,
+            data=data,
+            enqueued_at=time.perf_counter(),
+            request=request,
+        )
+        dropped: Optional[_Item] = None
+        with self.ready:
+            if self.killed:
+                return False
+
+            spill = len(self.queue) >= self.max_size and self.policy == QueuePolicy.SPILL
+            if spill:
+                self.__spilled += 1
+            elif len(self.queue) >= self.max_size:
+                if self.policy == QueuePolicy.DROP_OLDEST:
+                    dropped = self.queue.popleft()
+                    self.__dropped += 1
+                else:
+                    self.ready.wait_for(
+                        lambda: len(self.queue) < self.max_size or self.killed
+                    )
+                    if self.killed:
+                        return False
+
+            if not spill:
+                self.queue.append(item)
+                self.__peak_depth = max(self.__peak_depth, len(self.queue))
+                self.ready.notify_all()
+
+        if spill:
+            self.log.warning("Send queue full; Spilling message.")
+            self._spill(item)
+            return False
+        if dropped is not None:
+            self.log.warning(f"Send queue full; Dropped: {dropped.payload!r}")
+        return True
+
+    def _spill(self, item: _Item) -> None:
+        if self.on_spill is None:
+            self.log.warning(f"Nowhere to spill; Dropped: {item.payload!r}")
+            return
+        try:
+            self.on_spill(item.data)
+        except Exception:
+            self.log.exception("Spill Error:")
+
+    def _next_items(self) -> List[_Item]:
+        """Wait for, & pop the next message(s) to be send."""
+        with self.ready:
+            self.ready.wait_for(lambda: self.queue or self.killed)
+            if not self.queue:
+                return []
+            items = [self.queue.popleft()]
+            if self.coalesce and items[0].request:
+                size = len(items[0].payload)
+                while (
+                    self.queue
+                    and self.queue[0].request
+                    and size + len(self.queue[0].payload) <= self.coalesce_max_bytes
+                ):
+                    items.append(self.queue.popleft())
+                    size += len(items[-1].payload)
+            self.in_flight = len(items)
+            self.ready.notify_all()
+        return items
+
+    @staticmethod
+    def _coalesce(items: List[_Item]) -> str:
+        """Join the JSON-RPC requests into one JSON-RPC batch."""
+        if len(items) == 1:
+            return items[0].payload
+        parts: List[str] = []
+        for item in items:
+            payload = item.payload.strip()
+            if payload.startswith("["):
+                payload = payload[1:-1].strip()
+            if payload:
+                parts.append(payload)
+        return f"[{','.join(parts)}]"
+
+    def _writer(self) -> None:
+        self.log.debug("Writer Started!")
+        while True:
+            items = self._next_items()
+            if not items:
+                break
+            try:
+                self.connection.send(self._coalesce(items))
+            except Exception:
+                self.log.exception("Writer Error:")
+            now = time.perf_counter()
+            with self.ready:
+                self.in_flight = 0
+                self.__writes += 1
+                self.__sent += len(items)
+                for item in items:
+                    wait = now - item.enqueued_at
+                    self.__wait_total += wait
+                    self.__wait_max = max(self.__wait_max, wait)
+                self.ready.notify_all()
+        self.log.debug("Writer Stopped!")
+
+    def __len__(self) -> int:
+        """Return the amount of messages waiting to be send."""
+        return len(self.queue)
+
+    def metrics(self) -> SendQueueMetrics:
+        """
+        Return the current metrics of the queue.
+
+        The wait time is from the message was queued, until it was send.
+        """
+        with self.ready:
+            return SendQueueMetrics(
+                depth=len(self.queue),
+                peak_depth=self.__peak_depth,
+                sent=self.__sent,
+                writes=self.__writes,
+                dropped=self.__dropped,
+                spilled=self.__spilled,
+                wait_avg_sec=self.__wait_total / self.__sent if self.__sent else 0.0,
+                wait_max_sec=self.__wait_max,
+            )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all the queued messages have been send.
+
+        Returns:
+            True, if the queue was emptied, else
+            False, if the timeout ran out.
+        """
+        with self.ready:
+            return self.ready.wait_for(
+                lambda: (not self.queue and not self.in_flight) or self.killed,
+                timeout=timeout
+            ) and not self.queue
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the writer thread.
+
+        The messages already in the queue, are tried send within the timeout,
+        before the writer is stopped.
+        """
+        self.flush(timeout=timeout)
+        with self.ready:
+            self.killed = True
+            left = len(self.queue)
+            self.queue.clear()
+            self.ready.notify_all()
+        if left:
+            self.log.warning(f"Send queue closed; Dropped {left} messages.")
+        if self.writer is not threading.current_thread():
+            self.writer.join(timeout=timeout)
@@ -1,5 +1,6 @@
 """Contain the encrypted socket class."""
 import logging
+import selectors
 import socket
 import threading
 import time
@@ -12,11 +13,17 @@ from typing import Callable
 from typing import Optional
 from typing import Union
 
+from .framer import JsonFramer
+from .profiles import TransportProfile
 from .protocol import StatusID
 from .protocol import Connection
 from .protocol import MaxRetry
+from .protocol import ReconnectInfo
+from .resolver import Resolver
 
 from ..utils import observer
+from ..utils.certificateread import CertificateBundle
+from ..utils.jitter import full_jitter_backoff
 
 
 class TlsSocket(Connection):
@@ -30,6 +37,13 @@ class TlsSocket(Connection):
         crt: Path,  # client.crt
         key: Path,  # client.key
         max_reconnect_retry_count: Optional[int] = None,
+        receive_size: int = 2048,
+        zero_copy: bool = False,
+        reconnect_base_sec: float = 1.0,
+        reconnect_max_sec: float = 60.0,
+        connect_timeout_sec: float = 5.0,
+        dns_ttl_sec: float = 300.0,
+        profile: TransportProfile = TransportProfile(),
     ):
         """."""
         self.log = logging.getLogger(__name__)
@@ -43,42 +57,69 @@ class TlsSocket(Connection):
 
         self.address = address
         self.port = port
-        self.socket_timeout_ms = 30_000
-        self.RECEIVE_SIZE = 2048
+        self.profile = profile
+        self.socket_timeout_ms = profile.user_timeout_ms
+        self.connect_timeout_sec = connect_timeout_sec
+        self.resolver = Resolver(ttl_sec=dns_ttl_sec)
+        self.RECEIVE_SIZE = receive_size
+        self.zero_copy = zero_copy
+        self.framer = JsonFramer(size=2 * receive_size)
         self.killed = threading.Event()
         self.max_reconnect_retry_count = max_reconnect_retry_count
+        self.reconnect_base_sec = reconnect_base_sec
+        self.reconnect_max_sec = reconnect_max_sec
+
+        # NOTE: Only one thread owns the reconnect, the others wait on it.
+        self.reconnect_ready = threading.Condition()
+        self.reconnecting = False
+        self.__reconnected = True
+
+        # NOTE: The last TLS session is offered on the next connect, so a
+        #       reconnect can skip the full handshake, if the server allows it.
+        self.session: Optional[ssl.SSLSession] = None
+        self.session_reused = False
+
+        # NOTE: The receive loop sleeps in the selector, until the socket is
+        #       readable, or it is woken up through the self-pipe. They are
+        #       first created, when the receive loop needs them.
+        self.selector: Optional[selectors.BaseSelector] = None
+        self.wakeup_r: Optional[socket.socket] = None
+        self.wakeup_w: Optional[socket.socket] = None
+        self.selector_lock = threading.Lock()
+        self.receiving = False
+        self.wakeup_count = 0
+        self.__selected: Optional[socket.socket] = None
 
         self.log.debug(f"Address: {self.address}")
         self.log.debug(f"Port: {self.port}")
 
-        self.ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-        self.ssl_context.check_hostname = True
-        self.ssl_context.verify_flags = ssl.OP_NO_TLSv1_1
-        self.ssl_context.verify_mode = ssl.CERT_REQUIRED
-        # if logging.root.level <= logging.DEBUG:  # NOTE: Only works after 3.8
-        #     self.ssl_context.keylog_filename = "keylog_file.log"
+        # NOTE: Shared with every connection using the same certificates, so
+        #       the cert chain is only loaded once.
+        self.ssl_context = CertificateBundle.load(ca=ca, crt=crt, key=key).ssl_context
 
-        self.ssl_context.load_cert_chain(certfile=crt, keyfile=key)
-        self.ssl_context.load_verify_locations(cafile=ca)
-
-    def _socket_setup(self) -> None:
+    def _socket_setup(self, family: int = socket.AF_INET) -> None:
         """
         Create socket to communicate with server.
 
         Creates a socket instance and sets the options for communication.
         Passes the socket to the ssl_wrap method
 
+        Args:
+            family: The address family of the address to connect to.
+
         Note:
-        After 5 idle minutes, start sending keepalives every 1 minutes.
-        Drop connection after 2 failed keepalives
+        The keepalive, timeouts, TCP_NODELAY & buffer sizes are set from
+        the transport profile. By default: After 5 idle minutes, start
+        sending keepalives every 1 minutes. Drop connection after 2 failed
+        keepalives.
         """
-        self.raw_socket: Optional[socket.socket] = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.raw_socket: Optional[socket.socket] = socket.socket(family, socket.SOCK_STREAM)
         self.raw_socket.setsockopt(
             socket.SOL_SOCKET,
             socket.SO_KEEPALIVE,
             1
         )
-        self.raw_socket.settimeout(2)
+        self.raw_socket.settimeout(self.profile.socket_timeout_sec)
         if (
             hasattr(socket, "TCP_KEEPIDLE")
             and hasattr(socket, "TCP_KEEPINTVL")
@@ -90,22 +131,22 @@ class TlsSocket(Connection):
             self.raw_socket.setsockopt(
                 socket.SOL_TCP,
                 socket.TCP_KEEPIDLE,
-                5 * 60
+                self.profile.keepalive_idle_sec
             )
             self.raw_socket.setsockopt(
                 socket.IPPROTO_TCP,
                 socket.TCP_KEEPIDLE,
-                5 * 60
+                self.profile.keepalive_idle_sec
             )
             self.raw_socket.setsockopt(
                 socket.IPPROTO_TCP,
                 socket.TCP_KEEPINTVL,
-                60
+                self.profile.keepalive_interval_sec
             )
             self.raw_socket.setsockopt(
                 socket.IPPROTO_TCP,
                 socket.TCP_KEEPCNT,
-                2
+                self.profile.keepalive_count
             )
 
         if hasattr(socket, "TCP_USER_TIMEOUT"):
@@ -118,6 +159,30 @@ class TlsSocket(Connection):
                 self.socket_timeout_ms
             )
 
+        if self.profile.nodelay:
+            self.log.debug("Setting TCP_NODELAY.")
+            self.raw_socket.setsockopt(
+                socket.IPPROTO_TCP,
+                socket.TCP_NODELAY,
+                1
+            )
+
+        # NOTE: Need to be set before connect, to affect the TCP window.
+        if self.profile.send_buffer:
+            self.log.debug(f"Setting SO_SNDBUF to {self.profile.send_buffer}.")
+            self.raw_socket.setsockopt(
+                socket.SOL_SOCKET,
+                socket.SO_SNDBUF,
+                self.profile.send_buffer
+            )
+        if self.profile.receive_buffer:
+            self.log.debug(f"Setting SO_RCVBUF to {self.profile.receive_buffer}.")
+            self.raw_socket.setsockopt(
+                socket.SOL_SOCKET,
+                socket.SO_RCVBUF,
+                self.profile.receive_buffer
+            )
+
         self.socket = self._ssl_wrap()
 
     def _ssl_wrap(self) -> ssl.SSLSocket:
@@ -127,14 +192,31 @@ class TlsSocket(Connection):
         Wraps the socket using the SSL protocol as configured in the SSL
         context, with hostname verification enabled.
 
+        The last known TLS session, if any, is offered for resumption.
+
         Returns:
             An SSL wrapped socket.
         """
         return self.ssl_context.wrap_socket(
             self.raw_socket,
-            server_hostname=self.address
+            server_hostname=self.address,
+            session=self.session,
         )
 
+    def _store_session(self) -> None:
+        """
+        Keep the current TLS session, for resumption on the next connect.
+
+        With TLS 1.3 the session tickets are first send after the handshake,
+        so this is called both after connect & before the socket is closed.
+        """
+        try:
+            session = self.socket.session
+        except (AttributeError, ValueError):
+            return
+        if session is not None:
+            self.session = session
+
     def send(
         self,
         data: Union[str, bytes]
@@ -152,6 +234,9 @@ class TlsSocket(Connection):
         if isinstance(data, str):
             data = data.encode('utf-8')
 
+        if self.reconnecting:
+            self._wait_for_reconnect()
+
         try:
             self.socket.sendall(data)
         except ConnectionError:
@@ -186,7 +271,15 @@ class TlsSocket(Connection):
         Socket receive method.
 
         Method that handles receiving data from a socket. Capable of handling
-        data chunks.
+        data chunks. The chunks are framed into complete JSON documents, so
+        the parser is only called once per document, and any data received
+        after a document, are kept for the next call.
+
+        If zero_copy is set, the data is received straight into the framer's
+        buffer, instead of into a new bytes object for each chunk.
+
+        While waiting for data, the thread sleeps in a selector, until the
+        socket is readable, or close is called.
 
         Args:
             Callable: A parser, that returns the parsed data.
@@ -197,12 +290,40 @@ class TlsSocket(Connection):
         Returns:
             The "parser"'s output.
         """
-        data = []
+        self.receiving = True
+        try:
+            return self.__receive(parser)
+        finally:
+            self.receiving = False
+            if self.killed.is_set():
+                self._close_selector()
+
+    def __receive(self, parser: Callable[[bytes], Any]) -> Any:
         while self.socket or not self.killed.is_set():
+            frame = self.framer.next_frame()
+            if frame is not None:
+                try:
+                    parsed_data = parser(frame)
+                except ValueError as err:  # parentClass for JSONDecodeError.
+                    self.log.debug(f'Parsing Error: {err}; Dropping: {frame!r}')
+                except TypeError as err:  # parentClass for pydantic.ValidationError
+                    self.log.debug(f'Parsing Error: {err}; Dropping: {frame!r}')
+                else:
+                    self.log.debug(f"Raw Data Received: {frame!r}")
+                    return parsed_data
+                continue
+
+            if not self._wait_for_data():
+                if self.killed.is_set():
+                    return None
+                continue
+
             try:
-                data_chunk = self.socket.recv(self.RECEIVE_SIZE)
+                received = self._recv()
             except socket.timeout:
-                # This happens every 2 Sec as set in self._socket_setup.
+                # NOTE: Only happens if the socket could not be selected on,
+                #       or a TLS record were not complete within the timeout.
+                self.wakeup_count += 1
                 continue
             except OSError as err:
                 # UNSURE:
@@ -219,22 +340,127 @@ class TlsSocket(Connection):
                 self.log.exception("Receive -> Timeout")
                 self.reconnect()
                 continue
-            if data_chunk == b'':
+            if received == 0:
                 self.log.debug("Server Closed socket.")
                 self.reconnect()
-            data.append(data_chunk)
+                continue
+
+    def _wait_for_data(self) -> bool:
+        """
+        Sleep until the socket is readable, or the self-pipe is written to.
+
+        Data already decrypted by the SSL layer, are not seen by the selector,
+        so that is checked first. If the socket can not be selected on, it
+        falls back to the blocking receive, with the socket timeout.
+
+        Returns:
+            True, if there are data to be received, else
+            False, if it was woken up through the self-pipe.
+        """
+        sock = self.socket
+        if sock is None or self.killed.is_set():
+            return False
+
+        if sock.pending():
+            return True
+
+        if not self._select(sock):
+            return not self.killed.is_set()
+
+        assert self.selector is not None
+        events = self.selector.select()
+        self.wakeup_count += 1
+        readable = False
+        for key, _ in events:
+            if key.fileobj is self.wakeup_r:
+                self._drain_wakeup()
+            elif key.fileobj is sock:
+                readable = True
+        return readable
+
+    def _select(self, sock: socket.socket) -> bool:
+        """
+        Make the selector watch the given socket, instead of the last one.
+
+        Returns:
+            True, if the socket is watched, else
+            False, if it could not be.
+        """
+        if sock is self.__selected:
+            return True
 
+        with self.selector_lock:
+            if self.killed.is_set():
+                return False
+            if self.selector is None:
+                self.selector = selectors.DefaultSelector()
+                self.wakeup_r, self.wakeup_w = socket.socketpair()
+                self.wakeup_r.setblocking(False)
+                self.wakeup_w.setblocking(False)
+                self.selector.register(self.wakeup_r, selectors.EVENT_READ)
+
+        if self.__selected is not None:
             try:
-                parsed_data = parser(b"".join(data))
-            except ValueError as err:  # parentClass for JSONDecodeError.
-                self.log.debug(f'Parsing Error: {err}')
+                self.selector.unregister(self.__selected)
+            except (KeyError, ValueError):
                 pass
-            except TypeError as err:  # parentClass for pydantic.ValidationError
-                self.log.debug(f'Parsing Error: {err}')
+            self.__selected = None
+
+        try:
+            self.selector.register(sock, selectors.EVENT_READ)
+        except (KeyError, ValueError, OSError) as err:
+            self.log.debug(f"Could not select on the socket: {err}")
+            return False
+        self.__selected = sock
+        return True
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while self.wakeup_r is not None and self.wakeup_r.recv(1024):
                 pass
-            else:
-                self.log.debug(f"Raw Data Received: {data}")
-                return parsed_data
+        except OSError:  # NOTE: BlockingIOError, when it is empty.
+            pass
+
+    def _wake(self) -> None:
+        """Wake up the receive loop, if it is waiting in the selector."""
+        with self.selector_lock:
+            if self.wakeup_w is None:
+                return
+            try:
+                self.wakeup_w.send(b"\0")
+            except OSError:  # NOTE: Full, so it is already woken up.
+                pass
+
+    def _close_selector(self) -> None:
+        with self.selector_lock:
+            if self.selector is None:
+                return
+            self.selector.close()
+            self.selector = None
+            if self.wakeup_r is not None:
+                self.wakeup_r.close()
+                self.wakeup_r = None
+            if self.wakeup_w is not None:
+                self.wakeup_w.close()
+                self.wakeup_w = None
+            self.__selected = None
+
+    def _recv(self) -> int:
+        """
+        Receive the next chunk into the framer.
+
+        Returns:
+            The amount of bytes received, where 0 means the socket was closed.
+        """
+        if not self.zero_copy:
+            data_chunk = self.socket.recv(self.RECEIVE_SIZE)
+            self.framer.feed(data_chunk)
+            return len(data_chunk)
+
+        with self.framer.reserve(self.RECEIVE_SIZE) as buffer:
+            received: int = self.socket.recv_into(buffer)
+        self.framer.commit(received)
+        return received
 
     def connect(self) -> Optional[bool]:
         """
@@ -249,18 +475,20 @@ class TlsSocket(Connection):
             self.log.warning('Connection is set to be closing.')
             return False
 
-        self._socket_setup()
+        self.framer.clear()
 
         try:
             self.log.info("Trying to Connect.")
             self.observer.post(StatusID.CONNECTING, None)
-            # self.socket.settimeout(10)  # Why?
-            self.socket.connect((self.address, self.port))
-            # self.socket.settimeout(None)  # Why?
+            self._connect_any()
+            self.session_reused = bool(self.socket.session_reused)
+            self._store_session()
             self.log.info(
                 f"Connected on interface: {self.socket.getsockname()[0]}"
             )
+            self.log.debug(f"TLS session reused: {self.session_reused}")
             self.observer.post(StatusID.CONNECTED, None)
+            self._wake()  # NOTE: So the receive loop selects the new socket.
             # if self.sockt_thread is None:
             #     self._start()
             return True
@@ -270,6 +498,32 @@ class TlsSocket(Connection):
             self.log.error("Failed to connect: {}".format(e))
             raise
 
+    def _connect_any(self) -> None:
+        """
+        Connect to the first of the resolved addresses, that answer.
+
+        Each address is tried in turn, with the connect timeout, & the one
+        that connected is remembered as the last known-good address.
+
+        Raises:
+            OSError: If none of the addresses could be connected to.
+        """
+        error: Optional[OSError] = None
+        for address in self.resolver.resolve(self.address, self.port):
+            self._socket_setup(address.family)
+            self.socket.settimeout(self.connect_timeout_sec)
+            try:
+                self.socket.connect(address.sockaddr)
+            except OSError as err:  # NOTE: Both socket.timeout & ssl.SSLError.
+                self.log.warning(f"Failed to connect to: {address.sockaddr[0]}; {err}")
+                self.socket.close()
+                error = err
+                continue
+            self.socket.settimeout(self.profile.socket_timeout_sec)
+            self.resolver.mark_good(self.address, self.port, address)
+            return
+        raise error if error is not None else OSError(f"No address found for: {self.address}")
+
     def reconnect(self, retry_limit: Optional[int] = None) -> bool:
         """
         Attempt to reconnect.
@@ -278,6 +532,11 @@ class TlsSocket(Connection):
         are above the retry_limit.
         if the retry_limit are not set, it will never end.
 
+        Only the first thread to call it, do the reconnect. Any other thread
+        calling it meanwhile, wait for, & return the result of that one.
+        Between the attempts, it wait with capped exponential backoff with
+        full jitter.
+
         Returns:
             'True' if the connection was successful else
             'False'
@@ -288,6 +547,25 @@ class TlsSocket(Connection):
         if not self.socket:
             return False
 
+        with self.reconnect_ready:
+            if self.reconnecting:
+                self.log.debug("Waiting for the ongoing reconnect.")
+                self.reconnect_ready.wait_for(
+                    lambda: not self.reconnecting or self.killed.is_set()
+                )
+                return self.__reconnected and not self.killed.is_set()
+            self.reconnecting = True
+
+        self.__reconnected = False
+        try:
+            self.__reconnected = self.__reconnect_loop(retry_limit)
+        finally:
+            with self.reconnect_ready:
+                self.reconnecting = False
+                self.reconnect_ready.notify_all()
+        return self.__reconnected
+
+    def __reconnect_loop(self, retry_limit: Optional[int]) -> bool:
         self.log.warning("Reconnection...")
 
         retry_left: Optional[int] = (
@@ -295,28 +573,64 @@ class TlsSocket(Connection):
             else self.max_reconnect_retry_count
         )
 
+        disconnected_at = time.monotonic()
+        attempt = 0
+
         while retry_left is None or retry_left > 0:
             if retry_left:
                 retry_left -= 1
+            attempt += 1
             self.disconnect()
             try:
                 if self.connect():
                     self.log.warning("Reconnected...")
+                    self.observer.post(
+                        StatusID.RECONNECTED,
+                        ReconnectInfo(
+                            attempt=attempt,
+                            disconnected_sec=time.monotonic() - disconnected_at,
+                        )
+                    )
                     return True
             except OSError:
                 self.log.exception('Reconnecting error.')
                 pass  # NOTE: Happens if it have forgotten the IP for the url.
-            self.log.warning("Trying to reconnect in 5 seconds")
-            time.sleep(5)
 
-        if retry_left <= 0:
-            raise MaxRetry('Max retry count was reached.')
-        return False
+            if self.killed.is_set():
+                return False
+
+            delay = full_jitter_backoff(
+                attempt=attempt - 1,
+                base_sec=self.reconnect_base_sec,
+                max_sec=self.reconnect_max_sec,
+            )
+            self.observer.post(
+                StatusID.RECONNECTING,
+                ReconnectInfo(
+                    attempt=attempt,
+                    disconnected_sec=time.monotonic() - disconnected_at,
+                    retry_in_sec=delay,
+                )
+            )
+            self.log.warning(f"Trying to reconnect in {delay:.1f} seconds")
+            if self.killed.wait(delay):
+                return False
+
+        raise MaxRetry('Max retry count was reached.')
+
+    def _wait_for_reconnect(self) -> None:
+        """Wait until the ongoing reconnect, if any, is done."""
+        with self.reconnect_ready:
+            self.reconnect_ready.wait_for(
+                lambda: not self.reconnecting or self.killed.is_set()
+            )
 
     def disconnect(self) -> None:
         """Disconnect from the server."""
         if self.socket:
+            self._store_session()
             self.socket.close()
+        self._wake()
         self.observer.post(StatusID.DISCONNETCED, None)
 
     def close(self) -> None:
@@ -326,6 +640,9 @@ class TlsSocket(Connection):
         Closes the socket object connection.
         """
         self.killed.set()
+        self._wake()
+        with self.reconnect_ready:
+            self.reconnect_ready.notify_all()
         self.log.info("Closing connection...")
         self.observer.post(StatusID.DISCONNECTING, None)
         if self.socket:
@@ -334,5 +651,7 @@ class TlsSocket(Connection):
         if self.raw_socket:
             self.raw_socket.close()
             self.raw_socket = None
+        if not self.receiving:
+            self._close_selector()
         self.observer.post(StatusID.DISCONNETCED, None)
         self.log.info("Connection closed!")
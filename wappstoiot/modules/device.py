@@ -18,11 +18,12 @@ from ..schema.iot_schema import WappstoMethod
 from ..schema.base_schema import PermissionType
 
 from .value import Value
-from .template import valueSettings
+from . import template as value_templates
 from .template import ValueTemplate
 from .template import ValueBaseType
 
 from ..utils import name_check
+from ..utils.model_diff import model_diff
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -119,13 +120,10 @@ class Device:
             # self.log.debug(
             #     element
             # )
-            if self.element != element:
-                # TODO: Post diff only.
-                self.log.info("Data Models Differ. Sending Local.")
-                self.connection.post_device(
-                    network_uuid=self.parent.uuid,
-                    data=self.element,
-                )
+            diff = model_diff(local=self.element, remote=element)
+            if diff is not None:
+                self.log.info("Data Models Differ. Sending the changes.")
+                self.connection.put_device(uuid=self.uuid, data=diff)
         else:
             self.connection.post_device(
                 network_uuid=self.parent.uuid,
@@ -644,7 +642,7 @@ class Device:
             permission=permission,
             period=period,
             delta=delta,
-            **valueSettings[value_template].model_dump()
+            **value_templates.valueSettings[value_template].model_dump()
         )
 
         self.__add_value(value_obj, name)
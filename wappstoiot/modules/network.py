@@ -16,6 +16,7 @@ from ..schema import base_schema as WSchema
 from ..schema.iot_schema import WappstoMethod
 
 from ..utils import name_check
+from ..utils.model_diff import model_diff
 
 
 # #############################################################################
@@ -84,10 +85,10 @@ class Network(object):
             # self.log.debug(
             #     element.meta
             # )
-            if self.element != element:
-                # TODO: Post diff only.
-                self.log.info("Data Models Differ. Sending Local.")
-                self.connection.post_network(self.element)
+            diff = model_diff(local=self.element, remote=element)
+            if diff is not None:
+                self.log.info("Data Models Differ. Sending the changes.")
+                self.connection.put_network(uuid=self.uuid, data=diff)
         else:
             self.connection.post_network(self.element)
 
@@ -5,6 +5,7 @@ import logging
 import uuid
 
 from enum import Enum
+from concurrent.futures import Future
 from datetime import datetime
 from datetime import timedelta
 
@@ -17,6 +18,7 @@ from typing import Optional
 from typing import Union
 
 from ..service.template import ServiceClass
+from ..service.ordered_executor import CoalescePolicy
 # from .template import dict_diff
 from .template import ValueBaseType
 # from .template import valueSettings
@@ -25,8 +27,8 @@ from ..schema.base_schema import PermissionType
 from ..schema.base_schema import LogValue
 from ..schema.iot_schema import WappstoMethod
 
-from ..utils.Timestamp import str_to_datetime
 from ..utils.jitter import exec_with_jitter
+from ..utils.model_diff import model_diff
 from ..utils.period import PeriodClass
 from ..utils.period import Period
 
@@ -35,6 +37,22 @@ if TYPE_CHECKING:
     # NOTE: To avoid circler import
     from .device import Device
 
+
+def _updated_state(
+    state: WSchema.State,
+    data: Union[LogValue, WSchema.State],
+) -> WSchema.State:
+    """
+    Return a copy of the state, updated with the fields of data, that is set.
+
+    Works like `state.model_copy(update=data.model_dump(exclude_none=True))`,
+    but without the dump, so the nested models (Like meta) are kept as models.
+    """
+    return state.model_copy(update={
+        key: value for key, value in data.__dict__.items() if value is not None
+    })
+
+
 # #############################################################################
 #                                 Value Setup
 # #############################################################################
@@ -189,13 +207,17 @@ class Value:
             self.__enable_period_delta(element)
             self.__update_self(element)
             # self.__print(element)
-            if self.element != element:
-                # TODO: Post diff only.
-                self.log.info("Data Models Differ. Sending Local.")
+            if self.element.__class__ is not element.__class__:
+                self.log.info("Value Type Changed. Sending Local.")
                 self.connection.post_value(
                     device_uuid=self.parent.uuid,
                     data=self.element
                 )
+            else:
+                diff = model_diff(local=self.element, remote=element)
+                if diff is not None:
+                    self.log.info("Data Models Differ. Sending the changes.")
+                    self.connection.put_value(uuid=self.uuid, data=diff)
             self.__update_state()
         else:
             self.__enable_period_delta(self.element)
@@ -665,6 +687,8 @@ class Value:
     def onControl(
         self,
         callback: Callable[['Value', Union[str, float]], None],
+        coalesce: Union[CoalescePolicy, str] = CoalescePolicy.ALL,
+        debounce_ms: int = 100,
     ) -> Callable[['Value', Union[str, float]], None]:
         """
         Add trigger for when a Control request have been make.
@@ -672,6 +696,12 @@ class Value:
         A Control value is typical use to request a new target value,
         for the given value.
 
+        When many Controls come in a burst, (Like from a dashboard slider)
+        the coalesce policy decide which of them the callback is called for:
+        'all' of them, (Default) only the 'latest', when the callback is
+        busy, or 'debounce', where only the newest is used, when no new
+        Control have come for debounce_ms.
+
         Callback:
             ValueObj: This object that have had a request for.
             any: The Data.
@@ -706,7 +736,9 @@ class Value:
 
         self.connection.subscribe_state_event(
             uuid=self.children_name_mapping[WSchema.StateType.CONTROL],
-            callback=_cb
+            callback=_cb,
+            coalesce=CoalescePolicy(coalesce),
+            debounce_sec=debounce_ms / 1000,
         )
 
         return callback
@@ -886,7 +918,7 @@ class Value:
         if (
             data.timestamp and self.report_state.timestamp or not self.report_state.timestamp
         ):
-            self.report_state = self.report_state.model_copy(update=data.model_dump(exclude_none=True))
+            self.report_state = _updated_state(self.report_state, data)
             self.report_state.timestamp = data.timestamp
             if self.report_state.timestamp:
                 self.report_state.timestamp = self.report_state.timestamp.replace(tzinfo=None)
@@ -937,38 +969,14 @@ class Value:
             def exec_func() -> None:
                 self.connection.put_bulk_state(
                     uuid=self.children_name_mapping[WSchema.StateType.REPORT],
-                    data=[
-                        LogValue(
-                            data=x.data,
-                            timestamp=x.timestamp
-                        ) for x in sorted_values
-                    ],
+                    data=sorted_values,
                 )
 
         else:
-            if not isinstance(value, LogValue):
-                the_timestamp = timestamp if timestamp is not None else datetime.utcnow()
-                data = LogValue(
-                    data=str(value),
-                    timestamp=the_timestamp,
-                )
-            else:
-                # TODO: Make sure the timestamp is set.
-                data: LogValue = value
-
-            if self.value_type == ValueBaseType.NUMBER:
-                new_value: float = (
-                    float(data.data)
-                    if data.data != 'NA'
-                    else float('nan')
-                )
-                if not force and not self.delta_ok(new_value=new_value):
-                    self.log.warning(
-                        f"Delta - Dropping value update for \"{self.name}\"."
-                    )
-                    return
-
-            self._update_local_report(data)
+            report_data = self.__report_data(value, timestamp, force)
+            if report_data is None:
+                return
+            data = report_data
 
             # NOTE: Single Report
             def exec_func() -> None:
@@ -981,6 +989,71 @@ class Value:
             return exec_with_jitter(exec_func)
         return exec_func()
 
+    def __report_data(
+        self,
+        value: Union[int, float, str, LogValue, None],
+        timestamp: Optional[datetime],
+        force: bool,
+    ) -> Optional[LogValue]:
+        """Return the report data, & update the local state, or None if dropped by the delta."""
+        data: LogValue
+        if not isinstance(value, LogValue):
+            the_timestamp = timestamp if timestamp is not None else datetime.utcnow()
+            data = LogValue(
+                data=str(value),
+                timestamp=the_timestamp,
+            )
+        else:
+            # TODO: Make sure the timestamp is set.
+            data = value
+
+        if self.value_type == ValueBaseType.NUMBER:
+            new_value: float = (
+                float(data.data)
+                if data.data != 'NA'
+                else float('nan')
+            )
+            if not force and not self.delta_ok(new_value=new_value):
+                self.log.warning(
+                    f"Delta - Dropping value update for \"{self.name}\"."
+                )
+                return None
+
+        self._update_local_report(data)
+        return data
+
+    def report_async(
+        self,
+        value: Union[int, float, str, LogValue, None],
+        timestamp: Optional[datetime] = None,
+        *,
+        force: bool = False,
+    ) -> Optional["Future[bool]"]:
+        """
+        Report the new current value to Wappsto, without waiting for the reply.
+
+        Works like `report`, but returns right away, so more reports can be
+        in flight at the same time. It only blocks, while the in-flight window
+        is full. (See: `max_in_flight` in `wappstoiot.config`)
+
+        Returns:
+            A Future, set to True when the report was accepted, False if
+            it was rejected, or a TimeoutError if no reply was received, or
+            the in-flight window stayed full.
+            None, if the value was dropped by the delta.
+        """
+        state_uuid = self.children_name_mapping[WSchema.StateType.REPORT]
+        self.log.info(f"Sending async Report for: {state_uuid}")
+
+        data = self.__report_data(value, timestamp, force)
+        if data is None:
+            return None
+
+        return self.connection.put_state_async(
+            uuid=state_uuid,
+            data=data,
+        )
+
     def control(
         self,
         value: Union[int, float, str, None],
@@ -995,15 +1068,15 @@ class Value:
         """
         self.log.info(f"Sending Control for: {self.control_state.meta.id}")
         the_timestamp = timestamp if timestamp is not None else datetime.utcnow()
-        data = WSchema.State(
+        # NOTE: A LogValue, so it takes the same fast path as a report.
+        data = LogValue(
             data=str(value),
             timestamp=the_timestamp,
         )
         if (
             data.timestamp and self.control_state.timestamp or self.control_state.timestamp
         ):
-            self.control_state = self.control_state.model_copy(update=data.model_dump(exclude_none=True))
-            self.control_state.timestamp = the_timestamp
+            self.control_state = _updated_state(self.control_state, data)
             if self.control_state.timestamp:
                 self.control_state.timestamp = self.control_state.timestamp.replace(tzinfo=None)
         self.connection.put_state(
@@ -1055,9 +1128,8 @@ class Value:
                         obj.timestamp and self.control_state.timestamp or not self.control_state.timestamp
                     ):
                         self.log.info(f"Control Value updated: {self.uuid}, {obj.data}")
-                        self.control_state = self.control_state.model_copy(update=obj.model_dump(exclude_none=True))
+                        self.control_state = _updated_state(self.control_state, obj)
                         if self.control_state.timestamp:
-                            self.control_state.timestamp = str_to_datetime(self.control_state.timestamp)
                             self.control_state.timestamp = self.control_state.timestamp.replace(tzinfo=None)
             except Exception:
                 self.log.exception("onCreateControl callback error.")
@@ -1,4 +1,6 @@
 """Contain the basic Wappsto schema for the network structure and children."""
+import sys
+
 from datetime import datetime
 from enum import Enum
 
@@ -9,13 +11,20 @@ from typing import Optional
 # from typing import TypeAlias
 from typing import Union
 
+if sys.version_info >= (3, 9):
+    from typing import Annotated
+else:
+    from typing_extensions import Annotated
+
 from pydantic import BaseModel
 from pydantic import ConfigDict
 from pydantic import conint
 # from pydantic import constr
+from pydantic import Discriminator
 from pydantic import Field
 from pydantic import field_serializer
 from pydantic import GenerateSchema
+from pydantic import Tag
 from pydantic import UUID4
 
 from pydantic_core import CoreSchema
@@ -39,6 +48,17 @@ class LaxStrGenerator(GenerateSchema):
 BaseModel.model_config = ConfigDict(schema_generator=LaxStrGenerator)
 
 
+class WappstoBaseModel(BaseModel):
+    """
+    The base of all the Wappsto models.
+
+    The validators are only build on first use of the model, instead of for
+    all the models on import.
+    """
+
+    model_config: ConfigDict = ConfigDict(defer_build=True)  # type: ignore
+
+
 class WappstoMethods(str, Enum):
     """The methods that the Wappsto are using."""
 
@@ -193,7 +213,7 @@ class WappstoMetaType(str, Enum):
     DELETELIST = "deletelist"
 
 
-class Connection(BaseModel):
+class Connection(WappstoBaseModel):
     """The Connection info for the network."""
 
     timestamp: Optional[datetime] = None
@@ -205,7 +225,7 @@ class Connection(BaseModel):
         return timestamp_converter(value)
 
 
-class WarningItem(BaseModel):
+class WarningItem(WappstoBaseModel):
     """The Connection info for the network."""
 
     message: Optional[Optional[str]] = None
@@ -213,7 +233,7 @@ class WarningItem(BaseModel):
     code: Optional[Optional[int]] = None
 
 
-class Geo(BaseModel):
+class Geo(WappstoBaseModel):
     """The geolocation structure for network & device objects."""
 
     latitude: Optional[str] = None
@@ -222,7 +242,7 @@ class Geo(BaseModel):
     address: Optional[Dict[str, Any]] = None
 
 
-class BaseMeta(BaseModel):
+class BaseMeta(WappstoBaseModel):
     """The base for all meta objects."""
 
     id: Optional[UUID4] = None
@@ -351,7 +371,7 @@ class NetworkMeta(BaseMeta):
     product: Optional[str] = None
 
 
-class Status(BaseModel):
+class Status(WappstoBaseModel):
     """Contain the status."""
 
     message: str
@@ -367,13 +387,13 @@ class Status(BaseModel):
         return timestamp_converter(value)
 
 
-class Info(BaseModel):
+class Info(WappstoBaseModel):
     """."""
 
     enabled: Optional[bool] = None
 
 
-class LogValue(BaseModel):
+class LogValue(WappstoBaseModel):
     """The required data for post of new values."""
 
     data: str
@@ -387,7 +407,7 @@ class LogValue(BaseModel):
         return timestamp_converter(value)
 
 
-class State(BaseModel):
+class State(WappstoBaseModel):
     """The State object found in values, that contain the raw value."""
 
     data: str
@@ -406,7 +426,7 @@ class State(BaseModel):
         return timestamp_converter(value)
 
 
-class EventlogItem(BaseModel):
+class EventlogItem(WappstoBaseModel):
     """Event Log structure, found in values.."""
 
     message: str
@@ -422,7 +442,7 @@ class EventlogItem(BaseModel):
         return timestamp_converter(value)
 
 
-class BaseValue(BaseModel):
+class BaseValue(WappstoBaseModel):
     """Base structure for all values types, what all values have."""
 
     name: Optional[str] = None
@@ -445,7 +465,7 @@ class BaseValue(BaseModel):
         return str(value) if value is not None else None
 
 
-class Number(BaseModel):
+class Number(WappstoBaseModel):
     """Substructure for the Number value."""
 
     min: Union[float, int, str]
@@ -458,21 +478,21 @@ class Number(BaseModel):
     unit: Optional[str] = None
 
 
-class String(BaseModel):
+class String(WappstoBaseModel):
     """Substructure for the String value."""
 
     max: Optional[conint(ge=1, multiple_of=1)] = None  # type: ignore
     encoding: Optional[str] = None
 
 
-class Blob(BaseModel):
+class Blob(WappstoBaseModel):
     """Substructure for the Blob value."""
 
     max: Optional[conint(ge=1, multiple_of=1)] = None  # type: ignore
     encoding: Optional[str] = None
 
 
-class Xml(BaseModel):
+class Xml(WappstoBaseModel):
     """Substructure for the XML value."""
 
     xsd: Optional[str] = None
@@ -543,7 +563,47 @@ class XmlValue(BaseValue):
     #     return values
 
 
-class Device(BaseModel):
+_value_type_keys = ('number', 'string', 'blob', 'xml')
+_value_type_tags = {
+    NumberValue: 'number',
+    StringValue: 'string',
+    BlobValue: 'blob',
+    XmlValue: 'xml',
+}
+
+
+def value_type_tag(v: Any) -> str:
+    """
+    Return the value type, (The 'number', 'string', 'blob' or 'xml' key) of the value.
+
+    It is used as the discriminator, so only the right Value model is tried.
+    A value without a type key, (Like a partial update) is a StringValue, as
+    it would have been, when all the models were tried in turn.
+    """
+    if isinstance(v, dict):
+        for key in _value_type_keys:
+            if key in v:
+                return key
+        return 'string'
+    if isinstance(v, BaseModel):
+        return _value_type_tags.get(type(v), 'string')
+    return 'uuid'
+
+
+"""A collection of all Wappsto Value Types."""
+ValueUnion = Annotated[
+    Union[
+        Annotated[NumberValue, Tag('number')],
+        Annotated[StringValue, Tag('string')],
+        Annotated[BlobValue, Tag('blob')],
+        Annotated[XmlValue, Tag('xml')],
+    ],
+    Discriminator(value_type_tag),
+]
+Value = ValueUnion
+
+
+class Device(WappstoBaseModel):
     """The Wappsto device structure."""
 
     name: Optional[str] = None
@@ -566,12 +626,15 @@ class Device(BaseModel):
     status: Optional[List[Union[Status, UUID4]]] = None
     value: Optional[
         List[
-            Union[
-                StringValue,
-                NumberValue,
-                BlobValue,
-                XmlValue,
-                UUID4
+            Annotated[
+                Union[
+                    Annotated[NumberValue, Tag('number')],
+                    Annotated[StringValue, Tag('string')],
+                    Annotated[BlobValue, Tag('blob')],
+                    Annotated[XmlValue, Tag('xml')],
+                    Annotated[UUID4, Tag('uuid')],
+                ],
+                Discriminator(value_type_tag),
             ]
         ]
     ] = None
@@ -580,7 +643,7 @@ class Device(BaseModel):
     # model_config: ConfigDict = ConfigDict(extra='forbid')  # type: ignore
 
 
-class Network(BaseModel):
+class Network(WappstoBaseModel):
     """The root wappsto structure, for all IoT data."""
 
     name: Optional[str] = None
@@ -599,21 +662,21 @@ class ApiMetaTypes(str, Enum):
     deletelist = "deletelist"
 
 
-class ApiMetaInfo(BaseModel):
+class ApiMetaInfo(WappstoBaseModel):
     """The meta structure for list types."""
 
     type: ApiMetaTypes  # Merge with MetaAPIData?
     version: WappstoVersion
 
 
-class childInfo(BaseModel):
+class childInfo(WappstoBaseModel):
     """The info of the returned object in the Id List."""
 
     type: WappstoMetaType
     version: WappstoVersion
 
 
-class IdList(BaseModel):
+class IdList(WappstoBaseModel):
     """The structure reply when a list of objects have been requested."""
 
     child: List[childInfo]
@@ -626,7 +689,7 @@ class IdList(BaseModel):
     model_config: ConfigDict = ConfigDict(extra='forbid')  # type: ignore
 
 
-class DeleteList(BaseModel):
+class DeleteList(WappstoBaseModel):
     """The structure reply when a delete request and been send."""
 
     deleted: List[UUID4]
@@ -635,9 +698,5 @@ class DeleteList(BaseModel):
     meta: ApiMetaInfo
 
 
-"""A collection of all Wappsto Value Types."""
-Value = Union[StringValue, NumberValue, BlobValue, XmlValue]
-ValueUnion = Union[StringValue, NumberValue, BlobValue, XmlValue]
-
 """A collection of all Wappsto Types."""
 WappstoObject = Union[Network, Device, Value, State, IdList, DeleteList]
@@ -1,4 +1,6 @@
 """Contain the basic JSONRpc structure for the the IoT endpoint."""
+import functools
+import sys
 import uuid
 import datetime
 
@@ -10,14 +12,21 @@ from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Tuple
-from typing import Type
 from typing import Union
 from typing import Iterable
 
+if sys.version_info >= (3, 9):
+    from typing import Annotated
+else:
+    from typing_extensions import Annotated
+
 from pydantic import BaseModel
 from pydantic import ConfigDict
+from pydantic import Discriminator
 from pydantic import field_validator
 from pydantic import FieldValidationInfo
+from pydantic import RootModel
+from pydantic import Tag
 from pydantic import TypeAdapter
 
 from .base_schema import BlobValue
@@ -27,6 +36,7 @@ from .base_schema import NumberValue
 from .base_schema import State
 from .base_schema import LogValue
 from .base_schema import StringValue
+from .base_schema import ValueUnion
 from .base_schema import XmlValue
 from .base_schema import IdList
 from .base_schema import DeleteList
@@ -38,9 +48,6 @@ def pair_wise(values: Iterable[str]) -> Iterable[Tuple[str, str]]:
     return zip_longest(a, a)
 
 
-ValueUnion: Type = Union[StringValue, NumberValue, BlobValue, XmlValue]
-
-
 JsonRpc_error_codes = {
     # Rpc Error Code: [HTTP Error Code, "Error String"]
     -32700: [400, "Parse error"],
@@ -80,9 +87,8 @@ class WappstoObjectType(str, Enum):
     STATE = "state"
 
 
-ObjectType2BaseModel: Dict[WappstoObjectType, Union[
-    Type[Network], Type[Device], Type[ValueUnion], Type[State], Type[LogValue]]
-] = {
+# NOTE: The ValueUnion & the State Union are not classes, so the values are typed as object.
+ObjectType2BaseModel: Dict[WappstoObjectType, object] = {
     WappstoObjectType.NETWORK: Network,
     WappstoObjectType.DEVICE: Device,
     WappstoObjectType.VALUE: ValueUnion,
@@ -90,12 +96,29 @@ ObjectType2BaseModel: Dict[WappstoObjectType, Union[
 }
 
 
-def url_parser(url: str) -> List[Tuple[WappstoObjectType, Optional[uuid.UUID]]]:
-    """Parse the Wappsto Url, for wappsto Type & given UUID."""
+@functools.lru_cache(maxsize=None)
+def object_type_adapter(obj_type: WappstoObjectType) -> Optional[TypeAdapter[Any]]:
+    """
+    Return the TypeAdapter for the object type, or None if unhandled.
+
+    Building a TypeAdapter is slow, so each is only build once, on first use.
+    """
+    model = ObjectType2BaseModel.get(obj_type)
+    if model is None:
+        return None
+    return TypeAdapter(model)
+
+
+UrlPath = Tuple[Tuple[WappstoObjectType, Optional[uuid.UUID]], ...]
+
+# NOTE: The same few urls are received over & over, so they are only parsed once.
+url_cache_size: int = 1024
+
+
+@functools.lru_cache(maxsize=url_cache_size)
+def _parse_url(url: str) -> UrlPath:
     r_list: List[Tuple[WappstoObjectType, Optional[uuid.UUID]]] = []
     obj_type: Optional[WappstoObjectType] = None
-    if url is None:
-        raise ValueError("Url need to be Set.")
     parsed_url = url.split("?")[0]
     if parsed_url.startswith("/services/2.0/"):
         parsed_url = parsed_url.replace("/services/2.0", "")
@@ -106,7 +129,31 @@ def url_parser(url: str) -> List[Tuple[WappstoObjectType, Optional[uuid.UUID]]]:
         else:
             r_list.append((obj_type, None))
             break
-    return r_list
+    return tuple(r_list)
+
+
+def url_parser(url: str) -> List[Tuple[WappstoObjectType, Optional[uuid.UUID]]]:
+    """
+    Parse the Wappsto Url, for wappsto Type & given UUID.
+
+    The last url_cache_size parsed urls are cached.
+    """
+    if url is None:
+        raise ValueError("Url need to be Set.")
+    return list(_parse_url(url))
+
+
+def url_target(url: str) -> Optional[uuid.UUID]:
+    """
+    Find the UUID of the object the Url is for.
+
+    For a Url to a new child, (Like `/value/{uuid}/state`) it is the UUID
+    of the parent.
+    """
+    for _, obj_uuid in reversed(_parse_url(url)):
+        if obj_uuid is not None:
+            return obj_uuid
+    return None
 
 
 class WappstoMethod(str, Enum):
@@ -120,6 +167,8 @@ class WappstoMethod(str, Enum):
     HEAD = "HEAD"
 
 
+# NOTE: The JSONRpc models are not deferred like the WappstoBaseModels, but build
+#       on import, since every package send & received is validated with them.
 class Success(BaseModel):
     """The Default reply on a received JSONRpc."""
 
@@ -141,23 +190,75 @@ class JsonMeta(BaseModel):
     server_send_time: datetime.datetime
 
 
+_reply_model_tags: Dict[type, str] = {
+    Network: 'network',
+    Device: 'device',
+    NumberValue: 'value',
+    StringValue: 'value',
+    BlobValue: 'value',
+    XmlValue: 'value',
+    State: 'state',
+    IdList: 'idlist',
+    DeleteList: 'deletelist',
+}
+_reply_type_tags = set(_reply_model_tags.values())
+
+
+def reply_type_tag(v: Any) -> str:
+    """
+    Return the object type of the reply value, from its meta type.
+
+    It is used as the discriminator, so only the right model is tried.
+    A value without a known meta type, is tried against all the models.
+    """
+    if isinstance(v, bool):
+        return 'bool'
+    if isinstance(v, dict):
+        meta = v.get('meta')
+        obj_type = meta.get('type') if isinstance(meta, dict) else None
+        return str(obj_type) if obj_type in _reply_type_tags else 'unknown'
+    return _reply_model_tags.get(type(v), 'unknown')
+
+
 class JsonReply(BaseModel):
     """The JSONRpc param structure for receiving data."""
 
-    value: Optional[Union[
-        Device,
-        Network,
-        State,
-        ValueUnion,
-        IdList,
-        DeleteList,
-        bool
+    value: Optional[Annotated[
+        Union[
+            Annotated[Network, Tag('network')],
+            Annotated[Device, Tag('device')],
+            Annotated[ValueUnion, Tag('value')],
+            Annotated[State, Tag('state')],
+            Annotated[IdList, Tag('idlist')],
+            Annotated[DeleteList, Tag('deletelist')],
+            Annotated[bool, Tag('bool')],
+            Annotated[Union[
+                Device,
+                Network,
+                State,
+                ValueUnion,
+                IdList,
+                DeleteList,
+                bool
+            ], Tag('unknown')],
+        ],
+        Discriminator(reply_type_tag),
     ]]
     meta: JsonMeta
 
     model_config: ConfigDict = ConfigDict(extra='forbid')  # type: ignore
 
 
+class ReplyResult(RootModel[Union[JsonReply, Success]]):
+    """
+    The JSONRpc result structure for receiving data.
+
+    slxjsonrpc build a new TypeAdapter from the result type, for each reply.
+    For a model, that reuse the validator the model already have, where for
+    a Union, the whole reply schema would be build again every time.
+    """
+
+
 class JsonData(BaseModel):
     """The JSONRpc param structure for sending."""
 
@@ -206,12 +307,8 @@ class JsonData(BaseModel):
         url_obj = url_parser(info.data['url'])
         obj_type = url_obj[-1][0]
 
-        model = ObjectType2BaseModel[obj_type]
-        if model is None:
+        model_converter = object_type_adapter(obj_type)
+        if model_converter is None:
             raise ValueError('Unhandled Object type.')
 
-        if isinstance(model, BaseModel):
-            return model.model_validate(v)
-
-        model_converter: TypeAdapter = TypeAdapter(model)  # type: ignore
         return model_converter.validate_python(v)
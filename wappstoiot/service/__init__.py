@@ -1 +1,18 @@
 """."""
+import importlib
+
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Forward to the `template` module, on first use (PEP 562).
+
+    `wappstoiot.service` is both this package, & the exported `template`
+    module, like: `wappstoiot.service.StatusID`.
+    """
+    template = importlib.import_module('.template', __name__)
+    try:
+        return getattr(template, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
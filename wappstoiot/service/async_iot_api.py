@@ -0,0 +1,591 @@
+"""Contain the asyncio version of the IoT Api."""
+import asyncio
+import logging
+import threading
+
+from uuid import UUID
+from pathlib import Path
+
+from types import TracebackType
+
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Type
+from typing import Union
+
+from slxjsonrpc.schema.jsonrpc import ErrorModel
+
+from .template import StatusID
+from .iot_api import IoTAPI
+from .iot_api import RpcSchemas
+from . import rpc_handlers
+
+from ..schema.base_schema import Device
+from ..schema.base_schema import IdList
+from ..schema.base_schema import LogValue
+from ..schema.base_schema import Network
+from ..schema.base_schema import State
+from ..schema.base_schema import ValueUnion
+from ..schema.base_schema import WappstoObject
+
+from ..schema.iot_schema import JsonData
+from ..schema.iot_schema import Identifier
+from ..schema.iot_schema import JsonReply
+from ..schema.iot_schema import ReplyResult
+from ..schema.iot_schema import Success
+from ..schema.iot_schema import WappstoMethod
+from ..schema.iot_schema import url_target
+
+from ..utils import codec
+from ..utils.certificateread import CertificateBundle
+from ..utils import observer
+
+from ..connections.async_sslsocket import AsyncTlsSocket
+from ..connections.protocol import AsyncConnection
+from ..connections.protocol import MaxRetry
+
+
+EventCallback = Union[
+    Callable[[Any, WappstoMethod], None],
+    Callable[[Any, WappstoMethod], Awaitable[None]],
+]
+
+Reply = Tuple[Optional[Union[JsonReply, Success]], Optional[ErrorModel]]
+
+
+class AsyncIoTAPI:
+    """
+    The asyncio version of the IoTAPI.
+
+    All the requests are coroutines, that wait for the reply without
+    blocking the event loop, so one loop can serve many values & networks.
+    The subscribed callbacks can be either coroutine functions, that are
+    run as tasks, or normal functions, that are run on the event loop,
+    and so should not block.
+
+    Have to be created from within the running event loop, and connected
+    with `connect`, or used as an async context manager.
+    """
+
+    def __init__(
+        self,
+        ca: Path,
+        crt: Path,
+        key: Path,
+        fast_send: bool,
+        timeout: int,
+        max_reconnect_retry_count: Optional[int] = None,
+        receive_size: int = 2048,
+    ):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+        self.ca = ca
+        self.crt = crt
+        self.key = key
+
+        self.timeout = timeout
+
+        self.fast_send = fast_send
+
+        self.addr, self.port = IoTAPI._url_gen(
+            CertificateBundle.load(ca=self.ca, crt=self.crt, key=self.key)
+        )
+
+        self.connection: AsyncConnection
+
+        self.connection = AsyncTlsSocket(
+            address=self.addr,
+            port=self.port,
+            ca=self.ca,
+            crt=self.crt,
+            key=self.key,
+            max_reconnect_retry_count=max_reconnect_retry_count,
+            receive_size=receive_size,
+        )
+
+        self.subscribers: Dict[UUID, List[EventCallback]] = {}
+
+        method_cb = {
+            WappstoMethod.GET: self._get,
+            WappstoMethod.POST: self._post,
+            WappstoMethod.PUT: self._put,
+            WappstoMethod.DELETE: self._delete,
+        }
+
+        self.jsonrpc = rpc_handlers.create_jsonrpc(method_cb=method_cb)
+
+        self.killed = threading.Event()
+        self.receive_task: Optional["asyncio.Future[None]"] = None
+        self.tasks: Set["asyncio.Future[None]"] = set()
+
+    async def connect(self) -> None:
+        """Connect to the server, & start handling the received data."""
+        await self.connection.connect()
+        self.receive_task = asyncio.ensure_future(self._receive_handler())
+
+    async def close(self) -> None:
+        """Close the AsyncIoTApi down."""
+        self.killed.set()
+        self.log.debug("Closing Connection.")
+        await self.connection.close()
+        if self.receive_task:
+            self.receive_task.cancel()
+            await asyncio.gather(self.receive_task, return_exceptions=True)
+        self.log.debug("Waiting for Callbacks")
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.log.debug("AsyncIoTAPI Closed.")
+
+    async def __aenter__(self) -> "AsyncIoTAPI":
+        """Connect on entry."""
+        await self.connect()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close on exit."""
+        await self.close()
+
+    # #########################################################################
+    #                              Helper Methods
+    # #########################################################################
+
+    async def _receive_handler(self) -> None:
+        self.log.debug("Receive Handler Started!")
+        while not self.killed.is_set():
+            data = None
+            try:
+                data = await self.connection.receive(parser=codec.loads)
+
+                if not data:
+                    continue
+
+                if isinstance(data, str):
+                    self.log.warning(f'Received non JSONRPC data: {data}')
+                    continue
+
+                reply = self.jsonrpc.parser(data)
+                self.log.debug(f"Reply: {reply}")
+
+                if not reply:
+                    continue
+
+                await self._send_logic(reply)
+                observer.post(StatusID.SEND, reply)
+
+            except MaxRetry as err:
+                self.log.warning(err)
+                self.killed.set()
+                await self.connection.close()
+                return
+            except Exception:
+                self.log.error(f"data: {data}")
+                self.log.exception("Receive Handler Error:")
+        self.log.debug("Receive Handler Stopped!")
+
+    async def _send_logic(self, data: RpcSchemas) -> None:
+        if self.killed.is_set():
+            raise ConnectionError('Connection have been closed!')
+
+        async with self.connection.send_ready:
+            observer.post(StatusID.SENDING, data)
+            await self.connection.send(codec.dumps_model(data))
+
+    # -------------------------------------------------------------------------
+    #                               API Helpers
+    # -------------------------------------------------------------------------
+
+    def __create_request(
+        self,
+        data: Optional[Union[WappstoObject, LogValue, str]],
+        url: str,
+        method: WappstoMethod,
+    ) -> Tuple[Optional[RpcSchemas], "asyncio.Future[Reply]"]:
+        j_data = JsonData(
+            data=data,
+            url=url,
+            meta=Identifier(fast=True, identifier=None)
+            if self.fast_send and method != WappstoMethod.GET else None
+        )
+
+        self.log.debug(f"Sending for: {url}")
+
+        reply: "asyncio.Future[Reply]" = asyncio.get_event_loop().create_future()
+
+        def _data_callback(data: ReplyResult) -> None:
+            if not reply.done():
+                reply.set_result((data.root, None))
+
+        def _err_callback(err_data: ErrorModel) -> None:
+            if not reply.done():
+                reply.set_result((None, err_data))
+
+        rpc_data = self.jsonrpc.create_request(
+            method=method,
+            callback=_data_callback,
+            error_callback=_err_callback,
+            params=j_data
+        )
+        return rpc_data, reply
+
+    def __forget(self, rpc_ids: List[Any]) -> None:
+        """Remove the reply handlers of the requests, that will not be replied to."""
+        for rpc_id in rpc_ids:
+            rpc_handlers.remove_handlers(self.jsonrpc, rpc_id)
+
+    async def __wait_for(
+        self,
+        rpc_data: Optional[RpcSchemas],
+        reply: "Awaitable[Any]",
+        rpc_id: Any,
+    ) -> Any:
+        if rpc_data is None:
+            raise ValueError('The request was not created.')
+
+        await self._send_logic(rpc_data)
+
+        self.log.debug(f"--CALLBACK Ready! {rpc_id}")
+        try:
+            return await asyncio.wait_for(reply, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.log.debug(f"--CALLBACK None! {rpc_id}")
+            # NOTE: A late reply is dropped, so the handlers are not left behind.
+            self.__forget(rpc_id if isinstance(rpc_id, list) else [rpc_id])
+            observer.post(StatusID.SENDERROR, rpc_data)
+            raise TimeoutError(f'JsonRPC reply timeout on package: {rpc_id}')
+
+    async def _no_reply_send(
+        self,
+        data: Optional[Union[WappstoObject, LogValue]],
+        url: str,
+        method: WappstoMethod,
+    ) -> bool:
+        rpc_data, reply = self.__create_request(data=data, url=url, method=method)
+        rpc_id = getattr(rpc_data, 'id', None)
+
+        _, _err_data = await self.__wait_for(rpc_data, reply, rpc_id)
+
+        if _err_data:
+            self.log.debug(f"--CALLBACK Error! {_err_data}")
+            observer.post(StatusID.ERROR, _err_data)
+            return False
+        self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
+        observer.post(StatusID.SEND, rpc_data)
+        return True
+
+    async def _no_reply_bulk_send(
+        self,
+        data: List[LogValue],
+        url: str,
+        method: WappstoMethod,
+    ) -> bool:
+        replies: List["asyncio.Future[Reply]"] = []
+        with rpc_handlers.batch(self.jsonrpc):
+            for values in data:
+                _, reply = self.__create_request(data=values, url=url, method=method)
+                replies.append(reply)
+        rpc_data = self.jsonrpc.get_batch_data()
+        rpc_id = [getattr(rpc_d, 'id', None) for rpc_d in getattr(rpc_data, 'root', [])]
+
+        results: List[Reply] = await self.__wait_for(
+            rpc_data, asyncio.gather(*replies), rpc_id
+        )
+
+        for _, _err_data in results:
+            if _err_data:
+                self.log.debug(f"--CALLBACK Error! {_err_data}")
+                observer.post(StatusID.ERROR, _err_data)
+                return False
+        self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
+        observer.post(StatusID.SEND, rpc_data)
+        return True
+
+    async def _reply_send(
+        self,
+        data: Optional[WappstoObject],
+        url: str,
+        method: WappstoMethod,
+    ) -> Any:
+        rpc_data, reply = self.__create_request(data=data, url=url, method=method)
+        rpc_id = getattr(rpc_data, 'id', None)
+
+        _data, _err_data = await self.__wait_for(rpc_data, reply, rpc_id)
+
+        if isinstance(_data, JsonReply):
+            self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
+            observer.post(StatusID.SEND, rpc_data)
+            return _data.value
+        self.log.warning(f"--CALLBACK Error! {_err_data}")
+        observer.post(StatusID.ERROR, _err_data)
+        return None
+
+    # -------------------------------------------------------------------------
+    #                              Callback Helpers
+    # -------------------------------------------------------------------------
+
+    def _cb_handler(self, data: JsonData, method: WappstoMethod) -> None:
+        object_uuid = url_target(data.url)
+        self.log.debug(f"Object UUID: {object_uuid}")
+        loop = asyncio.get_event_loop()
+        callbacks = self.subscribers.get(object_uuid) if object_uuid is not None else None
+        for cb in callbacks if callbacks is not None else [self._default_cb]:
+            if asyncio.iscoroutinefunction(cb):
+                task = asyncio.ensure_future(cb(data.data, method))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            else:
+                loop.call_soon(cb, data.data, method)
+            self.log.debug(f"Scheduled: {cb}")
+
+    def _default_cb(self, data: WappstoObject, method: WappstoMethod) -> None:
+        self.log.warning(
+            f"No callback found for method: {method}; data {data}"
+        )
+
+    # #########################################################################
+    #                              Callback Methods
+    # #########################################################################
+
+    def _get(self, data: JsonData) -> Union[Success, JsonData]:
+        self.log.debug("_get: Called!")
+        self._cb_handler(data=data, method=WappstoMethod.GET)
+        return Success()
+
+    def _post(self, data: JsonData) -> Union[Success, JsonData]:
+        self.log.debug("_post: Called!")
+        self._cb_handler(data=data, method=WappstoMethod.POST)
+        return Success()
+
+    def _put(self, data: JsonData) -> Union[Success, JsonData]:
+        self.log.debug("_put: Called!")
+        self._cb_handler(data=data, method=WappstoMethod.PUT)
+        return Success()
+
+    def _delete(self, data: JsonData) -> Union[Success, JsonData]:
+        self.log.debug("_delete: Called!")
+        self._cb_handler(data=data, method=WappstoMethod.DELETE)
+        return Success()
+
+    # #########################################################################
+    #                               Helper API
+    # #########################################################################
+
+    async def ping(self) -> bool:
+        """Send a ping to check the connection."""
+        return await self._no_reply_send(
+            data=None,
+            url="/network",
+            method=WappstoMethod.HEAD
+        )
+
+    def subscribe_event(self, uuid: UUID, callback: EventCallback) -> None:
+        """Subscribe a function to be call on changes to the given object."""
+        self.subscribers.setdefault(uuid, []).append(callback)
+
+    def unsubscribe_event(self, uuid: UUID, callback: EventCallback) -> None:
+        """Unsubscribe a function from changes to the given object."""
+        self.subscribers.get(uuid, []).remove(callback)
+
+    # #########################################################################
+    #                               Network API
+    # #########################################################################
+
+    async def post_network(self, data: Network) -> bool:
+        """Create the network."""
+        return await self._no_reply_send(
+            data=data,
+            url="/network/",
+            method=WappstoMethod.POST
+        )
+
+    async def put_network(self, uuid: UUID, data: Network) -> bool:
+        """Make changes to a network."""
+        return await self._no_reply_send(
+            data=data,
+            url=f"/network/{uuid}",
+            method=WappstoMethod.PUT
+        )
+
+    async def get_network(self, uuid: UUID) -> Optional[Network]:
+        """Request the network data."""
+        result: Optional[Network] = await self._reply_send(
+            data=None,
+            url=f"/network/{uuid}",
+            method=WappstoMethod.GET
+        )
+        return result
+
+    async def delete_network(self, uuid: UUID) -> bool:
+        """Remove the network."""
+        return await self._no_reply_send(
+            data=None,
+            url=f"/network/{uuid}",
+            method=WappstoMethod.DELETE
+        )
+
+    # #########################################################################
+    #                                Device API
+    # #########################################################################
+
+    async def post_device(self, network_uuid: UUID, data: Device) -> bool:
+        """Create given device."""
+        return await self._no_reply_send(
+            data=data,
+            url=f"/network/{network_uuid}/device/",
+            method=WappstoMethod.POST
+        )
+
+    async def put_device(self, uuid: UUID, data: Device) -> bool:
+        """Make changes to a device."""
+        return await self._no_reply_send(
+            data=data,
+            url=f"/device/{uuid}",
+            method=WappstoMethod.PUT
+        )
+
+    async def get_device_where(self, network_uuid: UUID, **kwargs: str) -> Optional[UUID]:
+        """Request data from a device with given values."""
+        key, value = list(kwargs.items())[0]
+        url = f"/network/{network_uuid}/device?this_{key}=={value}"
+        data: Optional[IdList] = await self._reply_send(
+            data=None,
+            url=url,
+            method=WappstoMethod.GET
+        )
+
+        temp: Optional[List[UUID]] = getattr(data, "id", None)
+        if not temp:
+            return None
+        return temp[0]
+
+    async def get_device(self, uuid: UUID) -> Optional[Device]:
+        """Request to get given device data."""
+        result: Optional[Device] = await self._reply_send(
+            data=None,
+            url=f"/device/{uuid}",
+            method=WappstoMethod.GET
+        )
+        return result
+
+    async def delete_device(self, uuid: UUID) -> bool:
+        """Remove to given device."""
+        return await self._no_reply_send(
+            data=None,
+            url=f"/device/{uuid}",
+            method=WappstoMethod.DELETE
+        )
+
+    # #########################################################################
+    #                                 Value API
+    # #########################################################################
+
+    async def post_value(self, device_uuid: UUID, data: ValueUnion) -> bool:
+        """Create given value."""
+        return await self._no_reply_send(
+            data=data,
+            url=f"/device/{device_uuid}/value/",
+            method=WappstoMethod.POST
+        )
+
+    async def put_value(self, uuid: UUID, data: ValueUnion) -> bool:
+        """Make changes to a value."""
+        return await self._no_reply_send(
+            data=data,
+            url=f"/value/{uuid}",
+            method=WappstoMethod.PUT
+        )
+
+    async def get_value_where(self, device_uuid: UUID, **kwargs: str) -> Optional[UUID]:
+        """Request data from a value with given values."""
+        key, value = list(kwargs.items())[0]
+        url = f"/device/{device_uuid}/value?this_{key}=={value}"
+        data: Optional[IdList] = await self._reply_send(
+            data=None,
+            url=url,
+            method=WappstoMethod.GET
+        )
+
+        temp: Optional[List[UUID]] = getattr(data, "id", None)
+        if not temp:
+            return None
+        return temp[0]
+
+    async def get_value(self, uuid: UUID) -> Optional[ValueUnion]:
+        """Request to get given value data."""
+        result: Optional[ValueUnion] = await self._reply_send(
+            data=None,
+            url=f"/value/{uuid}",
+            method=WappstoMethod.GET
+        )
+        return result
+
+    async def delete_value(self, uuid: UUID) -> bool:
+        """Remove to given value."""
+        return await self._no_reply_send(
+            data=None,
+            url=f"/value/{uuid}",
+            method=WappstoMethod.DELETE
+        )
+
+    # #########################################################################
+    #                                State API
+    # #########################################################################
+
+    async def post_state(self, value_uuid: UUID, data: Union[State, LogValue]) -> bool:
+        """Create given state."""
+        return await self._no_reply_send(
+            data=data,
+            url=f"/value/{value_uuid}/state/",
+            method=WappstoMethod.POST
+        )
+
+    async def put_bulk_state(self, uuid: UUID, data: List[LogValue]) -> bool:
+        """Make bulk changes the given state."""
+        try:
+            return await self._no_reply_bulk_send(
+                data=data,
+                url=f"/state/{uuid}",
+                method=WappstoMethod.PUT
+            )
+        except TimeoutError:
+            self.log.exception('Error in sending Values.')
+        return False
+
+    async def put_state(self, uuid: UUID, data: Union[State, LogValue]) -> bool:
+        """Make changes to a state."""
+        try:
+            return await self._no_reply_send(
+                data=data,
+                url=f"/state/{uuid}",
+                method=WappstoMethod.PUT
+            )
+        except TimeoutError:
+            self.log.exception('Error in sending Values.')
+        return False
+
+    async def get_state(self, uuid: UUID) -> Optional[State]:
+        """Request to get given state data."""
+        result: Optional[State] = await self._reply_send(
+            data=None,
+            url=f"/state/{uuid}",
+            method=WappstoMethod.GET
+        )
+        return result
+
+    async def delete_state(self, uuid: UUID) -> bool:
+        """Remove to given state."""
+        return await self._no_reply_send(
+            data=None,
+            url=f"/state/{uuid}",
+            method=WappstoMethod.DELETE
+        )
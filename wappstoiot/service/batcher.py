@@ -0,0 +1,160 @@
+"""Contain the request batcher, that merge requests from all threads."""
+import logging
+import threading
+import time
+
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import slxjsonrpc
+
+from ..utils import codec
+
+_Pending = Tuple[slxjsonrpc.RpcRequest, Callable[[], None], Optional[str]]
+
+
+class RequestBatcher:
+    """
+    Collect JSON-RPC requests for a short window, & send them as one batch.
+
+    The window starts with the first request added, and the batch is send
+    when the window have passed, or when max_size requests have been added,
+    whatever comes first. That way a gateway that update many values in the
+    same tick, send one batch, instead of one request per value.
+
+    The callers still wait for their own reply, since each request in the
+    batch keep its own id & callbacks. If the batch could not be send, the
+    on_dropped callback is called for each request in it.
+
+    If all the requests in the batch have their serialized payload, the
+    payloads are joined & send as is, instead of serializing the batch.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Union[slxjsonrpc.RpcBatch, slxjsonrpc.RpcRequest], Optional[str]], bool],
+        window_sec: float = 0.02,
+        max_size: int = 100,
+    ):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+
+        self.send = send
+        self.window_sec = window_sec
+        self.max_size = max_size
+
+        self.pending: List[_Pending] = []
+        self.deadline: Optional[float] = None
+        self.ready = threading.Condition()
+        self.killed = False
+
+        self.thread = threading.Thread(
+            target=self._batch_loop,
+            name="WappstoIoT-Batcher",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def add(
+        self,
+        request: slxjsonrpc.RpcRequest,
+        on_dropped: Callable[[], None],
+        payload: Optional[str] = None,
+    ) -> bool:
+        """
+        Add the request to the current batch.
+
+        The payload is the already serialized request, if any.
+
+        Returns:
+            True, if it was added, else
+            False, if the batcher is closed.
+        """
+        with self.ready:
+            if self.killed:
+                return False
+            if not self.pending:
+                self.deadline = time.monotonic() + self.window_sec
+            self.pending.append((request, on_dropped, payload))
+            # NOTE: Wake the batcher to start the window, or when full.
+            if len(self.pending) == 1 or len(self.pending) >= self.max_size:
+                self.ready.notify_all()
+        return True
+
+    def _take(self) -> List[_Pending]:
+        """Wait for the batch to be ready, & take it. Must hold the lock."""
+        while not self.killed:
+            if not self.pending:
+                self.ready.wait()
+                continue
+            if len(self.pending) >= self.max_size:
+                break
+            delay = (self.deadline or 0) - time.monotonic()
+            if delay <= 0:
+                break
+            self.ready.wait(delay)
+
+        batch = self.pending[:self.max_size]
+        del self.pending[:self.max_size]
+        if self.pending:
+            self.deadline = time.monotonic() + self.window_sec
+        return batch
+
+    def _send_batch(
+        self,
+        batch: List[_Pending]
+    ) -> None:
+        """Send the requests as one batch, or call on_dropped if it failed."""
+        if not batch:
+            return
+
+        requests: List[Any] = [request for request, _, _ in batch]
+        payloads = [payload for _, _, payload in batch if payload is not None]
+        self.log.debug(f"Sending batch of: {len(requests)}")
+
+        try:
+            if len(requests) == 1:
+                send = self.send(requests[0], batch[0][2])
+            else:
+                send = self.send(
+                    slxjsonrpc.RpcBatch(root=requests),
+                    codec.join(payloads) if len(payloads) == len(requests) else None,
+                )
+        except Exception:
+            self.log.exception("Batch send Error:")
+            send = False
+
+        if send:
+            return
+
+        for _, on_dropped, _ in batch:
+            on_dropped()
+
+    def _batch_loop(self) -> None:
+        self.log.debug("Batcher Started!")
+        while True:
+            with self.ready:
+                batch = self._take()
+                done = self.killed and not self.pending
+            self._send_batch(batch)
+            if done:
+                break
+        self.log.debug("Batcher Stopped!")
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Send the remaining requests, & stop the batcher."""
+        with self.ready:
+            self.killed = True
+            self.ready.notify_all()
+        self.thread.join(timeout=timeout)
+        with self.ready:
+            batch = self.pending
+            self.pending = []
+        # NOTE: If the thread timed out, the callers should not wait in vain.
+        for _, on_dropped, _ in batch:
+            on_dropped()
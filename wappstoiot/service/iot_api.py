@@ -1,15 +1,14 @@
 """Contain the IoT Api that handle the data conversion."""
 import copy
-import json
+import functools
 import logging
-import pathlib
 import re
 import threading
 
 from uuid import UUID
 from pathlib import Path
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future
 
 from typing import Any
 from typing import Callable
@@ -21,14 +20,25 @@ from typing import Union
 
 import slxjsonrpc
 from slxjsonrpc.schema.jsonrpc import ErrorModel
-
+from slxjsonrpc.schema.jsonrpc import RpcVersion
+
+from . import rpc_handlers
+from .batcher import RequestBatcher
+from .ordered_executor import CoalescePolicy
+from .ordered_executor import OrderedExecutor
+from .pending import PendingRequests
+from .snapshot import ModelSnapshot
+from .state_encoder import StateEncoder
 from .template import StatusID
+from .tree_index import TreeIndex
+from .tree_index import object_uuid
 from .template import ServiceClass
 
 from ..schema.base_schema import Device
 from ..schema.base_schema import IdList
 from ..schema.base_schema import LogValue
 from ..schema.base_schema import Network
+from ..schema.base_schema import NetworkMeta
 from ..schema.base_schema import State
 from ..schema.base_schema import ValueUnion
 from ..schema.base_schema import WappstoObject
@@ -36,17 +46,25 @@ from ..schema.base_schema import WappstoObject
 from ..schema.iot_schema import JsonData
 from ..schema.iot_schema import Identifier
 from ..schema.iot_schema import JsonReply
+from ..schema.iot_schema import ReplyResult
 from ..schema.iot_schema import Success
 from ..schema.iot_schema import WappstoMethod
+from ..schema.iot_schema import url_target
 # from ..schema.iot_schema import WappstoObjectType
 
-from ..utils.certificateread import certificate_info_extraction
+from ..utils.certificateread import CertificateBundle
+from ..utils import codec
 from ..utils import observer
 from ..utils.Timestamp import timestamp_converter
 
 from ..connections.sslsocket import TlsSocket
 from ..connections.protocol import Connection
 from ..connections.protocol import MaxRetry
+from ..connections.profiles import TransportProfile
+from ..connections.profiles import TransportProfiles
+from ..connections.profiles import get_profile
+from ..connections.send_queue import QueuePolicy
+from ..connections.send_queue import SendQueue
 
 
 RpcSchemas = Union[
@@ -57,6 +75,13 @@ RpcSchemas = Union[
     slxjsonrpc.RpcResponse,
 ]
 
+
+def _is_request(data: RpcSchemas) -> bool:
+    """Check if the package only hold requests & notifications, & no replies."""
+    if isinstance(data, slxjsonrpc.RpcBatch):
+        return all(_is_request(x) for x in data.root)
+    return isinstance(data, (slxjsonrpc.RpcRequest, slxjsonrpc.RpcNotification))
+
 # POST   -> onCreate
 # GET    -> onRefresh
 # PUT    -> onChange
@@ -80,15 +105,56 @@ class IoTAPI(ServiceClass):
 
     def __init__(
         self,
-        ca: Path,
-        crt: Path,
-        key: Path,
+        ca: Optional[Path],
+        crt: Optional[Path],
+        key: Optional[Path],
         fast_send: bool,
         timeout: int,
         worker_count: int = 2,
         max_reconnect_retry_count: Optional[int] = None,
+        receive_size: Optional[int] = None,
+        zero_copy_receive: bool = False,
+        send_queue_size: int = 1000,
+        send_queue_policy: QueuePolicy = QueuePolicy.BLOCK,
+        coalesce_send: Optional[bool] = None,
+        transport_profile: Union[TransportProfiles, TransportProfile, str] = TransportProfiles.DEFAULT,
+        connection: Optional[Connection] = None,
+        max_in_flight: int = 16,
+        report_batch_window_sec: Optional[float] = None,
+        report_batch_size: int = 100,
+        tree_sync: bool = False,
+        snapshot_path: Optional[Path] = None,
     ):
-        """."""
+        """
+        Create the IoT API, & connect to the server.
+
+        The receive_size & coalesce_send, are taken from the transport profile,
+        if they are not set.
+
+        The max_in_flight, is how many async requests (Like `put_state_async`)
+        that can wait for a reply at the same time.
+
+        If report_batch_window_sec is set, the `put_state` calls from all
+        values within the window, (or until report_batch_size is reached)
+        are send as one JSON-RPC batch.
+
+        If tree_sync is set, the whole network tree is fetched with one
+        expand GET, when the network is loaded, & the devices, values &
+        states are then found in a local index, instead of by a round trip
+        each.
+
+        If snapshot_path is set, the network tree is saved there, & loaded
+        from it at the next start, so the network is ready without waiting
+        for the server. The tree is then checked against the server in the
+        background, & the objects that was changed meanwhile, are send to
+        the subscribers as a PUT. (Only the ones subscribed by then.)
+
+        The inbound callbacks are run on worker_count threads, in order for
+        each object, so a slow handler only hold back its own object.
+
+        If a connection is given, (Like the LoopbackConnection) it is used
+        instead of a TlsSocket, & the certificates are not needed.
+        """
         self.log = logging.getLogger(__name__)
         self.log.addHandler(logging.NullHandler())
         self.ca = ca
@@ -98,33 +164,46 @@ class IoTAPI(ServiceClass):
         self.timeout = timeout
 
         self.fast_send = fast_send
+        self.state_encoder = StateEncoder(fast=fast_send)
 
-        self.addr, self.port = self._url_gen(self.crt)
+        self.tree_sync = tree_sync
+        self.tree: Optional[TreeIndex] = None
+        self.tree_validator: Optional[threading.Thread] = None
 
-        self.connection: Connection
+        self.snapshot: Optional[ModelSnapshot] = None
+        if snapshot_path is not None:
+            self.snapshot = ModelSnapshot(path=snapshot_path)
 
-        self.connection = TlsSocket(
-            address=self.addr,
-            port=self.port,
-            ca=self.ca,
-            crt=self.crt,
-            key=self.key,
-            max_reconnect_retry_count=max_reconnect_retry_count,
-        )
+        self.max_in_flight = max_in_flight
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
 
-        params = {
-            x: JsonData for x in WappstoMethod
-        }
-        params[WappstoMethod.HEAD] = JsonData
-
-        result = {
-            WappstoMethod.GET: Union[JsonReply, Success],
-            WappstoMethod.POST: Union[JsonReply, Success],
-            WappstoMethod.PUT: Union[JsonReply, Success],
-            WappstoMethod.DELETE: Union[JsonReply, Success],
-            # WappstoMethod.PATCH: Union[JsonReply, Success],
-            WappstoMethod.HEAD: Union[JsonReply, Success],
-        }
+        self.profile = get_profile(transport_profile)
+        if receive_size is None:
+            receive_size = self.profile.receive_size
+        if coalesce_send is None:
+            coalesce_send = self.profile.coalesce_send
+
+        self.connection: Connection
+
+        if connection is not None:
+            self.connection = connection
+        elif self.ca is None or self.crt is None or self.key is None:
+            raise ValueError("The ca, crt & key are needed, when no connection is given.")
+        else:
+            self.addr, self.port = self._url_gen(
+                CertificateBundle.load(ca=self.ca, crt=self.crt, key=self.key)
+            )
+            self.connection = TlsSocket(
+                address=self.addr,
+                port=self.port,
+                ca=self.ca,
+                crt=self.crt,
+                key=self.key,
+                max_reconnect_retry_count=max_reconnect_retry_count,
+                receive_size=receive_size,
+                zero_copy=zero_copy_receive,
+                profile=self.profile,
+            )
 
         self.subscribers: Dict[
             UUID,
@@ -135,6 +214,15 @@ class IoTAPI(ServiceClass):
                 Callable[[State, WappstoMethod], None],
             ]]
         ] = {}
+        self.coalesce_policies: Dict[Callable[..., None], Tuple[CoalescePolicy, float]] = {}
+
+        # NOTE: The methods, where a request for an object nobody subscribe to, are dropped.
+        self.fast_drop_methods = {
+            WappstoMethod.GET.value,
+            WappstoMethod.POST.value,
+            WappstoMethod.PUT.value,
+            WappstoMethod.DELETE.value,
+        }
 
         method_cb = {
             WappstoMethod.GET: self._get,
@@ -147,27 +235,54 @@ class IoTAPI(ServiceClass):
 
         self.connection.connect()
 
-        self.jsonrpc = slxjsonrpc.SlxJsonRpc(
-            methods=WappstoMethod,
-            method_cb=method_cb,
-            result=result,
-            params=params,
+        self.send_queue = SendQueue(
+            connection=self.connection,
+            max_size=send_queue_size,
+            policy=send_queue_policy,
+            coalesce=coalesce_send,
+            on_spill=lambda data: observer.post(StatusID.SENDERROR, data),
         )
-        self.jsonrpc._verbose = True
+
+        self.jsonrpc = rpc_handlers.create_jsonrpc(method_cb=method_cb)
+
+        self.pending = PendingRequests(jsonrpc=self.jsonrpc)
+
+        self.batcher: Optional[RequestBatcher] = None
+        if report_batch_window_sec is not None:
+            self.batcher = RequestBatcher(
+                send=self._send_logic,
+                window_sec=report_batch_window_sec,
+                max_size=report_batch_size,
+            )
 
         self.killed = threading.Event()
-        self.workers = ThreadPoolExecutor(max_workers=worker_count)
+        self.workers = OrderedExecutor(max_workers=worker_count)
 
-        self.workers.submit(self._receive_handler)
+        self.receiver = threading.Thread(
+            target=self._receive_handler,
+            name="WappstoIoT-Receiver",
+            daemon=True,
+        )
+        self.receiver.start()
 
     def close(self) -> None:
         """Close the IoTApi down."""
+        if self.batcher is not None:
+            self.log.debug("Closing Batcher.")
+            self.batcher.close(timeout=self.timeout)
         self.killed.set()
+        if self.snapshot is not None:
+            self.log.debug("Saving Snapshot.")
+            self.snapshot.flush()
+        self.log.debug("Closing Send Queue.")
+        self.send_queue.close(timeout=self.timeout)
         self.log.debug("Closing Connection.")
         self.connection.close()
+        self.log.debug("Failing Pending Requests.")
+        self.pending.close()
+        if threading.current_thread() is not self.receiver:
+            self.receiver.join(timeout=self.timeout)
         self.log.debug("Closing Workers")
-        # while self.workers._work_queue.qsize() > 1:
-        #     time.sleep(0.02)
         self.workers.shutdown()
         self.log.debug("IoTAPI Closed.")
 
@@ -175,11 +290,11 @@ class IoTAPI(ServiceClass):
     #                              Helper Methods
     # #########################################################################
 
-    def _url_gen(self, crt: pathlib.Path) -> Tuple[str, int]:
-        cer = certificate_info_extraction(crt_path=crt)
-        endpoint = cer.get('issuer', {}).get('commonName')
-        port = self.wappstoPort.get(endpoint.split('.')[0], 443)
-        if endpoint.split('.')[0] in self.wappstoPort.keys():
+    @classmethod
+    def _url_gen(cls, certificate: CertificateBundle) -> Tuple[str, int]:
+        endpoint = certificate.endpoint
+        port = cls.wappstoPort.get(endpoint.split('.')[0], 443)
+        if endpoint.split('.')[0] in cls.wappstoPort.keys():
             addr = endpoint
         else:
             addr = f"collector.{endpoint}"
@@ -194,7 +309,7 @@ class IoTAPI(ServiceClass):
         self.log.debug("Receive Handler Started!")
         while not self.killed.is_set():
             try:
-                data = self.connection.receive(parser=json.loads)
+                data = self.connection.receive(parser=codec.loads)
 
                 if not data:
                     continue
@@ -209,9 +324,20 @@ class IoTAPI(ServiceClass):
                     _ids = [elemt.get('id', elemt) for elemt in data]
                     self.log.debug(f"Package received: {elemt.get('id', elemt)}")
 
-                reply = self.jsonrpc.parser(data)
+                replies: List[Any] = []
+                data = [
+                    elemt for elemt in data
+                    if not self._drop_unsubscribed(elemt, replies)
+                ]
+
+                reply = self.jsonrpc.parser(data) if data else None
                 self.log.debug(f"Package ID: {_ids}; Reply: {reply}")
 
+                if replies:
+                    if isinstance(reply, slxjsonrpc.RpcBatch):
+                        replies.extend(reply.root)
+                    reply = slxjsonrpc.RpcBatch(root=replies)
+
                 if not reply:
                     continue
 
@@ -228,7 +354,47 @@ class IoTAPI(ServiceClass):
                 self.log.exception("Receive Handler Error:")
         self.log.debug("Receive Handler Stopped!")
 
-    def _send_logic(self, data: RpcSchemas) -> None:
+    def _drop_unsubscribed(self, data: Any, replies: List[Any]) -> bool:
+        """
+        Check if the request is for an object, nobody subscribe to.
+
+        If so, the success reply is added to replies, without the data
+        being validated, since nobody would use it.
+
+        Returns:
+            True, if it was dropped, else
+            False, if it should be parsed.
+        """
+        if not isinstance(data, dict) or data.get('method') not in self.fast_drop_methods:
+            return False
+        try:
+            object_uuid = url_target(data['params']['url'])
+        except (KeyError, TypeError, ValueError):
+            return False  # NOTE: Let the parser reply with the error.
+        if object_uuid is None or self.subscribers.get(object_uuid):
+            return False
+
+        self.log.warning(
+            f"No callback found for method: {data['method']}; url {data['params']['url']}"
+        )
+        if 'id' in data:
+            replies.append(slxjsonrpc.RpcResponse.model_validate({
+                'jsonrpc': RpcVersion.v2_0,
+                'id': data['id'],
+                'result': Success(),
+            }))
+        return True
+
+    def _send_logic(self, data: RpcSchemas, payload: Optional[str] = None) -> bool:
+        """
+        Serialize & add the data to the send queue.
+
+        If the payload is given, it is send as the already serialized data.
+
+        Returns:
+            True, if it was queued, else
+            False, if it was spilled or nothing was to be send.
+        """
         # NOTE (MBK): Something do not work here!
         # if not data:
         #     return
@@ -237,10 +403,11 @@ class IoTAPI(ServiceClass):
             raise ConnectionError('Connection have been closed!')
 
         with self.connection.send_ready:  # NOTE: Waiting here, until ready!
-            with self.jsonrpc.batch():
+            with rpc_handlers.batch(self.jsonrpc):
                 batch_size = self.jsonrpc.batch_size()
                 if batch_size:
                     send_data = self.jsonrpc.get_batch_data(data)
+                    payload = None
                     self.log.debug(f"Batching: {batch_size}")
                 else:
                     send_data = copy.copy(data)
@@ -255,24 +422,48 @@ class IoTAPI(ServiceClass):
                 if _id:
                     self.log.debug(f"Package ID: {_id};")
 
-                if send_data:
-                    observer.post(StatusID.SENDING, send_data)
-                    self.connection.send(send_data.model_dump_json(exclude_none=True))
+                if not send_data:
+                    return False
+
+                observer.post(StatusID.SENDING, send_data)
+                return self.send_queue.put(
+                    payload if payload is not None else codec.dumps_model(send_data),
+                    send_data,
+                    request=_is_request(send_data),
+                )
+
+    def _queue_request(
+        self,
+        rpc_data: RpcSchemas,
+        batchable: bool,
+        on_dropped: Callable[[], None],
+        payload: Optional[str] = None,
+    ) -> bool:
+        """
+        Add the request to the batcher if batchable & enabled, else the send queue.
+
+        Returns:
+            True, if it was queued, else
+            False, if it was spilled or nothing was to be send.
+        """
+        if batchable and self.batcher is not None and isinstance(rpc_data, slxjsonrpc.RpcRequest):
+            if self.killed.is_set():
+                raise ConnectionError('Connection have been closed!')
+            return self.batcher.add(rpc_data, on_dropped, payload)
+        return self._send_logic(rpc_data, payload)
 
     def _resend_data(self, data: Union[str, bytes]) -> None:
-        j_data = json.loads(data)
-        _cb_event = threading.Event()
+        j_data = codec.loads(data)
 
         if not isinstance(j_data, list):
             j_data = [j_data]
 
+        s_data: Optional[RpcSchemas]
         for l_data in j_data:
             rpc_id = l_data.get('id')
 
             if l_data.get('params'):
-                s_data = self.jsonrpc.create_request(
-                    callback=lambda data: _cb_event.set(),
-                    error_callback=lambda err_data: _cb_event.set(),
+                s_data, future = self._create_request(
                     method=l_data.get('method'),
                     params=JsonData(
                         data=l_data.get('params').get('data'),
@@ -280,216 +471,372 @@ class IoTAPI(ServiceClass):
                         meta=Identifier(fast=True, identifier=None)
                     ),
                 )
-                self._send_logic(s_data)
+                if s_data is None or future is None:
+                    continue
+                if not self._send_logic(s_data):
+                    self.pending.fail(s_data.id, ConnectionError('Request was not send.'))
+                    continue
             elif l_data.get('result'):
-                self.jsonrpc._id_cb[rpc_id] = lambda data: _cb_event.set()
-                self.jsonrpc._id_error_cb[rpc_id] = lambda err_data: _cb_event.set()
-                self.jsonrpc._id_method[rpc_id] = l_data.get('method')
-                # self.jsonrpc._add_result_handling(  # NOTE: slxJsonRpc v0.8.1.
-                #     method=l_data.get('method'),
-                #     _id=rpc_id,
-                #     callback=lambda data: _cb_event(),
-                #     error_callback=lambda err_data: _cb_event(),
-                # )
-                s_data = self.jsonrpc._parse_data(l_data)
-                self._send_logic(s_data)
+                rpc_handlers.add_handlers(
+                    self.jsonrpc,
+                    rpc_id=rpc_id,
+                    method=l_data.get('method'),
+                    callback=functools.partial(self._resolve, rpc_id),
+                    error_callback=functools.partial(self._resolve, rpc_id),
+                )
+                future = self.pending.add(rpc_id, self.timeout)
+                s_data = rpc_handlers.parse(self.jsonrpc, l_data)
+                if not self._send_logic(s_data):
+                    self.pending.fail(rpc_id, ConnectionError('Request was not send.'))
+                    continue
+            else:
+                continue
 
             self.log.debug(f"--CALLBACK Ready! {rpc_id}")
-            if _cb_event.wait(timeout=self.timeout):
-                self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
-                observer.post(StatusID.SEND, s_data)
-            else:
+            try:
+                future.result()
+            except (TimeoutError, ConnectionError):
                 self.log.debug(f"--CALLBACK None! {rpc_id}")
                 observer.post(StatusID.SENDERROR, s_data)
+            else:
+                self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
+                observer.post(StatusID.SEND, s_data)
         return None
 
     # -------------------------------------------------------------------------
     #                               API Helpers
     # -------------------------------------------------------------------------
 
-    def __create_json_data(
+    def _json_data(
         self,
-        data: List[Any],
+        data: Any,
         url: str,
         method: WappstoMethod,
-    ) -> RpcSchemas:
-        _cb_event = threading.Event()
-        _err_data: Optional[ErrorModel] = None
-
-        def _err_callback(err_data: ErrorModel) -> None:
-            nonlocal _err_data
-            nonlocal _cb_event
-            _err_data = err_data
-            _cb_event.set()
-
-        with self.jsonrpc.batch():
-            for values in data:
-                j_data = JsonData(
-                    data=values,
-                    url=url,
-                    meta=Identifier(fast=True, identifier=None)
-                    if self.fast_send and method != WappstoMethod.GET
-                    else None
-                )
+    ) -> JsonData:
+        return JsonData(
+            data=data,
+            url=url,
+            meta=Identifier(fast=True, identifier=None)
+            if self.fast_send and method != WappstoMethod.GET else None
+        )
 
-                self.log.debug(f"Sending for: {url}")
+    def _resolve(self, rpc_id: Union[str, int, None], data: Any) -> None:
+        """Set the reply of the request, to the JsonReply, Success or ErrorModel."""
+        self.pending.resolve(rpc_id, data.root if isinstance(data, ReplyResult) else data)
 
-                self.jsonrpc.create_request(
-                    method=method,
-                    callback=lambda data: _cb_event.set(),
-                    error_callback=_err_callback,
-                    params=j_data
-                )
+    def _create_request(
+        self,
+        method: WappstoMethod,
+        params: JsonData,
+        on_timeout: Optional[Callable[[], None]] = None,
+    ) -> Tuple[Optional[slxjsonrpc.RpcRequest], Optional["Future[Any]"]]:
+        """
+        Create the request, & add it to the pending requests.
 
-        rpc_data = self.jsonrpc.get_batch_data()
+        Returns:
+            The request & the Future that is set to the reply, (An ErrorModel,
+            if it was an error reply) or (None, None) if it was not created.
+        """
+        rpc_id: Union[str, int, None] = None
 
-        return rpc_data, _cb_event, _err_data
+        def _callback(data: Any) -> None:
+            self._resolve(rpc_id, data)
 
-    def _no_reply_bulk_send(
+        rpc_data = self.jsonrpc.create_request(
+            method=method,
+            callback=_callback,
+            error_callback=_callback,
+            params=params
+        )
+        if rpc_data is None:
+            return None, None
+        rpc_id = rpc_data.id
+        return rpc_data, self.pending.add(rpc_id, self.timeout, on_timeout)
+
+    def _create_state_request(
         self,
-        data: Union[List[Union[WappstoObject, LogValue]], str],
         url: str,
-        method: WappstoMethod,
-    ) -> bool:
-        rpc_data, _cb_event, _err_data = self.__create_json_data(
-            data=data, url=url, method=method,
+        data: LogValue,
+        on_timeout: Optional[Callable[[], None]] = None,
+    ) -> Tuple[slxjsonrpc.RpcRequest, str, "Future[Any]"]:
+        """
+        Create the state PUT request, without validating it again.
+
+        The data is already validated, so the request is constructed as is,
+        & serialized by the StateEncoder.
+
+        Returns:
+            The request, its serialized payload & the Future that is set to the reply.
+        """
+        rpc_id = self.state_encoder.next_id()
+        callback = functools.partial(self._resolve, rpc_id)
+        rpc_handlers.add_handlers(
+            self.jsonrpc,
+            rpc_id=rpc_id,
+            method=WappstoMethod.PUT,
+            callback=callback,
+            error_callback=callback,
         )
-        rpc_id = "[" + ",".join(
-            [f'"{getattr(rpc_data, "id", None)}"' for rpc_d in rpc_data]
-        ) + "]"
-
-        self._send_logic(rpc_data)
-
-        self.log.debug(f"--CALLBACK Ready! {rpc_id}")
-        if _cb_event.wait(timeout=self.timeout):
-            if _err_data:
-                self.log.debug(f"--CALLBACK Error! {_err_data}")
-                observer.post(StatusID.ERROR, _err_data)
-                # raise ConnectionError(_err_data.message)
-                return False
-            self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
-            observer.post(StatusID.SEND, rpc_data)
-            return True
-        observer.post(StatusID.SENDERROR, rpc_data)
-        self.log.debug(f"--CALLBACK None! {rpc_id}")
-        raise TimeoutError(f'JsonRPC reply timeout on package: {rpc_id}')
+        rpc_data = slxjsonrpc.RpcRequest.model_construct(
+            jsonrpc=RpcVersion.v2_0,
+            method=WappstoMethod.PUT,
+            id=rpc_id,
+            params=JsonData.model_construct(
+                url=url,
+                data=data,
+                meta=Identifier.model_construct(fast=True, identifier=None) if self.fast_send else None,
+            ),
+        )
+        payload = self.state_encoder.encode(rpc_id, url, data.data, data.timestamp)
+        return rpc_data, payload, self.pending.add(rpc_id, self.timeout, on_timeout)
 
-    def _no_reply_send(
+    def _send_request(
         self,
-        data: Optional[Union[WappstoObject, LogValue]],
+        data: Any,
         url: str,
         method: WappstoMethod,
-    ) -> bool:
-        j_data = JsonData(
-            data=data,
-            url=url,
-            meta=Identifier(fast=True, identifier=None)
-            if self.fast_send and method != WappstoMethod.GET else None
-        )
-
+        batchable: bool = False,
+        on_timeout: Optional[Callable[[], None]] = None,
+    ) -> Tuple[Optional[slxjsonrpc.RpcRequest], Optional["Future[Any]"]]:
+        """
+        Create & queue the request.
+
+        Returns:
+            The request & the Future that is set to the reply, or
+            (request, None) if it was not queued.
+        """
         self.log.debug(f"Sending for: {url}")
 
-        _cb_event = threading.Event()
-        _err_data: Optional[ErrorModel] = None
+        rpc_data: Optional[slxjsonrpc.RpcRequest]
+        future: Optional["Future[Any]"]
+        payload: Optional[str] = None
+        if method == WappstoMethod.PUT and type(data) is LogValue:
+            # NOTE: The hot report path.
+            rpc_data, payload, future = self._create_state_request(url, data, on_timeout)
+        else:
+            rpc_data, future = self._create_request(
+                method=method,
+                params=self._json_data(data=data, url=url, method=method),
+                on_timeout=on_timeout,
+            )
+        if rpc_data is None or future is None:
+            return rpc_data, None
 
-        def _err_callback(err_data: ErrorModel) -> None:
-            nonlocal _err_data
-            nonlocal _cb_event
-            _err_data = err_data
-            _cb_event.set()
+        rpc_id = rpc_data.id
 
-        rpc_data = self.jsonrpc.create_request(
-            method=method,
-            callback=lambda data: _cb_event.set(),
-            error_callback=_err_callback,
-            params=j_data
-        )
+        def _on_dropped() -> None:
+            self.pending.fail(rpc_id, ConnectionError('Request was not send.'))
 
-        rpc_id = getattr(rpc_data, 'id', None)
+        try:
+            queued = self._queue_request(rpc_data, batchable, _on_dropped, payload)
+        except Exception:
+            _on_dropped()
+            raise
 
-        self._send_logic(rpc_data)
+        if not queued:
+            _on_dropped()
+            return rpc_data, None
+        return rpc_data, future
 
+    def _wait_for_reply(
+        self,
+        rpc_data: RpcSchemas,
+        rpc_id: Any,
+        future: "Future[Any]",
+    ) -> Any:
+        """
+        Wait for the reply of the request.
+
+        Returns:
+            The reply, or None if it was an error reply, or was not send.
+
+        Raises:
+            TimeoutError: If no reply was received within the timeout.
+        """
         self.log.debug(f"--CALLBACK Ready! {rpc_id}")
-        if _cb_event.wait(timeout=self.timeout):
-            if _err_data:
-                self.log.debug(f"--CALLBACK Error! {_err_data}")
-                observer.post(StatusID.ERROR, _err_data)
-                # raise ConnectionError(_err_data.message)
-                return False
-            self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
-            observer.post(StatusID.SEND, rpc_data)
-            return True
-        observer.post(StatusID.SENDERROR, rpc_data)
-        self.log.debug(f"--CALLBACK None! {rpc_id}")
-        raise TimeoutError(f'JsonRPC reply timeout on package: {rpc_id}')
+        try:
+            reply = future.result()
+        except ConnectionError:
+            return None
+        except TimeoutError:
+            self.log.debug(f"--CALLBACK None! {rpc_id}")
+            observer.post(StatusID.SENDERROR, rpc_data)
+            raise
+        if isinstance(reply, ErrorModel):
+            self.log.debug(f"--CALLBACK Error! {reply}")
+            observer.post(StatusID.ERROR, reply)
+            # raise ConnectionError(reply.message)
+            return None
+        self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
+        observer.post(StatusID.SEND, rpc_data)
+        return reply
 
-    def _reply_send(
+    def _no_reply_bulk_send(
         self,
-        data: Optional[WappstoObject],
+        data: Union[List[Union[WappstoObject, LogValue]], str],
         url: str,
         method: WappstoMethod,
-    ) -> Optional[WappstoObject]:
-        j_data = JsonData(
-            data=data,
-            url=url,
-            meta=Identifier(fast=True, identifier=None)
-            if self.fast_send and method != WappstoMethod.GET else None
-        )
-
+    ) -> bool:
         self.log.debug(f"Sending for: {url}")
 
-        _cb_event = threading.Event()
-        _err_data: ErrorModel = None
+        requests: List[Any] = []
+        payloads: List[str] = []
+        futures: List["Future[Any]"] = []
+        rpc_request: Optional[slxjsonrpc.RpcRequest]
+        future: Optional["Future[Any]"]
+        for values in data:
+            if method == WappstoMethod.PUT and type(values) is LogValue:
+                rpc_request, payload, future = self._create_state_request(url, values)
+                payloads.append(payload)
+            else:
+                rpc_request, future = self._create_request(
+                    method=method,
+                    params=self._json_data(data=values, url=url, method=method),
+                )
+            if rpc_request is None or future is None:
+                continue
+            requests.append(rpc_request)
+            futures.append(future)
 
-        def _err_callback(err_data: ErrorModel) -> None:
-            nonlocal _err_data
-            nonlocal _cb_event
-            _err_data = err_data
-            _cb_event.set()
+        if not requests:
+            return False
 
-        _data: Optional[JsonReply] = None
+        rpc_data: RpcSchemas = (
+            requests[0] if len(requests) == 1 else slxjsonrpc.RpcBatch(root=requests)
+        )
+        rpc_id = "[" + ",".join([f'"{x.id}"' for x in requests]) + "]"
 
-        def _data_callback(data: JsonReply) -> None:
-            nonlocal _data
-            nonlocal _cb_event
-            _data = data
-            _cb_event.set()
+        rpc_payload: Optional[str] = None
+        if len(payloads) == len(requests):
+            rpc_payload = payloads[0] if len(payloads) == 1 else codec.join(payloads)
 
-        rpc_data = self.jsonrpc.create_request(
-            method=method,
-            callback=_data_callback,
-            error_callback=_err_callback,
-            params=j_data
-        )
+        queued = False
+        try:
+            queued = self._send_logic(rpc_data, rpc_payload)
+        finally:
+            if not queued:
+                for x in requests:
+                    self.pending.fail(x.id, ConnectionError('Request was not send.'))
+        if not queued:
+            return False
+
+        replies = [
+            self._wait_for_reply(rpc_data, rpc_id, future)
+            for future in futures
+        ]
+        return all(reply is not None for reply in replies)
 
-        rpc_id = getattr(rpc_data, 'id', None)
+    def _no_reply_send(
+        self,
+        data: Optional[Union[WappstoObject, LogValue]],
+        url: str,
+        method: WappstoMethod,
+        batchable: bool = False,
+    ) -> bool:
+        rpc_data, future = self._send_request(
+            data=data, url=url, method=method, batchable=batchable,
+        )
+        if rpc_data is None or future is None:
+            return False
+        return self._wait_for_reply(rpc_data, rpc_data.id, future) is not None
 
-        self._send_logic(rpc_data)
+    def _async_send(
+        self,
+        data: Optional[Union[WappstoObject, LogValue]],
+        url: str,
+        method: WappstoMethod,
+        batchable: bool = False,
+    ) -> "Future[bool]":
+        """
+        Send the data, without waiting for the reply.
+
+        The caller is only blocked, while the in-flight window is full. The
+        Future's callbacks are called from the receive thread, so they should
+        not block.
+
+        Returns:
+            A Future, set to True on a success reply, False on an error reply
+            or if the data was spilled, or a TimeoutError if no reply was
+            received within the timeout, or no room was made in the in-flight
+            window within the timeout.
+        """
+        result: "Future[bool]" = Future()
+        result.set_running_or_notify_cancel()
+
+        if not self.in_flight.acquire(timeout=self.timeout):
+            # NOTE: Set on the Future, so the caller only have one place to handle it.
+            result.set_exception(TimeoutError('JsonRPC in-flight window is full.'))
+            return result
 
-        self.log.debug(f"--CALLBACK Ready! {rpc_id}")
-        if _cb_event.wait(timeout=self.timeout):
-            if _data:
-                self.log.debug(f"--CALLBACK EVENT! {rpc_id}")
+        try:
+            rpc_data, future = self._send_request(
+                data=data,
+                url=url,
+                method=method,
+                batchable=batchable,
+                on_timeout=lambda: observer.post(StatusID.SENDERROR, rpc_data),
+            )
+        except Exception:
+            self.in_flight.release()
+            raise
+
+        if rpc_data is None or future is None:
+            self.in_flight.release()
+            result.set_result(False)
+            return result
+
+        def _done(future: "Future[Any]") -> None:
+            self.in_flight.release()
+            error = future.exception()
+            if isinstance(error, ConnectionError):
+                result.set_result(False)
+            elif error is not None:
+                self.log.debug(f"--CALLBACK None! {rpc_data.id}")
+                result.set_exception(error)
+            elif isinstance(future.result(), ErrorModel):
+                self.log.debug(f"--CALLBACK Error! {future.result()}")
+                observer.post(StatusID.ERROR, future.result())
+                result.set_result(False)
+            else:
+                self.log.debug(f"--CALLBACK EVENT! {rpc_data.id}")
                 observer.post(StatusID.SEND, rpc_data)
-                return _data.value
-            if _err_data:
-                self.log.warning(f"--CALLBACK Error! {_err_data}")
-                observer.post(StatusID.ERROR, _err_data)
-                # raise ConnectionError(_err_data.message)
-                return None
-        self.log.debug(f"--CALLBACK None! {rpc_id}")
-        observer.post(StatusID.SENDERROR, rpc_data)
-        raise TimeoutError(f'JsonRPC reply timeout on package: {rpc_id}')
+                result.set_result(True)
+
+        self.log.debug(f"--CALLBACK Ready! {rpc_data.id}")
+        future.add_done_callback(_done)
+        return result
+
+    def _reply_send(
+        self,
+        data: Optional[WappstoObject],
+        url: str,
+        method: WappstoMethod,
+    ) -> Optional[WappstoObject]:
+        rpc_data, future = self._send_request(
+            data=data, url=url, method=method,
+        )
+        if rpc_data is None or future is None:
+            return None
+        reply: Optional[JsonReply] = self._wait_for_reply(rpc_data, rpc_data.id, future)
+        if not reply:
+            return None
+        return reply.value
 
     # -------------------------------------------------------------------------
     #                              Callback Helpers
     # -------------------------------------------------------------------------
 
     def _cb_handler(self, data: JsonData, method: WappstoMethod) -> None:
-        object_uuid = UUID(data.url.split("/")[-1])
+        object_uuid = url_target(data.url)
         self.log.debug(f"Object UUID: {object_uuid}")
-        for cb in self.subscribers.get(object_uuid, [self._default_cb]):
-            self.workers.submit(cb, data.data, method)
+        callbacks = self.subscribers.get(object_uuid) if object_uuid is not None else None
+        for cb in callbacks if callbacks is not None else [self._default_cb]:
+            coalesce, debounce_sec = self.coalesce_policies.get(cb, (CoalescePolicy.ALL, 0.0))
+            self.workers.submit(
+                object_uuid, cb, data.data, method,
+                coalesce=coalesce,
+                debounce_sec=debounce_sec,
+            )
             self.log.debug(f"Submitted to Worker: {cb}")
 
     def _default_cb(self, data: WappstoObject, method: WappstoMethod) -> None:
@@ -571,27 +918,103 @@ class IoTAPI(ServiceClass):
 
     def post_network(self, data: Network) -> bool:
         """Create the network."""
-        return self._no_reply_send(
+        sent = self._no_reply_send(
             data=data,
             url="/network/",
             method=WappstoMethod.POST
         )
+        if sent and self.tree is not None and object_uuid(data) == self.tree.network_uuid:
+            self.tree.upsert_network(data)
+            self._tree_changed()
+        return sent
 
     def put_network(self, uuid: UUID, data: Network) -> bool:
         """Make changes to a network."""
-        return self._no_reply_send(
+        sent = self._no_reply_send(
             data=data,
             url=f"/network/{uuid}",
             method=WappstoMethod.PUT
         )
+        if sent and self.tree is not None:
+            self.tree.update(uuid, data)
+            self._tree_changed()
+        return sent
 
     def get_network(self, uuid: UUID) -> Optional[Network]:
-        """Request the network data."""
-        return self._reply_send(
+        """
+        Request the network data.
+
+        With tree_sync, the whole tree is requested, & indexed. With a
+        snapshot, the tree is loaded from it, & checked in the background.
+        """
+        self.tree = None
+        if self.snapshot is not None:
+            network = self.snapshot.load(uuid)
+            if network is not None:
+                self.tree = TreeIndex(network, authoritative=False)
+                self.log.debug(f"Network tree loaded from snapshot: {len(self.tree)} objects.")
+                self.tree_validator = threading.Thread(
+                    target=self._validate_tree,
+                    args=(self.tree,),
+                    name="WappstoIoT-TreeSync",
+                    daemon=True,
+                )
+                self.tree_validator.start()
+                return self.tree.network
+
+        if self.tree_sync or self.snapshot is not None:
+            self.tree = self._get_tree(uuid)
+            if self.tree is not None:
+                self.log.debug(f"Network tree indexed: {len(self.tree)} objects.")
+                self._tree_changed()
+                return self.tree.network
+            self.log.info("Could not get the network tree; Getting each object instead.")
+
+        reply = self._reply_send(
             data=None,  # NOTE: Should be nonexistent or Null.
             url=f"/network/{uuid}",
             method=WappstoMethod.GET
         )
+        if self.snapshot is not None:
+            # NOTE: Only to collect the objects for the snapshot; It can not tell what is missing.
+            self.tree = TreeIndex(
+                reply if isinstance(reply, Network) else Network(meta=NetworkMeta(id=uuid)),
+                authoritative=False,
+            )
+        return reply
+
+    def _get_tree(self, uuid: UUID) -> Optional[TreeIndex]:
+        """Request the whole network tree, in one request."""
+        tree = self._reply_send(
+            data=None,
+            url=f"/network/{uuid}?expand=3",
+            method=WappstoMethod.GET
+        )
+        if not isinstance(tree, Network):
+            return None
+        return TreeIndex(tree)
+
+    def _validate_tree(self, tree: TreeIndex) -> None:
+        """Check the tree loaded from the snapshot, against the server."""
+        fresh = self._get_tree(tree.network_uuid)
+        if fresh is None:
+            self.log.warning("Could not validate the snapshot; Names not in it, are looked up on the server.")
+            return
+
+        changes = tree.merge(fresh)
+        self.log.debug(f"Snapshot validated: {len(changes)} objects changed.")
+        for obj in changes:
+            if self.killed.is_set():
+                return
+            obj_uuid = object_uuid(obj)
+            for cb in self.subscribers.get(obj_uuid, []):
+                self.workers.submit(obj_uuid, cb, obj, WappstoMethod.PUT)
+        self._tree_changed()
+
+    def _tree_changed(self) -> None:
+        """Schedule a save of the tree, if the snapshot is used."""
+        if self.snapshot is not None and self.tree is not None:
+            self.snapshot.schedule(self.tree.to_network)
 
     def delete_network(self, uuid: UUID) -> bool:
         """Remove the network."""
@@ -623,24 +1046,38 @@ class IoTAPI(ServiceClass):
 
     def post_device(self, network_uuid: UUID, data: Device) -> bool:
         """Create given device."""
-        return self._no_reply_send(
+        if self.tree is not None and network_uuid == self.tree.network_uuid:
+            self.tree.created_device(object_uuid(data))
+        sent = self._no_reply_send(
             data=data,
             url=f"/network/{network_uuid}/device/",
             method=WappstoMethod.POST
         )
+        if sent and self.tree is not None and network_uuid == self.tree.network_uuid:
+            self.tree.upsert_device(data)
+            self._tree_changed()
+        return sent
 
     def put_device(self, uuid: UUID, data: Device) -> bool:
         """Make changes to a device."""
-        return self._no_reply_send(
+        sent = self._no_reply_send(
             data=data,
             url=f"/device/{uuid}",
             method=WappstoMethod.PUT
         )
+        if sent and self.tree is not None:
+            self.tree.update(uuid, data)
+            self._tree_changed()
+        return sent
 
     def get_device_where(self, network_uuid: UUID, **kwargs: str) -> Optional[UUID]:
         """Request data from a device with given values."""
         # /network/{uuid}/device?this_name==X
         key, value = list(kwargs.items())[0]
+        if self.tree is not None and key == "name":
+            indexed, device_uuid = self.tree.device_where(network_uuid, value)
+            if indexed:
+                return device_uuid
         url = f"/network/{network_uuid}/device?this_{key}=={value}"
         data: IdList = self._reply_send(
             data=None,
@@ -655,6 +1092,10 @@ class IoTAPI(ServiceClass):
 
     def get_device(self, uuid: UUID) -> Union[Device, None]:
         """Request to get given device data."""
+        if self.tree is not None:
+            device = self.tree.pop_device(uuid)
+            if device is not None:
+                return device
         return self._reply_send(
             data=None,
             url=f"/device/{uuid}",
@@ -692,25 +1133,37 @@ class IoTAPI(ServiceClass):
     def post_value(self, device_uuid: UUID, data: ValueUnion) -> bool:
         """Create given value."""
         # url=f"/services/2.0/{uuid}/value",
-        return self._no_reply_send(
+        sent = self._no_reply_send(
             data=data,
             url=f"/device/{device_uuid}/value/",
             method=WappstoMethod.POST
         )
+        if sent and self.tree is not None and device_uuid in self.tree.devices:
+            self.tree.upsert_value(device_uuid, data)
+            self._tree_changed()
+        return sent
 
     def put_value(self, uuid: UUID, data: ValueUnion) -> bool:
         """Make changes to a value."""
         # url=f"/services/2.0/value/{uuid}",
-        return self._no_reply_send(
+        sent = self._no_reply_send(
             data=data,
             url=f"/value/{uuid}",
             method=WappstoMethod.PUT
         )
+        if sent and self.tree is not None:
+            self.tree.update(uuid, data)
+            self._tree_changed()
+        return sent
 
     def get_value_where(self, device_uuid: UUID, **kwargs: str) -> Optional[UUID]:
         """Request data from a value with given values."""
         # /network/{uuid}/device?this_name==X
         key, value = list(kwargs.items())[0]
+        if self.tree is not None and key == "name":
+            indexed, value_uuid = self.tree.value_where(device_uuid, value)
+            if indexed:
+                return value_uuid
         url = f"/device/{device_uuid}/value?this_{key}=={value}"
         data: IdList = self._reply_send(
             data=None,
@@ -726,6 +1179,10 @@ class IoTAPI(ServiceClass):
     def get_value(self, uuid: UUID) -> Union[ValueUnion, None]:
         """Request to get given value data."""
         # url=f"/services/2.0/value/{uuid}",
+        if self.tree is not None:
+            value = self.tree.pop_value(uuid)
+            if value is not None:
+                return value
         return self._reply_send(
             data=None,
             url=f"/value/{uuid}",
@@ -748,9 +1205,20 @@ class IoTAPI(ServiceClass):
     def subscribe_state_event(
         self,
         uuid: UUID,
-        callback: Callable[[State, WappstoMethod], None]
+        callback: Callable[[State, WappstoMethod], None],
+        coalesce: CoalescePolicy = CoalescePolicy.ALL,
+        debounce_sec: float = 0.1,
     ) -> None:
-        """Subscribe a function to be call on given state changes."""
+        """
+        Subscribe a function to be call on given state changes.
+
+        With the coalesce policy 'latest', a change replace the older one,
+        that are still waiting for the worker, & with 'debounce', only the
+        newest change is run, when no change have come for debounce_sec.
+        """
+        coalesce = CoalescePolicy(coalesce)
+        if coalesce != CoalescePolicy.ALL:
+            self.coalesce_policies[callback] = (coalesce, debounce_sec)
         self.subscribers.setdefault(uuid, []).append(callback)
 
     def unsubscribe_state_event(
@@ -760,15 +1228,20 @@ class IoTAPI(ServiceClass):
     ) -> None:
         """Unsubscribe a function from given state changes."""
         self.subscribers.get(uuid, []).remove(callback)
+        self.coalesce_policies.pop(callback, None)
 
     def post_state(self, value_uuid: UUID, data: Union[State, LogValue]) -> bool:
         """Create given state."""
         # url=f"/services/2.0/{uuid}/state",
-        return self._no_reply_send(
+        sent = self._no_reply_send(
             data=data,
             url=f"/value/{value_uuid}/state/",
             method=WappstoMethod.POST
         )
+        if sent and self.tree is not None and isinstance(data, State) and value_uuid in self.tree.values:
+            self.tree.upsert_state(value_uuid, data)
+            self._tree_changed()
+        return sent
 
     def put_bulk_state(self, uuid: UUID, data: List[LogValue]) -> bool:
         """Make bulk changes the given state."""
@@ -818,7 +1291,8 @@ class IoTAPI(ServiceClass):
             return self._no_reply_send(
                 data=data,
                 url=f"/state/{uuid}",
-                method=WappstoMethod.PUT
+                method=WappstoMethod.PUT,
+                batchable=True,
             )
         except TimeoutError:
             msg = (
@@ -827,8 +1301,22 @@ class IoTAPI(ServiceClass):
             )
             self.log.exception(msg)
 
+    def put_state_async(self, uuid: UUID, data: Union[State, LogValue]) -> "Future[bool]":
+        """Make changes to a state, without waiting for the reply."""
+        # url=f"/services/2.0/state/{uuid}",
+        return self._async_send(
+            data=data,
+            url=f"/state/{uuid}",
+            method=WappstoMethod.PUT,
+            batchable=True,
+        )
+
     def get_state(self, uuid: UUID) -> Union[State, None]:
         """Request to get given state data."""
+        if self.tree is not None:
+            state = self.tree.pop_state(uuid)
+            if state is not None:
+                return state
         return self._reply_send(
             data=None,
             url=f"/state/{uuid}",
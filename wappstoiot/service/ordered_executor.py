@@ -0,0 +1,268 @@
+"""Contain the executor, that run the callbacks in order for each object."""
+import logging
+import threading
+import time
+
+from collections import deque
+from enum import Enum
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+
+from typing import Any
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Hashable
+from typing import NamedTuple
+from typing import Tuple
+
+
+class CoalescePolicy(str, Enum):
+    """What to do with a callback, when the same callback is already waiting."""
+
+    ALL = "all"
+    LATEST = "latest"
+    DEBOUNCE = "debounce"
+
+
+class ExecutorQueueMetrics(NamedTuple):
+    """A snapshot of the metrics of one object's callback queue."""
+
+    depth: int
+    peak_depth: int
+    done: int
+    dropped: int
+    wait_avg_sec: float
+    wait_max_sec: float
+    run_avg_sec: float
+    run_max_sec: float
+
+
+class _Task(NamedTuple):
+    future: "Future[Any]"
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...]
+    enqueued_at: float
+
+
+class _KeyQueue:
+    def __init__(self) -> None:
+        self.tasks: Deque[_Task] = deque()
+        self.running = False
+        self.peak_depth = 0
+        self.done = 0
+        self.dropped = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+        self.debounced: Dict[Callable[..., Any], _Task] = {}
+        self.timers: Dict[Callable[..., Any], threading.Timer] = {}
+
+
+class OrderedExecutor:
+    """
+    A thread pool, that run the callbacks for the same key in order.
+
+    The callbacks are queued for each key, (The object UUID) & only one
+    callback for a key is running at the time, so two controls for the same
+    value, are handled in the order they came in. Different keys are run in
+    parallel, on up to max_workers threads.
+
+    After each callback, the key is put in the back of the pool queue, if it
+    have more callbacks waiting, so a key with a slow handler, do not hold
+    back the other keys more than one callback at the time.
+
+    A callback can be submitted with a coalesce policy. With 'latest', a
+    callback replace the same callback, if it is still waiting for its
+    turn, so only the newest data is run, when the key is busy. With
+    'debounce', it is held back until no new data have come for the
+    debounce time, & then run with the newest data. The replaced callbacks
+    are cancelled.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+
+        if max_workers < 1:
+            raise ValueError("The max_workers need to be at least 1.")
+
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="WappstoIoT-Worker",
+        )
+        self.queues: Dict[Hashable, _KeyQueue] = {}
+        self.ready = threading.Condition()
+        self.local = threading.local()
+        self.killed = False
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable[..., Any],
+        *args: Any,
+        coalesce: CoalescePolicy = CoalescePolicy.ALL,
+        debounce_sec: float = 0.1,
+    ) -> "Future[Any]":
+        """
+        Queue the callback, to be run after the earlier ones with the same key.
+
+        Args:
+            key: What the callbacks are kept in order by. (Like the object UUID)
+            fn: The callback.
+            args: The arguments the callback is called with.
+            coalesce: What to do, if the same callback is already waiting.
+            debounce_sec: The quiet time, before a debounced callback is run.
+
+        Returns:
+            The Future, that is set to the result of the callback.
+        """
+        future: "Future[Any]" = Future()
+        task = _Task(
+            future=future,
+            fn=fn,
+            args=args,
+            enqueued_at=time.perf_counter(),
+        )
+        with self.ready:
+            if self.killed:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            queue = self.queues.get(key)
+            if queue is None:
+                queue = self.queues[key] = _KeyQueue()
+            if coalesce == CoalescePolicy.DEBOUNCE:
+                self._debounce(key, queue, task, debounce_sec)
+            else:
+                self._enqueue(key, queue, task, latest=coalesce == CoalescePolicy.LATEST)
+        return task.future
+
+    def _enqueue(self, key: Hashable, queue: _KeyQueue, task: _Task, latest: bool) -> None:
+        """Add the task to the key's queue, & start the key, if idle. Must hold the lock."""
+        if latest:
+            stale = [old for old in queue.tasks if old.fn is task.fn]
+            for old in stale:
+                queue.tasks.remove(old)
+                old.future.cancel()
+            queue.dropped += len(stale)
+        queue.tasks.append(task)
+        queue.peak_depth = max(queue.peak_depth, len(queue.tasks))
+        if queue.running:
+            return
+        queue.running = True
+        self.pool.submit(self._run_next, key)
+
+    def _debounce(self, key: Hashable, queue: _KeyQueue, task: _Task, debounce_sec: float) -> None:
+        """Hold the task back, until the debounce time is over. Must hold the lock."""
+        old = queue.debounced.get(task.fn)
+        if old is not None:
+            old.future.cancel()
+            queue.dropped += 1
+        queue.debounced[task.fn] = task
+        if task.fn in queue.timers:
+            return  # NOTE: The running timer check for newer tasks, when it fire.
+        self._start_timer(key, queue, task.fn, debounce_sec, debounce_sec)
+
+    def _start_timer(
+        self,
+        key: Hashable,
+        queue: _KeyQueue,
+        fn: Callable[..., Any],
+        delay: float,
+        debounce_sec: float,
+    ) -> None:
+        timer = threading.Timer(delay, self._debounce_done, args=(key, fn, debounce_sec))
+        timer.daemon = True
+        queue.timers[fn] = timer
+        timer.start()
+
+    def _debounce_done(self, key: Hashable, fn: Callable[..., Any], debounce_sec: float) -> None:
+        with self.ready:
+            queue = self.queues[key]
+            if self.killed or fn not in queue.debounced:
+                queue.timers.pop(fn, None)
+                return
+            remaining = queue.debounced[fn].enqueued_at + debounce_sec - time.perf_counter()
+            if remaining > 0:
+                self._start_timer(key, queue, fn, remaining, debounce_sec)
+                return
+            del queue.timers[fn]
+            self._enqueue(key, queue, queue.debounced.pop(fn), latest=True)
+
+    def _run_next(self, key: Hashable) -> None:
+        """Run the next callback of the key, & reschedule the key, if it have more."""
+        self.local.in_worker = True
+        while True:
+            with self.ready:
+                queue = self.queues[key]
+                task = queue.tasks.popleft()
+
+            started = time.perf_counter()
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    task.future.set_result(task.fn(*task.args))
+                except BaseException as err:
+                    task.future.set_exception(err)
+            run = time.perf_counter() - started
+            wait = started - task.enqueued_at
+
+            with self.ready:
+                queue.done += 1
+                queue.wait_total += wait
+                queue.wait_max = max(queue.wait_max, wait)
+                queue.run_total += run
+                queue.run_max = max(queue.run_max, run)
+                if not queue.tasks:
+                    queue.running = False
+                    self.ready.notify_all()
+                    return
+                if self.killed:
+                    continue  # NOTE: The pool take no new work, so the rest are run here.
+                self.pool.submit(self._run_next, key)
+                return
+
+    def metrics(self) -> Dict[Hashable, ExecutorQueueMetrics]:
+        """
+        Return the current metrics of each key's queue.
+
+        The wait time is from the callback was queued, until it started, &
+        the run time is how long the callback took.
+        """
+        with self.ready:
+            return {
+                key: ExecutorQueueMetrics(
+                    depth=len(queue.tasks),
+                    peak_depth=queue.peak_depth,
+                    done=queue.done,
+                    dropped=queue.dropped,
+                    wait_avg_sec=queue.wait_total / queue.done if queue.done else 0.0,
+                    wait_max_sec=queue.wait_max,
+                    run_avg_sec=queue.run_total / queue.done if queue.done else 0.0,
+                    run_max_sec=queue.run_max,
+                )
+                for key, queue in self.queues.items()
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop taking new callbacks.
+
+        The queued callbacks are still run, & if wait is set, it waits
+        until they are done. (Unless it is called from a callback.)
+        The debounced callbacks, that are still held back, are cancelled.
+        """
+        with self.ready:
+            self.killed = True
+            for queue in self.queues.values():
+                for timer in queue.timers.values():
+                    timer.cancel()
+                queue.timers.clear()
+                for task in queue.debounced.values():
+                    task.future.cancel()
+                queue.debounced.clear()
+            if wait and not getattr(self.local, 'in_worker', False):
+                while any(queue.running for queue in self.queues.values()):
+                    self.ready.wait()
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,214 @@
+"""Contain the registry of the requests, that are waiting for a reply."""
+import logging
+import math
+import threading
+import time
+
+from concurrent.futures import Future
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import slxjsonrpc
+
+from .rpc_handlers import RpcId
+from .rpc_handlers import remove_handlers
+
+
+class _Pending(NamedTuple):
+    future: "Future[Any]"
+    deadline: float
+    on_timeout: Optional[Callable[[], None]]
+
+
+class PendingRequests:
+    """
+    Keep track of the requests waiting for a reply, keyed by the RPC id.
+
+    Each request get a Future, that is set to the reply, (An ErrorModel, if
+    it was an error reply) or a TimeoutError if no reply came in time. When
+    done, the callbacks slxjsonrpc keep for the id, are removed, so they do
+    not pile up, when replies are lost.
+
+    The timeouts are handled by one thread, with a timer wheel of
+    slot_count slots, that are tick_sec apart. A timeout longer than the
+    wheel, just go around it more than once. When nothing is pending, the
+    thread sleeps until a request is added.
+    """
+
+    def __init__(
+        self,
+        jsonrpc: slxjsonrpc.SlxJsonRpc,
+        tick_sec: float = 0.1,
+        slot_count: int = 64,
+    ):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+
+        self.jsonrpc = jsonrpc
+        self.tick_sec = tick_sec
+
+        self.entries: Dict[RpcId, _Pending] = {}
+        self.slots: List[Set[RpcId]] = [set() for _ in range(slot_count)]
+        self.cursor = 0
+        self.next_tick = time.monotonic() + tick_sec
+
+        self.ready = threading.Condition()
+        self.killed = False
+
+        self.thread = threading.Thread(
+            target=self._wheel_loop,
+            name="WappstoIoT-Timeout",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def __len__(self) -> int:
+        """Return the number of requests waiting for a reply."""
+        return len(self.entries)
+
+    def _slot_for(self, deadline: float) -> int:
+        """Return the slot the deadline falls in. Must hold the lock."""
+        ticks = max(1, math.ceil((deadline - self.next_tick) / self.tick_sec) + 1)
+        return (self.cursor + min(ticks, len(self.slots) - 1)) % len(self.slots)
+
+    def add(
+        self,
+        rpc_id: RpcId,
+        timeout: float,
+        on_timeout: Optional[Callable[[], None]] = None,
+    ) -> "Future[Any]":
+        """
+        Register the request, as waiting for a reply.
+
+        Args:
+            rpc_id: The id of the request.
+            timeout: The seconds to wait for the reply.
+            on_timeout: (Optional) Called when it timed out, before the Future is set.
+
+        Returns:
+            The Future, that is set to the reply.
+        """
+        future: "Future[Any]" = Future()
+        future.set_running_or_notify_cancel()
+        with self.ready:
+            if self.killed:
+                future.set_exception(ConnectionError('Connection have been closed!'))
+                return future
+            now = time.monotonic()
+            if not self.entries:
+                # NOTE: The wheel have been idle, so do not go through the ticks slept over.
+                self.next_tick = now + self.tick_sec
+            deadline = now + timeout
+            self.entries[rpc_id] = _Pending(
+                future=future,
+                deadline=deadline,
+                on_timeout=on_timeout,
+            )
+            self.slots[self._slot_for(deadline)].add(rpc_id)
+            if len(self.entries) == 1:
+                self.ready.notify_all()
+        return future
+
+    def _free(self, rpc_id: RpcId) -> None:
+        remove_handlers(self.jsonrpc, rpc_id)
+
+    def _pop(self, rpc_id: RpcId) -> Optional[_Pending]:
+        with self.ready:
+            entry = self.entries.pop(rpc_id, None)
+        if entry is not None:
+            self._free(rpc_id)
+        return entry
+
+    def resolve(self, rpc_id: RpcId, reply: Any) -> bool:
+        """
+        Set the Future of the request to the reply.
+
+        Returns:
+            True, if it was pending, else
+            False, if it already was done or timed out.
+        """
+        entry = self._pop(rpc_id)
+        if entry is None:
+            return False
+        entry.future.set_result(reply)
+        return True
+
+    def fail(self, rpc_id: RpcId, error: Exception) -> bool:
+        """
+        Set the Future of the request to the error.
+
+        Returns:
+            True, if it was pending, else
+            False, if it already was done or timed out.
+        """
+        entry = self._pop(rpc_id)
+        if entry is None:
+            return False
+        entry.future.set_exception(error)
+        return True
+
+    def _expire(self, now: float) -> List[Tuple[RpcId, _Pending]]:
+        """Move the cursor up to now, & return the expired requests. Must hold the lock."""
+        expired: List[Tuple[RpcId, _Pending]] = []
+        while self.next_tick <= now:
+            self.cursor = (self.cursor + 1) % len(self.slots)
+            self.next_tick += self.tick_sec
+            slot = self.slots[self.cursor]
+            self.slots[self.cursor] = set()
+            for rpc_id in slot:
+                entry = self.entries.get(rpc_id)
+                if entry is None:
+                    continue  # NOTE: Got its reply in the meantime.
+                if entry.deadline > now:
+                    self.slots[self._slot_for(entry.deadline)].add(rpc_id)
+                    continue
+                del self.entries[rpc_id]
+                expired.append((rpc_id, entry))
+        return expired
+
+    def _wheel_loop(self) -> None:
+        self.log.debug("Timeout Wheel Started!")
+        while True:
+            with self.ready:
+                while not self.entries and not self.killed:
+                    self.ready.wait()
+                if self.killed:
+                    break
+                delay = self.next_tick - time.monotonic()
+                if delay > 0:
+                    self.ready.wait(delay)
+                expired = self._expire(time.monotonic())
+
+            for rpc_id, entry in expired:
+                self.log.debug(f"Request timed out: {rpc_id}")
+                self._free(rpc_id)
+                if entry.on_timeout is not None:
+                    try:
+                        entry.on_timeout()
+                    except Exception:
+                        self.log.exception("Timeout callback Error:")
+                entry.future.set_exception(
+                    TimeoutError(f'JsonRPC reply timeout on package: {rpc_id}')
+                )
+        self.log.debug("Timeout Wheel Stopped!")
+
+    def close(self) -> None:
+        """Stop the timeout thread, & fail all pending requests."""
+        with self.ready:
+            self.killed = True
+            entries = self.entries
+            self.entries = {}
+            for slot in self.slots:
+                slot.clear()
+            self.ready.notify_all()
+        for rpc_id, entry in entries.items():
+            self._free(rpc_id)
+            entry.future.set_exception(ConnectionError('Connection have been closed!'))
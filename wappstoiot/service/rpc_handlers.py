@@ -0,0 +1,138 @@
+"""
+Contain the access to the slxjsonrpc internals, the IoT Api's need.
+
+slxjsonrpc do not have a public API, for adding the reply handlers of a
+request it did not create itself, removing the handlers of a request that
+will never be replied to, validating a package without handling it, or
+turning on the verbose errors. So these are done here, & only here, against
+the slxjsonrpc version pinned in setup.py. The same goes for the calls,
+where the slxjsonrpc type stubs do not match the implementation.
+"""
+from enum import Enum
+
+from typing import Any
+from typing import Callable
+from typing import ContextManager
+from typing import Dict
+from typing import Mapping
+from typing import Optional
+from typing import Type
+from typing import Union
+from typing import cast
+
+import slxjsonrpc
+from slxjsonrpc.schema.jsonrpc import ErrorModel
+from slxjsonrpc.schema.jsonrpc import RpcSchemas
+
+from ..schema.iot_schema import JsonData
+from ..schema.iot_schema import ReplyResult
+from ..schema.iot_schema import WappstoMethod
+
+
+RpcId = Union[str, int, None]
+
+
+def create_jsonrpc(
+    method_cb: Mapping[WappstoMethod, Callable[[Any], Any]],
+) -> slxjsonrpc.SlxJsonRpc:
+    """
+    Create the SlxJsonRpc, with the Wappsto schemas.
+
+    Args:
+        method_cb: The callbacks for the requests from the server.
+
+    Returns:
+        The SlxJsonRpc, with the verbose errors turned on.
+    """
+    # NOTE: The stubs expect a Enum member, where it is the Enum class that is used.
+    methods: Any = WappstoMethod
+    callbacks: Dict[Union[Enum, str], Callable[[Any], Any]] = {
+        method: callback for method, callback in method_cb.items()
+    }
+    params: Dict[Union[Enum, str], Union[type, Type[Any]]] = {
+        method: JsonData for method in WappstoMethod
+    }
+    result: Dict[Union[Enum, str], Union[type, Type[Any]]] = {
+        WappstoMethod.GET: ReplyResult,
+        WappstoMethod.POST: ReplyResult,
+        WappstoMethod.PUT: ReplyResult,
+        WappstoMethod.DELETE: ReplyResult,
+        # WappstoMethod.PATCH: ReplyResult,
+        WappstoMethod.HEAD: ReplyResult,
+    }
+    jsonrpc = slxjsonrpc.SlxJsonRpc(
+        methods=methods,
+        method_cb=callbacks,
+        result=result,
+        params=params,
+    )
+    setattr(jsonrpc, '_verbose', True)
+    return jsonrpc
+
+
+def batch(jsonrpc: slxjsonrpc.SlxJsonRpc) -> ContextManager[None]:
+    """
+    Return the context, where the created requests are batched.
+
+    Args:
+        jsonrpc: The SlxJsonRpc, that create the requests.
+
+    Returns:
+        The `SlxJsonRpc.batch` context manager. (The stubs type it as a Iterator)
+    """
+    return cast(ContextManager[None], jsonrpc.batch())
+
+
+def add_handlers(
+    jsonrpc: slxjsonrpc.SlxJsonRpc,
+    rpc_id: RpcId,
+    method: Union[Enum, str],
+    callback: Callable[[Any], None],
+    error_callback: Optional[Callable[[ErrorModel], None]] = None,
+) -> None:
+    """
+    Add the reply handlers for the request, like `create_request` do.
+
+    Args:
+        jsonrpc: The SlxJsonRpc, that will receive the reply.
+        rpc_id: The id of the request.
+        method: The method of the request, used to validate the reply.
+        callback: Called with the result of the reply.
+        error_callback: (Optional) Called with the ErrorModel, on a error reply.
+    """
+    add_result_handling: Callable[..., None] = getattr(jsonrpc, '_add_result_handling')
+    add_result_handling(
+        method=method,
+        _id=rpc_id,
+        callback=callback,
+        error_callback=error_callback,
+    )
+
+
+def remove_handlers(jsonrpc: slxjsonrpc.SlxJsonRpc, rpc_id: RpcId) -> None:
+    """
+    Remove the reply handlers for the request, if any.
+
+    Args:
+        jsonrpc: The SlxJsonRpc, that keep the handlers.
+        rpc_id: The id of the request.
+    """
+    # NOTE: slxjsonrpc never removes the method entry by itself.
+    for name in ('_id_cb', '_id_error_cb', '_id_method'):
+        handlers: Dict[RpcId, Any] = getattr(jsonrpc, name)
+        handlers.pop(rpc_id, None)
+
+
+def parse(jsonrpc: slxjsonrpc.SlxJsonRpc, data: Dict[str, Any]) -> RpcSchemas:
+    """
+    Validate the JSON-RPC package, without handling it.
+
+    Args:
+        jsonrpc: The SlxJsonRpc, with the schemas to validate against.
+        data: The decoded JSON-RPC package.
+
+    Returns:
+        The validated JSON-RPC package.
+    """
+    parse_data: Callable[[Dict[str, Any]], RpcSchemas] = getattr(jsonrpc, '_parse_data')
+    return parse_data(data)
@@ -0,0 +1,111 @@
+"""Contain the local snapshot of the network tree, for a fast warm boot."""
+import logging
+import os
+import threading
+
+from pathlib import Path
+
+from typing import Callable
+from typing import Optional
+from uuid import UUID
+
+import pydantic
+
+from ..schema.base_schema import Network
+from ..utils import codec
+
+
+class ModelSnapshot:
+    """
+    Save & load the last synced network tree, as a JSON file.
+
+    The save is delayed by save_delay_sec, so many changes in a row, (Like
+    when a network is created) only write the file once. The file is
+    written to a temporary file first, synced to the disk, & then moved in
+    place, so a power cut do not leave a broken snapshot behind.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        save_delay_sec: float = 1.0,
+    ):
+        """."""
+        self.log = logging.getLogger(__name__)
+        self.log.addHandler(logging.NullHandler())
+
+        self.path = Path(path)
+        self.save_delay_sec = save_delay_sec
+
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.get_network: Optional[Callable[[], Network]] = None
+        self.timer: Optional[threading.Timer] = None
+
+    def load(self, network_uuid: UUID) -> Optional[Network]:
+        """
+        Load the snapshot of the given network.
+
+        Returns:
+            The network tree, or None if there were no valid snapshot of it.
+        """
+        try:
+            network = Network.model_validate_json(self.path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, pydantic.ValidationError) as err:
+            self.log.warning(f"Could not load the snapshot: {err}")
+            return None
+
+        if network.meta is None or network.meta.id != network_uuid:
+            self.log.info("The snapshot is of another network.")
+            return None
+        return network
+
+    def save(self, network: Network) -> None:
+        """Write the network tree to the snapshot file."""
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        try:
+            with self.save_lock:
+                with temp_path.open('w', encoding='utf-8') as f:
+                    f.write(codec.dumps_model(network))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+                self._fsync_dir()
+        except OSError as err:
+            self.log.warning(f"Could not save the snapshot: {err}")
+            return
+        self.log.debug(f"Snapshot saved: {self.path}")
+
+    def _fsync_dir(self) -> None:
+        """Make sure the rename is on the disk, if the directory can be opened (Not on Windows)."""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        dir_fd = os.open(self.path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def schedule(self, get_network: Callable[[], Network]) -> None:
+        """Save the network tree from get_network, after the save delay."""
+        with self.lock:
+            self.get_network = get_network
+            if self.timer is not None:
+                return
+            self.timer = threading.Timer(self.save_delay_sec, self.flush)
+            self.timer.daemon = True
+            self.timer.name = "WappstoIoT-Snapshot"
+            self.timer.start()
+
+    def flush(self) -> None:
+        """Save the scheduled network tree now, if any."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            get_network = self.get_network
+            self.get_network = None
+        if get_network is not None:
+            self.save(get_network())
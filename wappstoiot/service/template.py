@@ -2,6 +2,8 @@
 from uuid import UUID
 from enum import Enum
 
+from concurrent.futures import Future
+
 from typing import Callable
 from typing import List
 from typing import Optional
@@ -20,6 +22,8 @@ from ..schema.base_schema import StringValue
 from ..schema.base_schema import XmlValue
 from ..schema.iot_schema import WappstoMethod
 
+from .ordered_executor import CoalescePolicy
+
 
 class StatusID(str, Enum):
     """The different states the service class can be in."""
@@ -198,7 +202,9 @@ class ServiceClass(ABC):
     def subscribe_state_event(
         self,
         uuid: UUID,
-        callback: Callable[[State, WappstoMethod], None]
+        callback: Callable[[State, WappstoMethod], None],
+        coalesce: CoalescePolicy = CoalescePolicy.ALL,
+        debounce_sec: float = 0.1,
     ) -> None:
         """Subscribe a function to be call on given state changes."""
         pass
@@ -228,6 +234,11 @@ class ServiceClass(ABC):
         """Make changes to a state."""
         pass
 
+    @abstractmethod
+    def put_state_async(self, uuid: UUID, data: Union[State, LogValue]) -> "Future[bool]":
+        """Make changes to a state, without waiting for the reply."""
+        pass
+
     @abstractmethod
     def get_state(self, uuid: UUID) -> Union[State, None]:
         """Request to get given state data."""
@@ -0,0 +1,345 @@
+"""Contain the local index of a network tree, fetched in one request."""
+import threading
+
+from uuid import UUID
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TypeVar
+from typing import Union
+
+from ..schema.base_schema import Device
+from ..schema.base_schema import Network
+from ..schema.base_schema import State
+from ..schema.base_schema import ValueUnion
+
+from ..utils.model_diff import differs
+
+
+TreeObject = Union[Network, Device, ValueUnion, State]
+T = TypeVar('T')
+
+
+def object_uuid(obj: TreeObject) -> UUID:
+    """Return the UUID of the object, that it need to be in the tree."""
+    if obj.meta is None or obj.meta.id is None:
+        raise ValueError(f"The {type(obj).__name__} have no UUID.")
+    return obj.meta.id
+
+
+def _child_ids(children: Optional[List[Any]]) -> Optional[List[UUID]]:
+    """Replace the expanded children with their UUIDs, like a normal GET returns them."""
+    if children is None:
+        return None
+    return [
+        child if isinstance(child, UUID) else child.meta.id
+        for child in children
+    ]
+
+
+def _merged(old: Any, new: Any) -> Any:
+    """Return the old object, updated with the fields set in the new one."""
+    if old is None:
+        return new
+    return old.model_copy(
+        update={name: value for name, value in new if value is not None}
+    )
+
+
+def changed(old: TreeObject, new: TreeObject) -> bool:
+    """
+    Check if the object was changed, between the 2 versions.
+
+    The `meta.revision` is used if both have it, else the `meta.updated`,
+    else the data without the meta. Only the fields set in the old version
+    are compared, since the server fill in the ones that was not send.
+    """
+    if old.meta is not None and new.meta is not None:
+        if old.meta.revision is not None and new.meta.revision is not None:
+            return old.meta.revision != new.meta.revision
+        if old.meta.updated is not None and new.meta.updated is not None:
+            return old.meta.updated != new.meta.updated
+    return differs(
+        old.model_dump(exclude={'meta'}, exclude_none=True),
+        new.model_dump(exclude={'meta'}),
+    )
+
+
+class TreeIndex:
+    """
+    A local index of the whole network tree.
+
+    Build from the reply to an expand GET of the network, (or a saved
+    snapshot of it) so the devices, values & states can be found by name &
+    UUID, without a round trip for each of them. The objects are stored
+    like a normal GET would return them, with the children as UUIDs.
+
+    The objects are handed out once, so later lookups get the current data
+    from the server. The names are kept, as a tree from the server is
+    authoritative for what existed at the time of the sync. A tree from a
+    snapshot is not, so a name it do not have, is looked up on the server.
+    The objects send to the server afterwards are added, so the tree can be
+    saved again.
+    """
+
+    def __init__(self, network: Network, authoritative: bool = True):
+        """."""
+        self.lock = threading.RLock()
+        self.authoritative = authoritative
+
+        self.network_uuid = object_uuid(network)
+        self.network: Network = network.model_copy(
+            update={'device': _child_ids(network.device)}
+        )
+
+        self.device_names: Dict[str, UUID] = {}
+        self.devices: Dict[UUID, Device] = {}
+        self.value_names: Dict[Tuple[UUID, str], UUID] = {}
+        self.values: Dict[UUID, ValueUnion] = {}
+        self.states: Dict[UUID, State] = {}
+        self.handed_out: Set[UUID] = set()
+        # NOTE: Handed out from a snapshot, & not send since, so might be outdated.
+        self.stale: Set[UUID] = set() if authoritative else {self.network_uuid}
+        self.known_devices: Set[UUID] = set()
+        # NOTE: Only a fully expanded level, can tell that a name do not exist.
+        self.network_complete = True
+
+        for device in network.device or []:
+            if isinstance(device, UUID):
+                self.network_complete = False
+                continue
+            self._add_device(device)
+
+    def _add_device(self, device: Device) -> None:
+        device_uuid = object_uuid(device)
+        if not any(isinstance(value, UUID) for value in device.value or []):
+            self.known_devices.add(device_uuid)
+        if device.name is not None:
+            self.device_names[device.name] = device_uuid
+        self.devices[device_uuid] = device.model_copy(
+            update={'value': _child_ids(device.value)}
+        )
+
+        for value in device.value or []:
+            if isinstance(value, UUID):
+                continue
+            value_uuid = object_uuid(value)
+            if value.name is not None:
+                self.value_names[(device_uuid, value.name)] = value_uuid
+            self.values[value_uuid] = value.model_copy(
+                update={'state': _child_ids(value.state)}
+            )
+
+            for state in value.state or []:
+                if isinstance(state, UUID):
+                    continue
+                self.states[object_uuid(state)] = state
+
+    def __len__(self) -> int:
+        """Return the number of objects in the index."""
+        return len(self.devices) + len(self.values) + len(self.states)
+
+    # -------------------------------------------------------------------------
+    #   Lookups
+    # -------------------------------------------------------------------------
+
+    def device_where(self, network_uuid: UUID, name: str) -> Tuple[bool, Optional[UUID]]:
+        """
+        Find the device by name.
+
+        Returns:
+            (True, UUID or None) if the network is indexed, else
+            (False, None), if the server should be asked.
+        """
+        if network_uuid != self.network_uuid or not self.network_complete:
+            return False, None
+        device_uuid = self.device_names.get(name)
+        return device_uuid is not None or self.authoritative, device_uuid
+
+    def value_where(self, device_uuid: UUID, name: str) -> Tuple[bool, Optional[UUID]]:
+        """
+        Find the value by name, in the given device.
+
+        Returns:
+            (True, UUID or None) if the device is indexed, else
+            (False, None), if the server should be asked.
+        """
+        if device_uuid not in self.known_devices:
+            return False, None
+        value_uuid = self.value_names.get((device_uuid, name))
+        return value_uuid is not None or self.authoritative, value_uuid
+
+    def _hand_out(self, objects: Dict[UUID, T], uuid: UUID) -> Optional[T]:
+        with self.lock:
+            if uuid in self.handed_out or uuid not in objects:
+                return None
+            self.handed_out.add(uuid)
+            if not self.authoritative:
+                self.stale.add(uuid)
+            return objects[uuid]
+
+    def pop_device(self, uuid: UUID) -> Optional[Device]:
+        """Hand out the device, if it was not already."""
+        return self._hand_out(self.devices, uuid)
+
+    def pop_value(self, uuid: UUID) -> Optional[ValueUnion]:
+        """Hand out the value, if it was not already."""
+        return self._hand_out(self.values, uuid)
+
+    def pop_state(self, uuid: UUID) -> Optional[State]:
+        """Hand out the state, if it was not already."""
+        return self._hand_out(self.states, uuid)
+
+    # -------------------------------------------------------------------------
+    #   Updates
+    # -------------------------------------------------------------------------
+
+    def created_device(self, uuid: UUID) -> None:
+        """Mark a device, that was not in the tree, as known, since it have no values yet."""
+        if self.network_complete and uuid not in self.devices:
+            self.known_devices.add(uuid)
+
+    def upsert_network(self, network: Network) -> None:
+        """Update the network, with the data send to the server."""
+        with self.lock:
+            self.stale.discard(self.network_uuid)
+            self.network = _merged(self.network, network).model_copy(
+                update={'device': self.network.device}
+            )
+
+    def upsert_device(self, device: Device) -> None:
+        """Add or update the device, with the data send to the server."""
+        device_uuid = object_uuid(device)
+        with self.lock:
+            old = self.devices.get(device_uuid)
+            self.created_device(device_uuid)
+            self.handed_out.add(device_uuid)
+            self.stale.discard(device_uuid)
+            self.devices[device_uuid] = _merged(old, device).model_copy(
+                update={'value': old.value if old is not None else []}
+            )
+            if device.name is not None:
+                self.device_names[device.name] = device_uuid
+            children = list(self.network.device or [])
+            if device_uuid not in children:
+                self.network.device = children + [device_uuid]
+
+    def upsert_value(self, device_uuid: UUID, value: ValueUnion) -> None:
+        """Add or update the value, with the data send to the server."""
+        value_uuid = object_uuid(value)
+        with self.lock:
+            old = self.values.get(value_uuid)
+            self.handed_out.add(value_uuid)
+            self.stale.discard(value_uuid)
+            self.values[value_uuid] = _merged(old, value).model_copy(
+                update={'state': old.state if old is not None else []}
+            )
+            if value.name is not None:
+                self.value_names[(device_uuid, value.name)] = value_uuid
+            device = self.devices.get(device_uuid)
+            if device is not None and value_uuid not in (device.value or []):
+                device.value = list(device.value or []) + [value_uuid]
+
+    def upsert_state(self, value_uuid: UUID, state: State) -> None:
+        """Add or update the state, with the data send to the server."""
+        state_uuid = object_uuid(state)
+        with self.lock:
+            self.handed_out.add(state_uuid)
+            self.stale.discard(state_uuid)
+            self.states[state_uuid] = _merged(self.states.get(state_uuid), state)
+            value = self.values.get(value_uuid)
+            if value is not None and state_uuid not in (value.state or []):
+                value.state = list(value.state or []) + [state_uuid]
+
+    def update(self, uuid: UUID, obj: TreeObject) -> None:
+        """Update an object in the tree, with the fields send to the server."""
+        levels: List[Tuple[Dict[UUID, Any], Optional[str]]] = [
+            (self.devices, 'value'),
+            (self.values, 'state'),
+            (self.states, None),
+        ]
+        with self.lock:
+            if uuid == self.network_uuid:
+                if isinstance(obj, Network):
+                    self.upsert_network(obj)
+                return
+            for objects, children in levels:
+                old = objects.get(uuid)
+                if old is None:
+                    continue
+                self.handed_out.add(uuid)
+                self.stale.discard(uuid)
+                new = _merged(old, obj)
+                if children is not None:
+                    new = new.model_copy(update={children: getattr(old, children)})
+                objects[uuid] = new
+                return
+
+    def merge(self, fresh: 'TreeIndex') -> List[TreeObject]:
+        """
+        Merge a fresh tree from the server into this one.
+
+        The changed objects, that was not handed out yet, are just replaced.
+        The objects send to the server since, are kept as they are.
+
+        Returns:
+            The changed objects, that was handed out from a snapshot.
+        """
+        handed_out_changes: List[TreeObject] = []
+        levels: List[Tuple[Dict[UUID, Any], Dict[UUID, Any]]] = [
+            (self.devices, fresh.devices),
+            (self.values, fresh.values),
+            (self.states, fresh.states),
+        ]
+        with self.lock:
+            for objects, fresh_objects in levels:
+                for uuid, new in fresh_objects.items():
+                    old = objects.get(uuid)
+                    if uuid in self.handed_out and uuid not in self.stale:
+                        continue
+                    if old is not None and not changed(old, new):
+                        continue
+                    objects[uuid] = new
+                    if old is not None and uuid in self.stale:
+                        handed_out_changes.append(new)
+            self.device_names.update(fresh.device_names)
+            self.value_names.update(fresh.value_names)
+            self.known_devices.update(fresh.known_devices)
+            for device_uuid in fresh.network.device or []:
+                if device_uuid not in (self.network.device or []):
+                    self.network.device = list(self.network.device or []) + [device_uuid]
+            if self.network_uuid in self.stale and changed(self.network, fresh.network):
+                self.network = fresh.network.model_copy(
+                    update={'device': self.network.device}
+                )
+                handed_out_changes.append(self.network)
+            self.authoritative = fresh.authoritative
+            self.stale.clear()
+        return handed_out_changes
+
+    def to_network(self) -> Network:
+        """Return the whole tree, with the children expanded."""
+        with self.lock:
+            devices: List[Any] = []
+            for device_uuid in _child_ids(self.network.device) or []:
+                device = self.devices.get(device_uuid)
+                if device is None:
+                    devices.append(device_uuid)
+                    continue
+                values: List[Any] = []
+                for value_uuid in _child_ids(device.value) or []:
+                    value = self.values.get(value_uuid)
+                    if value is None:
+                        values.append(value_uuid)
+                        continue
+                    states = [
+                        self.states.get(state_uuid, state_uuid)
+                        for state_uuid in _child_ids(value.state) or []
+                    ]
+                    values.append(value.model_copy(update={'state': states}))
+                devices.append(device.model_copy(update={'value': values}))
+            return self.network.model_copy(update={'device': devices})
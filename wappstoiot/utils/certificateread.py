@@ -1,9 +1,14 @@
 """Contain Certificate helper functions."""
+import os
 import ssl
 import pathlib
+import threading
+import uuid
 
 from typing import Any
 from typing import Dict
+from typing import Optional
+from typing import Tuple
 from typing import Union
 
 
@@ -13,3 +18,96 @@ def certificate_info_extraction(crt_path: Union[str, pathlib.Path]) -> Dict[str,
     crt['issuer'] = {x[0][0]: x[0][1] for x in crt['issuer']}
     crt['subject'] = {x[0][0]: x[0][1] for x in crt['subject']}
     return crt
+
+
+# NOTE: The (path, inode, mtime, size) of the ca, crt & key files.
+_Stamp = Tuple[Tuple[str, int, int, int], ...]
+
+
+class CertificateBundle:
+    """
+    The parsed client certificate, & the SSLContext for it.
+
+    Get it with `CertificateBundle.load`, that only parse the files again,
+    when one of them have changed. That way the IoTAPI, createNetwork &
+    every reconnect share the same parsed certificate & SSLContext, instead
+    of loading the cert chain again each time.
+    """
+
+    __cache: Dict[Tuple[pathlib.Path, ...], Tuple[_Stamp, "CertificateBundle"]] = {}
+    __cache_lock = threading.Lock()
+
+    def __init__(self, ca: pathlib.Path, crt: pathlib.Path, key: pathlib.Path):
+        """."""
+        self.ca = ca
+        self.crt = crt
+        self.key = key
+
+        self.info = certificate_info_extraction(crt_path=crt)
+        self.issuer: Dict[str, str] = self.info.get('issuer', {})
+        self.subject: Dict[str, str] = self.info.get('subject', {})
+
+        self.__ssl_context: Optional[ssl.SSLContext] = None
+        self.__ssl_context_lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls,
+        ca: Union[str, pathlib.Path],
+        crt: Union[str, pathlib.Path],
+        key: Union[str, pathlib.Path],
+    ) -> "CertificateBundle":
+        """
+        Return the bundle for the given files, from the cache if unchanged.
+
+        Raises:
+            FileNotFoundError: If one of the files was not found.
+        """
+        paths = tuple(pathlib.Path(x).absolute() for x in (ca, crt, key))
+        stamp = cls._stamp(paths)
+        with cls.__cache_lock:
+            cached = cls.__cache.get(paths)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+            bundle = cls(*paths)
+            cls.__cache[paths] = (stamp, bundle)
+            return bundle
+
+    @staticmethod
+    def _stamp(paths: Tuple[pathlib.Path, ...]) -> _Stamp:
+        stamp = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"'{path.name}' was not found in at: {path.parent}") from None
+            stamp.append((str(path), stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    @property
+    def network_uuid(self) -> uuid.UUID:
+        """The UUID of the network, the certificate is for."""
+        return uuid.UUID(self.subject.get('commonName'))
+
+    @property
+    def endpoint(self) -> str:
+        """The Wappsto endpoint, that issued the certificate, like: 'wappsto.com'."""
+        return self.issuer['commonName']
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        """The SSLContext with the cert chain & CA loaded, created on first use."""
+        with self.__ssl_context_lock:
+            if self.__ssl_context is None:
+                ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+                ssl_context.check_hostname = True
+                ssl_context.verify_flags = ssl.OP_NO_TLSv1_1
+                ssl_context.verify_mode = ssl.CERT_REQUIRED
+                # if logging.root.level <= logging.DEBUG:  # NOTE: Only works after 3.8
+                #     ssl_context.keylog_filename = "keylog_file.log"
+
+                ssl_context.load_cert_chain(certfile=self.crt, keyfile=self.key)
+                ssl_context.load_verify_locations(cafile=self.ca)
+                self.__ssl_context = ssl_context
+            return self.__ssl_context
@@ -0,0 +1,54 @@
+"""
+Contain the JSON codec, used for all the encoding & decoding.
+
+If `orjson` is installed, it is used, else the stdlib `json` is used.
+The pydantic models are serialized by pydantic's own (Rust) serializer,
+since going through a dict first, would only be slower.
+"""
+import json
+
+from typing import Any
+from typing import Iterable
+from typing import Union
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+Buffer = Union[str, bytes, bytearray, memoryview]
+
+
+def _std_loads(data: Buffer) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _std_dumps(data: Any) -> str:
+    # NOTE: Not ensure_ascii, so the output is the same as orjson's & pydantic's.
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+def _orjson_dumps(data: Any) -> str:
+    return orjson.dumps(data).decode()
+
+
+# NOTE: Bound directly, so the hot receive path do not pay for an extra call.
+loads = orjson.loads if orjson is not None else _std_loads
+dumps = _orjson_dumps if orjson is not None else _std_dumps
+
+
+def dumps_model(model: BaseModel) -> str:
+    """Serialize the model into a JSON string, without the unset (None) fields."""
+    return model.model_dump_json(exclude_none=True)
+
+
+def join(documents: Iterable[str]) -> str:
+    """Join the already serialized JSON documents into one JSON list."""
+    return f"[{','.join(documents)}]"
@@ -21,3 +21,26 @@ def exec_with_jitter(
     ) / 10
     temp = threading.Timer(jitter_time, obj, args=args, kwargs=kwargs)
     temp.start()
+
+
+def full_jitter_backoff(
+    attempt: int,
+    base_sec: float,
+    max_sec: float,
+) -> float:
+    """
+    Return how long to wait, before the given retry attempt.
+
+    Use capped exponential backoff with full jitter, so clients that lost
+    the connection at the same time, do not retry in lockstep.
+
+    Args:
+        attempt: The number of the retry, starting from 0.
+        base_sec: The max wait for the first retry.
+        max_sec: The cap for the max wait.
+
+    Returns:
+        A random time between 0 and the capped max wait, in seconds.
+    """
+    # NOTE: The exponent is capped, so it do not overflow the float.
+    return random.uniform(0, min(max_sec, base_sec * 2 ** min(attempt, 32)))
@@ -0,0 +1,90 @@
+"""Contain the diff between the local & the server version of an object."""
+from typing import Any
+from typing import Dict
+from typing import FrozenSet
+from typing import Optional
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+
+Model = TypeVar('Model', bound=BaseModel)
+
+# NOTE: Set by the server, or the children of the object, that are handled by themself.
+server_fields: FrozenSet[str] = frozenset({
+    'meta',
+    'device',
+    'value',
+    'state',
+    'status',
+    'eventlog',
+    'info',
+    'status_payment',
+})
+
+
+def _dump(value: Any, exclude_none: bool) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(exclude_none=exclude_none)
+    return value
+
+
+def differs(old: Any, new: Any) -> bool:
+    """Check if any of the fields set in old, differ in new."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        return any(differs(value, new.get(key)) for key, value in old.items())
+    return bool(old != new)
+
+
+def changed_fields(local: BaseModel, remote: BaseModel) -> Dict[str, Any]:
+    """
+    Find the fields of the local object, that differ from the server version.
+
+    The server owned fields are ignored, & so are the fields that are not
+    set locally, since the server keep its own value for them. For a nested
+    object (Like the `number` of a value) only the fields set locally are
+    compared, since the server fill in the rest, but it is send as a whole.
+
+    Args:
+        local: The object as it should be.
+        remote: The object as the server have it.
+
+    Returns:
+        The changed fields, with the local values.
+    """
+    return {
+        name: value
+        for name, value in local
+        if name not in server_fields
+        and value is not None
+        and differs(
+            _dump(value, exclude_none=True),
+            _dump(getattr(remote, name, None), exclude_none=False),
+        )
+    }
+
+
+def model_diff(local: Model, remote: BaseModel) -> Optional[Model]:
+    """
+    Create an object with only the fields that differ from the server version.
+
+    The meta id, type & version are kept, so the server know what object
+    it is.
+
+    Returns:
+        The object with the changed fields, or None if nothing differs.
+    """
+    fields = changed_fields(local=local, remote=remote)
+    if not fields:
+        return None
+
+    meta = getattr(local, 'meta', None)
+    if meta is not None:
+        fields['meta'] = type(meta)(
+            **{
+                name: getattr(meta, name)
+                for name in ('id', 'type', 'version')
+                if getattr(meta, name, None) is not None
+            }
+        )
+    return type(local)(**fields)